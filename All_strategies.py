@@ -1,8 +1,13 @@
+import logging
+
 import pandas as pd
 import ta
 from backtesting import Strategy
 from backtesting.lib import crossover
 from logger import get_logger
+import bracket_orders
+import multi_timeframe
+import strategy_dsl
 
 # Get module-specific logger
 logger = get_logger(__name__)
@@ -14,24 +19,28 @@ class BaseStrategy(Strategy):
     def init(self):
         try:
             self.params = getattr(self, "strategy_params", {})
-            logger.info(
+            logger.debug(
                 f"[{self.__class__.__name__}] Strategy Parameters: {self.params}"
             )
 
-            # Log DataFrame columns and head
+            # Log DataFrame columns and head (only rendered when DEBUG is on)
             if isinstance(self.data.df, pd.DataFrame):
-                logger.info(
-                    f"[{self.__class__.__name__}] Data Columns: {self.data.df.columns.tolist()}"
-                )
-                logger.info(
-                    f"[{self.__class__.__name__}] Data Sample:\n{self.data.df.head()}"
-                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"[{self.__class__.__name__}] Data Columns: {self.data.df.columns.tolist()}"
+                    )
+                    logger.debug(
+                        f"[{self.__class__.__name__}] Data Sample:\n{self.data.df.head()}"
+                    )
             else:
                 logger.warning(
                     f"[{self.__class__.__name__}] self.data.df is not a DataFrame"
                 )
 
             self.trade_mode = self.params.get("trade_mode", "both").lower()
+            # Bracket levels as fractions (0.05 = 5%); None leaves a side open
+            self.take_profit_pct = None
+            self.stop_loss_pct = None
         except Exception as e:
             logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
 
@@ -51,6 +60,69 @@ class BaseStrategy(Strategy):
             )
             return 0.01  # fallback to minimum
 
+    # Entry/exit rules on the current bar; subclasses override what they use
+    def entry_long(self):
+        return False
+
+    def entry_short(self):
+        return False
+
+    def exit_long(self):
+        return False
+
+    def exit_short(self):
+        return False
+
+    def buy_bracket(self, tag="Long Entry"):
+        """
+        Buy with the take-profit/stop-loss attached to the order, placed
+        around the current close; the engine closes the trade when a bar's
+        High/Low touches either level.
+        """
+        sl, tp = bracket_orders.bracket_prices(
+            self.data.Close[-1], True, self.take_profit_pct, self.stop_loss_pct
+        )
+        return self.buy(size=self.calculate_trade_size(), sl=sl, tp=tp, tag=tag)
+
+    def sell_bracket(self, tag="Short Entry"):
+        """Short counterpart of buy_bracket()."""
+        sl, tp = bracket_orders.bracket_prices(
+            self.data.Close[-1], False, self.take_profit_pct, self.stop_loss_pct
+        )
+        return self.sell(size=self.calculate_trade_size(), sl=sl, tp=tp, tag=tag)
+
+    def next(self):
+        try:
+            if self.position:
+                if self.position.is_long and self.exit_long():
+                    self.position.close()
+                elif self.position.is_short and self.exit_short():
+                    self.position.close()
+
+            if not self.position:
+                if self.can_trade_long() and self.entry_long():
+                    self.buy_bracket()
+                elif self.can_trade_short() and self.entry_short():
+                    self.sell_bracket()
+
+        except Exception as e:
+            logger.exception(
+                f"[{self.__class__.__name__}] Error in next(): {e}",
+                extra={"sample_every": 100},
+            )
+
+    def htf_indicator(self, timeframe, func, *args, columns=("Close",), **kwargs):
+        """
+        Declare an indicator computed on `timeframe` bars (e.g. "1D") and
+        forward-filled onto this strategy's bars without look-ahead:
+        func(*resampled columns, *args, **kwargs), like the `ta` functions.
+        """
+        values = multi_timeframe.htf_indicator(
+            self.data.df, timeframe, func, *args, columns=columns, **kwargs
+        )
+        name = f"{getattr(func, '__name__', 'htf')}_{timeframe}"
+        return self.I(lambda: values, name=name)
+
 
 # === Strategy 1 ===
 class BollingerRSIReversal(BaseStrategy):
@@ -85,43 +157,29 @@ class BollingerRSIReversal(BaseStrategy):
         except Exception as e:
             logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
 
-    def next(self):
-        try:
-            current_price = self.data.Close[-1]
+    def entry_long(self):
+        return (
+            self.rsi[-1] < self.rsi_oversold
+            and self.data.Close[-1] < self.bb_lower[-1]
+        )
 
-            if self.position:
-                entry_price = self.trades[-1].entry_price if self.trades else None
-                if entry_price:
-                    if (
-                        self.position.is_long
-                        and current_price > self.bb_upper[-1]
-                        and self.rsi[-1] > self.rsi_overbought
-                    ):
-                        self.position.close()
-                    elif (
-                        self.position.is_short
-                        and current_price < self.bb_lower[-1]
-                        and self.rsi[-1] < self.rsi_oversold
-                    ):
-                        self.position.close()
+    def entry_short(self):
+        return (
+            self.rsi[-1] > self.rsi_overbought
+            and self.data.Close[-1] > self.bb_upper[-1]
+        )
 
-            if not self.position:
-                if (
-                    self.can_trade_long()
-                    and self.rsi[-1] < self.rsi_oversold
-                    and current_price < self.bb_lower[-1]
-                ):
-                    self.buy(size=self.calculate_trade_size(), tag="Long Entry")
-
-                elif (
-                    self.can_trade_short()
-                    and self.rsi[-1] > self.rsi_overbought
-                    and current_price > self.bb_upper[-1]
-                ):
-                    self.sell(size=self.calculate_trade_size(), tag="Short Entry")
+    def exit_long(self):
+        return (
+            self.data.Close[-1] > self.bb_upper[-1]
+            and self.rsi[-1] > self.rsi_overbought
+        )
 
-        except Exception as e:
-            logger.exception(f"[{self.__class__.__name__}] Error in next(): {e}")
+    def exit_short(self):
+        return (
+            self.data.Close[-1] < self.bb_lower[-1]
+            and self.rsi[-1] < self.rsi_oversold
+        )
 
 
 # === Strategy 2 ===
@@ -164,41 +222,14 @@ class RSIBreakoutMomentum(BaseStrategy):
         except Exception as e:
             logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
 
-    def next(self):
-        try:
-            current_price = self.data.Close[-1]
-
-            if self.position:
-                entry_price = self.trades[-1].entry_price if self.trades else None
-                if entry_price:
-                    if self.position.is_long and (
-                        current_price >= entry_price * (1 + self.take_profit_pct)
-                        or current_price <= entry_price * (1 - self.stop_loss_pct)
-                    ):
-                        self.position.close()
-                    elif self.position.is_short and (
-                        current_price <= entry_price * (1 - self.take_profit_pct)
-                        or current_price >= entry_price * (1 + self.stop_loss_pct)
-                    ):
-                        self.position.close()
+    def entry_long(self):
+        return (
+            self.rsi[-1] > self.rsi_overbought
+            and self.data.Close[-1] > self.bb_upper[-1]
+        )
 
-            if not self.position:
-                if (
-                    self.can_trade_long()
-                    and self.rsi[-1] > self.rsi_overbought
-                    and current_price > self.bb_upper[-1]
-                ):
-                    self.buy(size=self.calculate_trade_size(), tag="Long Entry")
-
-                elif (
-                    self.can_trade_short()
-                    and self.rsi[-1] < self.rsi_oversold
-                    and self.adx[-1] > self.adx_threshold
-                ):
-                    self.sell(size=self.calculate_trade_size(), tag="Short Entry")
-
-        except Exception as e:
-            logger.exception(f"[{self.__class__.__name__}] Error in next(): {e}")
+    def entry_short(self):
+        return self.rsi[-1] < self.rsi_oversold and self.adx[-1] > self.adx_threshold
 
 
 # === Strategy 3 ===
@@ -234,42 +265,11 @@ class MACDBollingerMomentum(BaseStrategy):
         except Exception as e:
             logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
 
-    def next(self):
-        try:
-            current_price = self.data.Close[-1]
-
-            if self.position:
-                entry_price = self.trades[-1].entry_price if self.trades else None
-                if entry_price:
-                    if self.position.is_long and (
-                        current_price >= entry_price * (1 + self.take_profit_pct)
-                        or current_price <= entry_price * (1 - self.stop_loss_pct)
-                    ):
-                        self.position.close()
-
-                    elif self.position.is_short and (
-                        current_price <= entry_price * (1 - self.take_profit_pct)
-                        or current_price >= entry_price * (1 + self.stop_loss_pct)
-                    ):
-                        self.position.close()
-
-            if not self.position:
-                if (
-                    self.can_trade_long()
-                    and crossover(self.macd, 0)
-                    and self.bb_width[-1] > 0
-                ):
-                    self.buy(size=self.calculate_trade_size(), tag="Long Entry")
-
-                elif (
-                    self.can_trade_short()
-                    and crossover(0, self.macd)
-                    and self.bb_width[-1] > 0
-                ):
-                    self.sell(size=self.calculate_trade_size(), tag="Short Entry")
+    def entry_long(self):
+        return crossover(self.macd, 0) and self.bb_width[-1] > 0
 
-        except Exception as e:
-            logger.exception(f"[{self.__class__.__name__}] Error in next(): {e}")
+    def entry_short(self):
+        return crossover(0, self.macd) and self.bb_width[-1] > 0
 
 
 # === Strategy 4 ===
@@ -281,16 +281,23 @@ class MovingAverageTrend(BaseStrategy):
             indicators = self.params.get("indicators", {})
 
             ma_length = indicators.get("ma_length", 200)
+            # Optional higher timeframe for the MA, in hours (0 = the data's own)
+            ma_timeframe_hours = indicators.get("ma_timeframe_hours", 0)
             rsi_length = indicators.get("rsi_length", 14)
             self.rsi_threshold = indicators.get("rsi_threshold", 50)
 
             self.take_profit_pct = indicators.get("take_profit_pct", 5) / 100
             self.stop_loss_pct = indicators.get("stop_loss_pct", 5) / 100
 
-            self.sma_200 = self.I(
-                lambda x: ta.trend.sma_indicator(pd.Series(x), ma_length),
-                close,
-            )
+            if ma_timeframe_hours:
+                self.sma_200 = self.htf_indicator(
+                    f"{ma_timeframe_hours}h", ta.trend.sma_indicator, ma_length
+                )
+            else:
+                self.sma_200 = self.I(
+                    lambda x: ta.trend.sma_indicator(pd.Series(x), ma_length),
+                    close,
+                )
             self.rsi = self.I(
                 lambda x: ta.momentum.rsi(pd.Series(x), rsi_length),
                 close,
@@ -299,39 +306,68 @@ class MovingAverageTrend(BaseStrategy):
         except Exception as e:
             logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
 
-    def next(self):
-        try:
-            current_price = self.data.Close[-1]
+    def entry_long(self):
+        return (
+            self.rsi[-1] > self.rsi_threshold
+            and self.data.Close[-1] > self.sma_200[-1]
+        )
 
-            if self.position:
-                entry_price = self.trades[-1].entry_price if self.trades else None
-                if entry_price:
-                    if self.position.is_long and (
-                        current_price >= entry_price * (1 + self.take_profit_pct)
-                        or current_price <= entry_price * (1 - self.stop_loss_pct)
-                    ):
-                        self.position.close()
-
-                    elif self.position.is_short and (
-                        current_price <= entry_price * (1 - self.take_profit_pct)
-                        or current_price >= entry_price * (1 + self.stop_loss_pct)
-                    ):
-                        self.position.close()
+    def entry_short(self):
+        return (
+            self.rsi[-1] < self.rsi_threshold
+            and self.data.Close[-1] < self.sma_200[-1]
+        )
 
-            if not self.position:
-                if (
-                    self.can_trade_long()
-                    and self.rsi[-1] > self.rsi_threshold
-                    and current_price > self.sma_200[-1]
-                ):
-                    self.buy(size=self.calculate_trade_size(), tag="Long Entry")
-
-                elif (
-                    self.can_trade_short()
-                    and self.rsi[-1] < self.rsi_threshold
-                    and current_price < self.sma_200[-1]
-                ):
-                    self.sell(size=self.calculate_trade_size(), tag="Short Entry")
+
+# === Declarative strategies (strategy_specs.json) ===
+class DeclarativeStrategy(BaseStrategy):
+    """
+    Runs a strategy spec from strategy_specs.json. init() evaluates every
+    rule over the whole history at once; the rules only look up the bar.
+    """
+
+    spec = {}
+
+    @classmethod
+    def for_spec(cls, strategy_name, spec):
+        """A subclass bound to one spec, named after the strategy."""
+        class_name = "".join(part.title() for part in strategy_name.split())
+        return type(class_name, (cls,), {"spec": spec, "__module__": cls.__module__})
+
+    def init(self):
+        try:
+            super().init()
+            plan = strategy_dsl.compile_spec(
+                self.spec, self.params.get("indicators", {})
+            )
+            self.signals = plan.evaluate(
+                {
+                    column: self.data[column]
+                    for column in strategy_dsl.COLUMNS.values()
+                    if column in self.data.df.columns
+                }
+            )
+            if plan.take_profit_pct is not None:
+                self.take_profit_pct = plan.take_profit_pct / 100
+            if plan.stop_loss_pct is not None:
+                self.stop_loss_pct = plan.stop_loss_pct / 100
 
         except Exception as e:
-            logger.exception(f"[{self.__class__.__name__}] Error in next(): {e}")
+            logger.exception(f"[{self.__class__.__name__}] Error during init: {e}")
+
+    def signal(self, rule):
+        """Value of `rule` on the current bar (False if the spec omits it)."""
+        values = self.signals.get(rule)
+        return values is not None and bool(values[len(self.data) - 1])
+
+    def entry_long(self):
+        return self.signal("entry_long")
+
+    def entry_short(self):
+        return self.signal("entry_short")
+
+    def exit_long(self):
+        return self.signal("exit_long")
+
+    def exit_short(self):
+        return self.signal("exit_short")
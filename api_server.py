@@ -0,0 +1,340 @@
+# api_server.py
+# Local HTTP API for running and querying backtests without the Streamlit UI.
+#
+# Backtests run on the same bounded thread pool as the UI (job_runner), on
+# datasets read through the shared OHLCV cache, and can be saved to the runs
+# history in strategy_storage. Handlers never block the event loop: SQLite and
+# CSV work runs in the default executor.
+#
+#   POST /backtests              {"strategy": "Strategy 1", "config": {...},
+#                                 "dataset": {"path": "ohlcv_data/x.csv"} or
+#                                            {"run_id": 12},
+#                                 "save_as": "optional run name"}
+#   GET  /backtests              jobs known to this server
+#   GET  /backtests/{id}         status and progress
+#   GET  /backtests/{id}/stats   statistics of a finished backtest
+#   GET  /backtests/{id}/trades  trades (?limit=&offset=)
+#   GET  /runs                   saved runs (?strategy=&symbol=&timeframe=&name=
+#                                 &min_sharpe=&order_by=&limit=&offset=)
+#   GET  /runs/{run_id}          parameters and metrics of a saved run
+#   GET  /strategies             registered strategy names
+#   GET  /health                 pool and cache status
+#
+# Usage (from the project root):
+#   python api_server.py --port 8080
+
+import argparse
+import asyncio
+import functools
+import json
+import math
+import os
+
+import pandas as pd
+from aiohttp import web
+
+import job_runner
+import strategy_storage
+from data_cache import get_cache, make_key
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Concurrent backtests, and how many may wait for a worker before new
+# submissions are refused with 429
+MAX_CONCURRENT = int(os.environ.get("API_MAX_CONCURRENT_BACKTESTS", 4))
+MAX_PENDING = int(os.environ.get("API_MAX_PENDING_BACKTESTS", 200))
+# Folders datasets may be read from (os.pathsep-separated)
+DATA_DIRS = os.environ.get("API_DATA_DIRS", "ohlcv_data").split(os.pathsep)
+MAX_PAGE_SIZE = 1000
+
+RUNNER_KEY = web.AppKey("runner", job_runner.JobRunner)
+
+
+def _json_value(value):
+    """A statistic or trade field as a JSON value."""
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    if hasattr(value, "item"):  # NumPy scalars
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+def _http_error(exception_class, message):
+    """An aiohttp HTTP exception with the same JSON body as _error()."""
+    return exception_class(
+        text=json.dumps({"error": message}), content_type="application/json"
+    )
+
+
+async def _in_executor(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+
+def _int_param(request, name, default, maximum=None):
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise _http_error(web.HTTPBadRequest, f"'{name}' must be an integer")
+    return min(max(value, 0), maximum) if maximum is not None else max(value, 0)
+
+
+def resolve_dataset(reference):
+    """
+    Path of the CSV a dataset reference points to: {"path": ...} inside one
+    of DATA_DIRS, or {"run_id": ...} for the dataset of a saved run.
+    """
+    if not isinstance(reference, dict):
+        raise ValueError("'dataset' must be an object with 'path' or 'run_id'")
+    if "run_id" in reference:
+        _, _, path = strategy_storage.load_run_metrics(int(reference["run_id"]))
+        if path is None:
+            raise LookupError(f"Run {reference['run_id']} not found")
+        return path
+    if "path" in reference:
+        path = os.path.realpath(reference["path"])
+        roots = [os.path.realpath(d) for d in DATA_DIRS]
+        if not any(os.path.commonpath([path, root]) == root for root in roots):
+            raise PermissionError(f"Datasets must be under {', '.join(DATA_DIRS)}")
+        if not os.path.isfile(path):
+            raise LookupError(f"Dataset {reference['path']} not found")
+        return path
+    raise ValueError("'dataset' must have a 'path' or a 'run_id'")
+
+
+def load_dataset(path):
+    """An OHLCV CSV (time in the first column), via the shared data cache."""
+    key = make_key("api_csv", path, "N/A", os.path.getmtime(path))
+    return get_cache().get_or_load(
+        key, lambda: pd.read_csv(path, index_col=0, parse_dates=True)
+    )
+
+
+def _run_and_save(df, strategy_name, config, save_as, meta, progress_callback):
+    """run_backtest(), then store the run under `save_as` (if given)."""
+    from backtest import run_backtest
+
+    stats = run_backtest(df, strategy_name, config, progress_callback)
+    if stats is not None and save_as:
+        meta["run_id"] = strategy_storage.save_strategy(
+            save_as,
+            {"strategy": strategy_name, **config},
+            df,
+            strategy_storage.serialize_results(stats),
+        )
+    return stats
+
+
+def _job_summary(job):
+    return {
+        "job_id": job.id,
+        "strategy": job.meta.get("strategy"),
+        "status": job.status,
+        "progress": round(job.progress, 4),
+        "bars_done": job.bars_done,
+        "total_bars": job.total_bars,
+        "error": job.error,
+        "run_id": job.meta.get("run_id"),
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _finished_job(request):
+    job = request.app[RUNNER_KEY].get(request.match_info["job_id"])
+    if job is None:
+        raise _http_error(web.HTTPNotFound, "Unknown job")
+    if job.status != job_runner.DONE or job.result is None:
+        raise _http_error(web.HTTPConflict, f"Job is {job.status}")
+    return job
+
+
+async def submit_backtest(request):
+    from backtest import get_strategy_classes
+
+    try:
+        body = await request.json()
+    except ValueError:
+        return _error(400, "Body must be JSON")
+    if not isinstance(body, dict):
+        return _error(400, "Body must be a JSON object")
+    strategy_name = body.get("strategy")
+    config = body.get("config", {})
+    if strategy_name not in get_strategy_classes():
+        return _error(400, f"Unknown strategy '{strategy_name}'")
+    if not isinstance(config, dict):
+        return _error(400, "'config' must be an object")
+
+    runner = request.app[RUNNER_KEY]
+    if runner.active_count() >= MAX_CONCURRENT + MAX_PENDING:
+        return _error(429, "Too many pending backtests; retry later")
+
+    try:
+        path = await _in_executor(resolve_dataset, body.get("dataset"))
+        df = await _in_executor(load_dataset, path)
+    except PermissionError as e:
+        return _error(403, str(e))
+    except LookupError as e:
+        return _error(404, str(e))
+    except (ValueError, TypeError) as e:
+        return _error(400, str(e))
+    if df is None:
+        return _error(400, "Dataset is empty")
+
+    meta = {"strategy": strategy_name, "dataset": path}
+    job_id = runner.submit(
+        _run_and_save,
+        df,
+        strategy_name,
+        config,
+        body.get("save_as"),
+        meta,
+        meta=meta,
+    )
+    return web.json_response({"job_id": job_id, "status": "queued"}, status=202)
+
+
+async def list_backtests(request):
+    jobs = sorted(
+        request.app[RUNNER_KEY].list_jobs(), key=lambda j: j.submitted_at, reverse=True
+    )
+    return web.json_response({"jobs": [_job_summary(job) for job in jobs]})
+
+
+async def backtest_status(request):
+    job = request.app[RUNNER_KEY].get(request.match_info["job_id"])
+    if job is None:
+        return _error(404, "Unknown job")
+    return web.json_response(_job_summary(job))
+
+
+async def backtest_stats(request):
+    job = _finished_job(request)
+    stats = {
+        key: _json_value(value)
+        for key, value in job.result.items()
+        if not str(key).startswith("_")
+    }
+    return web.json_response({"job_id": job.id, "stats": stats})
+
+
+async def backtest_trades(request):
+    job = _finished_job(request)
+    limit = _int_param(request, "limit", 100, MAX_PAGE_SIZE)
+    offset = _int_param(request, "offset", 0)
+    trades = job.result["_trades"]
+    columns = [c for c in trades.columns if not c.startswith(("Entry_", "Exit_"))]
+    page = trades.iloc[offset : offset + limit][columns]
+    records = [
+        {column: _json_value(value) for column, value in zip(columns, row)}
+        for row in page.itertuples(index=False)
+    ]
+    return web.json_response(
+        {"job_id": job.id, "total": len(trades), "offset": offset, "trades": records}
+    )
+
+
+async def list_runs(request):
+    query = request.query
+    filters = {
+        key: query[key]
+        for key in (*strategy_storage.RUN_FILTER_COLUMNS, "name")
+        if query.get(key)
+    }
+    for key in ("min_sharpe", "min_return", "max_drawdown", "min_trades"):
+        if query.get(key):
+            try:
+                filters[key] = float(query[key])
+            except ValueError:
+                return _error(400, f"'{key}' must be a number")
+    limit = _int_param(request, "limit", 50, MAX_PAGE_SIZE)
+    offset = _int_param(request, "offset", 0)
+    try:
+        runs = await _in_executor(
+            strategy_storage.query_runs,
+            filters,
+            order_by=query.get("order_by", "run_id"),
+            descending=query.get("order", "desc") != "asc",
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        return _error(400, str(e))
+    total = await _in_executor(strategy_storage.count_runs, filters)
+    return web.json_response({"total": total, "offset": offset, "runs": runs})
+
+
+async def run_detail(request):
+    try:
+        run_id = int(request.match_info["run_id"])
+    except ValueError:
+        return _error(400, "run_id must be an integer")
+    params, metrics, path = await _in_executor(
+        strategy_storage.load_run_metrics, run_id
+    )
+    if params is None:
+        return _error(404, f"Run {run_id} not found")
+    return web.json_response(
+        {"run_id": run_id, "params": params, "metrics": metrics, "dataset": path}
+    )
+
+
+async def list_strategies(request):
+    from backtest import get_strategy_classes
+
+    names = await _in_executor(lambda: list(get_strategy_classes()))
+    return web.json_response({"strategies": names})
+
+
+async def health(request):
+    runner = request.app[RUNNER_KEY]
+    return web.json_response(
+        {
+            "active_backtests": runner.active_count(),
+            "max_concurrent": runner.max_workers,
+            "max_pending": MAX_PENDING,
+            "data_cache": get_cache().stats(),
+        }
+    )
+
+
+def create_app(max_concurrent=MAX_CONCURRENT):
+    app = web.Application()
+    app[RUNNER_KEY] = job_runner.JobRunner(max_workers=max_concurrent)
+    app.add_routes(
+        [
+            web.post("/backtests", submit_backtest),
+            web.get("/backtests", list_backtests),
+            web.get("/backtests/{job_id}", backtest_status),
+            web.get("/backtests/{job_id}/stats", backtest_stats),
+            web.get("/backtests/{job_id}/trades", backtest_trades),
+            web.get("/runs", list_runs),
+            web.get("/runs/{run_id}", run_detail),
+            web.get("/strategies", list_strategies),
+            web.get("/health", health),
+        ]
+    )
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT)
+    args = parser.parse_args()
+
+    logger.info(f"Starting API on {args.host}:{args.port} ({args.workers} workers)")
+    web.run_app(create_app(args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
-import pandas as pd
-import streamlit as st
-from logger import get_logger
+from logger import get_logger, run_context
+import memory_profiling
+import position_sizing
+import timing
+import strategy_dsl
+from collections.abc import Mapping
 from pathlib import Path
+import copy
 import importlib
 import json
-
-from backtesting import Backtest
+import os
+import sys
+import threading
+import time
 
 # from All_strategies import (
 #     BollingerRSIReversal,
@@ -19,28 +25,169 @@ logger = get_logger(__name__)
 # log module name
 logger.info(f"Running module: {__name__}")
 
+# Fractions of the history at which a drawdown limit is checked
+DRAWDOWN_CHECKPOINTS = (0.25, 0.5, 0.75)
+
+
+class StrategyRegistry(Mapping):
+    """
+    Strategy name -> class, from strategy_registry.json and the declarative
+    strategy_specs.json. Listing names imports nothing; a class is imported
+    on first lookup and cached. Every lookup checks the mtimes of both JSON
+    files and of the strategy's module and reloads whatever changed, so
+    edits take effect without restarting the server; until a file that fails
+    to load is fixed, the previous version stays in use.
+    """
+
+    def __init__(
+        self, path="strategy_registry.json", specs_path=strategy_dsl.SPECS_PATH
+    ):
+        self.path = Path(path)
+        self.specs_path = Path(specs_path)
+        self._lock = threading.RLock()
+        self._class_paths = {}  # name -> "module.ClassName"
+        self._specs = {}  # name -> spec
+        self._classes = {}  # name -> class, filled on first lookup
+        self._file_mtimes = {}  # JSON path -> mtime when last read
+        self._failed_mtimes = {}  # JSON path -> mtime of the last unreadable version
+        self._module_mtimes = {}  # module name -> mtime when last (re)loaded
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except (FileNotFoundError, TypeError):
+            return None
+
+    def _changed(self, path):
+        return self._file_mtimes.get(path, False) != self._mtime(path)
+
+    def _read(self, path, read):
+        """
+        read(path), recording the file's mtime only if that succeeds. A file
+        that cannot be read (e.g. saved half-written) is logged once per
+        version and None is returned, so the previous contents stay in use.
+        """
+        mtime = self._mtime(path)
+        try:
+            contents = read(path)
+        except (json.JSONDecodeError, KeyError, OSError) as e:
+            if self._failed_mtimes.get(path) != mtime:
+                self._failed_mtimes[path] = mtime
+                logger.error(f"Could not read {path}, keeping the previous one: {e}")
+            return None
+        self._file_mtimes[path] = mtime
+        return contents
+
+    @staticmethod
+    def _read_registry(path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _refresh_files(self):
+        if self._changed(self.path):
+            if self.path not in self._file_mtimes and not self.path.exists():
+                raise FileNotFoundError(
+                    f"{self.path} not found. Please add your strategies there."
+                )
+            class_paths = self._read(self.path, self._read_registry)
+            if class_paths is not None:
+                for name, class_path in self._class_paths.items():
+                    if class_paths.get(name) != class_path:
+                        self._classes.pop(name, None)
+                self._class_paths = class_paths
+                logger.info(f"Read strategy registry: {list(class_paths)}")
+
+        if self._changed(self.specs_path):
+            specs = self._read(self.specs_path, strategy_dsl.load_specs)
+            if specs is not None:
+                for name, spec in self._specs.items():
+                    if specs.get(name) != spec:
+                        self._classes.pop(name, None)
+                self._specs = specs
+                logger.info(f"Read strategy specs: {list(specs)}")
+
+    def _module(self, module_name):
+        """Import `module_name`, reloading it if its file changed since."""
+        module = importlib.import_module(module_name)
+        mtime = self._mtime(getattr(module, "__file__", None))
+        known = self._module_mtimes.setdefault(module_name, mtime)
+        if mtime == known:
+            return module
+
+        self._module_mtimes[module_name] = mtime
+        try:
+            module = importlib.reload(module)
+        except Exception as e:
+            # Keep serving the previous classes until the file is fixed
+            logger.exception(f"Reloading {module_name} failed: {e}")
+            return module
+        for name, cls in list(self._classes.items()):
+            if cls.__module__ == module_name:
+                del self._classes[name]
+        logger.info(f"Reloaded strategy module: {module_name}")
+        return module
+
+    def __getitem__(self, strategy_name):
+        with self._lock:
+            self._refresh_files()
+            if strategy_name in self._specs:
+                # Declarative strategies are built on All_strategies' engine class
+                module = self._module("All_strategies")
+                if strategy_name not in self._classes:
+                    self._classes[strategy_name] = module.DeclarativeStrategy.for_spec(
+                        strategy_name, self._specs[strategy_name]
+                    )
+            elif strategy_name in self._class_paths:
+                module_name, class_name = self._class_paths[strategy_name].rsplit(
+                    ".", 1
+                )
+                module = self._module(module_name)
+                if strategy_name not in self._classes:
+                    self._classes[strategy_name] = getattr(module, class_name)
+            else:
+                raise KeyError(strategy_name)
+            return self._classes[strategy_name]
+
+    def __iter__(self):
+        with self._lock:
+            self._refresh_files()
+            return iter(list({**self._class_paths, **self._specs}))
+
+    def __len__(self):
+        return len(list(iter(self)))
+
 
 # Load strategy registry
 def load_strategy_registry(path="strategy_registry.json"):
-    registry_path = Path(path)
-    if not registry_path.exists():
-        raise FileNotFoundError(f"{path} not found. Please add your strategies there.")
+    """Import every registered strategy now and return {name: class}."""
+    return dict(StrategyRegistry(path))
 
-    with open(registry_path, "r") as f:
-        raw_mapping = json.load(f)
 
-    strategy_classes = {}
-    for strategy_name, full_class_path in raw_mapping.items():
-        module_name, class_name = full_class_path.rsplit(".", 1)
-        module = importlib.import_module(module_name)
-        strategy_class = getattr(module, class_name)
-        strategy_classes[strategy_name] = strategy_class
+_strategy_classes = None
+_registry_lock = threading.Lock()
+
+
+def get_strategy_classes():
+    """
+    The process-wide strategy registry. Classes are imported the first time
+    they are looked up, so importing this module and listing strategies
+    stays cheap.
+    """
+    global _strategy_classes
+    with _registry_lock:
+        if _strategy_classes is None:
+            _strategy_classes = StrategyRegistry()
+        return _strategy_classes
 
-    return strategy_classes
+
+def __getattr__(name):
+    # Keep `from backtest import STRATEGY_CLASSES` working, loaded lazily
+    if name == "STRATEGY_CLASSES":
+        return get_strategy_classes()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-STRATEGY_CLASSES = load_strategy_registry()
-logger.info(f"Loaded strategy classes: {list(STRATEGY_CLASSES.keys())}")
 # # Mapping strategy names to classes
 # STRATEGY_CLASSES = {
 #     "Strategy 1": BollingerRSIReversal,
@@ -52,6 +199,9 @@ logger.info(f"Loaded strategy classes: {list(STRATEGY_CLASSES.keys())}")
 
 def is_running_in_jupyter():
     """Detect if running in a Jupyter Notebook."""
+    # A notebook kernel has always imported IPython; don't import it just to check
+    if "IPython" not in sys.modules:
+        return False
     try:
         from IPython import get_ipython
 
@@ -60,9 +210,151 @@ def is_running_in_jupyter():
         return False
 
 
-def run_backtest(df, strategy_name, strategy_config):
-    """Runs a backtest for the given strategy with the provided parameters."""
-    StrategyClass = STRATEGY_CLASSES.get(strategy_name)
+def with_params(StrategyClass, strategy_config):
+    """
+    Subclass the strategy with its own `strategy_params`: the class defaults
+    (if any) overridden by a deep copy of `strategy_config`. The base class
+    is never modified.
+    """
+    params = {
+        **copy.deepcopy(getattr(StrategyClass, "strategy_params", {})),
+        **copy.deepcopy(strategy_config),
+    }
+
+    class RunStrategy(StrategyClass):
+        strategy_params = params
+
+    RunStrategy.__name__ = StrategyClass.__name__
+    RunStrategy.__qualname__ = StrategyClass.__qualname__
+    return RunStrategy
+
+
+def with_progress(StrategyClass, total_bars, progress_callback):
+    """
+    Subclass the strategy so every next() call reports (bars_done, total_bars).
+    The callback may raise to abort the run (e.g. when a job is cancelled).
+    """
+
+    class ProgressStrategy(StrategyClass):
+        def next(self):
+            progress_callback(len(self.data), total_bars)
+            super().next()
+
+    ProgressStrategy.__name__ = StrategyClass.__name__
+    ProgressStrategy.__qualname__ = StrategyClass.__qualname__
+    return ProgressStrategy
+
+
+def with_phases(StrategyClass, total_bars):
+    """
+    Subclass the strategy so init() is recorded as the "indicators" phase,
+    the span from the first to the last next() call can be measured, and an
+    active memory profile is checkpointed at both phase ends.
+    """
+
+    class TimedStrategy(StrategyClass):
+        def init(self):
+            self._loop_start = self._loop_end = None
+            start = time.perf_counter()
+            super().init()
+            self._init_seconds = time.perf_counter() - start
+            timing.record("indicators", self._init_seconds)
+            memory_profiling.checkpoint("indicators")
+
+        def next(self):
+            if self._loop_start is None:
+                self._loop_start = time.perf_counter()
+            super().next()
+            self._loop_end = time.perf_counter()
+            if len(self.data) == total_bars:
+                memory_profiling.checkpoint("next_loop")
+
+    TimedStrategy.__name__ = StrategyClass.__name__
+    TimedStrategy.__qualname__ = StrategyClass.__qualname__
+    return TimedStrategy
+
+
+class DrawdownLimitExceeded(Exception):
+    """Raised to stop a run whose drawdown went over its limit at a checkpoint."""
+
+    def __init__(self, bar, drawdown_pct):
+        super().__init__(f"Drawdown {drawdown_pct:.2f}% at bar {bar}")
+        self.bar = bar
+        self.drawdown_pct = drawdown_pct
+
+
+def with_drawdown_limit(StrategyClass, total_bars, max_drawdown_pct, checkpoints):
+    """
+    Subclass the strategy to track the maximum drawdown of the equity so far
+    and raise DrawdownLimitExceeded at the first checkpoint (a fraction of
+    `total_bars`) where it is above `max_drawdown_pct`.
+    """
+    checkpoint_bars = {max(int(total_bars * c), 1) for c in checkpoints}
+
+    class DrawdownLimitedStrategy(StrategyClass):
+        def init(self):
+            self._peak_equity = 0.0
+            self._max_drawdown = 0.0
+            super().init()
+
+        def next(self):
+            super().next()
+            equity = self.equity
+            if equity > self._peak_equity:
+                self._peak_equity = equity
+            else:
+                drawdown = 1 - equity / self._peak_equity
+                if drawdown > self._max_drawdown:
+                    self._max_drawdown = drawdown
+            bar = len(self.data)
+            if bar in checkpoint_bars and self._max_drawdown * 100 > max_drawdown_pct:
+                raise DrawdownLimitExceeded(bar, self._max_drawdown * 100)
+
+    DrawdownLimitedStrategy.__name__ = StrategyClass.__name__
+    DrawdownLimitedStrategy.__qualname__ = StrategyClass.__qualname__
+    return DrawdownLimitedStrategy
+
+
+def run_backtest(
+    df,
+    strategy_name,
+    strategy_config,
+    progress_callback=None,
+    max_drawdown_pct=None,
+    checkpoints=DRAWDOWN_CHECKPOINTS,
+):
+    """
+    Runs a backtest for the given strategy with the provided parameters.
+    If given, progress_callback(bars_done, total_bars) is called on every bar.
+    With `max_drawdown_pct`, the run stops with DrawdownLimitExceeded at the
+    first of `checkpoints` (fractions of the history) where the drawdown so
+    far is above the limit.
+    Log records are tagged with the active run id (a new one if none is set).
+    """
+    with run_context() as run_id:
+        return _run_backtest(
+            df,
+            strategy_name,
+            strategy_config,
+            progress_callback,
+            run_id,
+            max_drawdown_pct,
+            checkpoints,
+        )
+
+
+def _run_backtest(
+    df,
+    strategy_name,
+    strategy_config,
+    progress_callback,
+    run_id,
+    max_drawdown_pct=None,
+    checkpoints=DRAWDOWN_CHECKPOINTS,
+):
+    from backtesting import Backtest
+
+    StrategyClass = get_strategy_classes().get(strategy_name)
 
     if not StrategyClass:
         msg = f"⚠️ Strategy '{strategy_name}' not found."
@@ -75,19 +367,14 @@ def run_backtest(df, strategy_name, strategy_config):
         logger.error(msg)
         return None
     else:
-        logger.info(f"Strategy Class Found: {StrategyClass.__name__}")
-
-    # Update strategy parameters as class attributes so Backtest.run() recognizes them
-    for param_name, param_value in strategy_config.items():
-        logger.info(f"[{strategy_name}] Set parameter {param_name}: {param_value}")
+        logger.debug(f"Strategy Class Found: {StrategyClass.__name__}")
 
-    if hasattr(StrategyClass, "strategy_params"):
-        StrategyClass.strategy_params.update(strategy_config)
-    else:
-        StrategyClass.strategy_params = strategy_config
+    # Parameters live on a subclass private to this run, so concurrent runs of
+    # the same strategy never see each other's values
+    StrategyClass = with_params(StrategyClass, strategy_config)
 
-    logger.info(f"Running backtest for strategy: {strategy_name}")
-    logger.info(f"Final Parameters Used: {strategy_config}")
+    logger.info(f"Running backtest {run_id} for strategy: {strategy_name}")
+    logger.debug(f"Final Parameters Used: {strategy_config}")
 
     if is_running_in_jupyter():
         print(f"📊 Running backtest with strategy: {strategy_name}")
@@ -96,11 +383,41 @@ def run_backtest(df, strategy_name, strategy_config):
     # Initialize Backtest with configured strategy
     initial_cash = strategy_config.get("initial_cash", 10000)
     commission = strategy_config.get("commission", 0.001)
+    # Trade whole lots of `lot_size` units at the real prices (see position_sizing)
+    lot_size = strategy_config.get("lot_size") or 1
 
-    bt = Backtest(df, StrategyClass, cash=initial_cash, commission=commission)
+    if progress_callback is not None:
+        StrategyClass = with_progress(StrategyClass, len(df), progress_callback)
+    if max_drawdown_pct is not None:
+        StrategyClass = with_drawdown_limit(
+            StrategyClass, len(df), max_drawdown_pct, checkpoints
+        )
+    timed = timing.is_active() or memory_profiling.is_active()
+    if timed:
+        StrategyClass = with_phases(StrategyClass, len(df))
 
+    bt = Backtest(
+        df, StrategyClass, cash=initial_cash / lot_size, commission=commission
+    )
+
+    start = time.perf_counter()
     stats = bt.run()  # Pass parameters when calling run()
 
+    if timed:
+        # Whatever run() spent outside init() and the next() loop is stats work
+        elapsed = time.perf_counter() - start
+        strategy = stats._strategy
+        loop = (
+            strategy._loop_end - strategy._loop_start
+            if strategy._loop_start is not None
+            else 0.0
+        )
+        timing.record("next_loop", loop)
+        timing.record("stats", max(elapsed - loop - strategy._init_seconds, 0.0))
+        memory_profiling.checkpoint("stats")
+
+    stats = position_sizing.to_units(stats, lot_size)
+
     # Print results in Jupyter for immediate feedback
     if is_running_in_jupyter():
         print("Backtest Results:", stats)
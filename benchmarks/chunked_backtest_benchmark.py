@@ -0,0 +1,172 @@
+# benchmarks/chunked_backtest_benchmark.py
+# Writes a long synthetic 1m CSV, backtests each strategy on it in memory
+# (read_csv + run_backtest) and with chunked_backtest, and checks that the
+# trades, the equity curve and the summary stats are the same. Prints the
+# time of both, and the traced peak memory (tracemalloc) of the in-memory run
+# and of chunked runs with each --chunk-rows, which stays flat however long
+# the file is. Exits with status 1 on any difference.
+#
+# Usage (from the project root):
+#   python benchmarks/chunked_backtest_benchmark.py
+#   python benchmarks/chunked_backtest_benchmark.py --bars 2600000 --skip-memory-run
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+STRATEGIES = ["Strategy 1", "Strategy 2", "Strategy 3", "Strategy 4"]
+STATS = ["Equity Final [$]", "Equity Peak [$]", "Return [%]", "Max. Drawdown [%]"]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def traced_peak(fn, *args):
+    """Peak traced memory (MB) while running fn(*args)."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def in_memory(path, name, config, run_backtest):
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    return run_backtest(df, name, config)
+
+
+def same_values(left, right):
+    left, right = np.asarray(left), np.asarray(right)
+    if left.dtype.kind in "fc" or right.dtype.kind in "fc":
+        return np.array_equal(left.astype(float), right.astype(float), equal_nan=True)
+    return np.array_equal(left, right)
+
+
+def compare(stats, chunked):
+    """Names of the outputs that differ between the two runs."""
+    # round_trip: pandas' default float parser can be an ulp off
+    trades = pd.read_csv(
+        chunked["_trades"],
+        parse_dates=["EntryTime", "ExitTime"],
+        float_precision="round_trip",
+    )
+    equity = pd.read_csv(
+        chunked["_equity_curve"], index_col=0, float_precision="round_trip"
+    )
+    expected = stats["_trades"]
+    different = []
+    if len(trades) != len(expected):
+        return ["# Trades"]
+    for column in [
+        "Size",
+        "EntryBar",
+        "ExitBar",
+        "EntryPrice",
+        "ExitPrice",
+        "PnL",
+        "ReturnPct",
+    ]:
+        if not same_values(trades[column], expected[column]):
+            different.append(column)
+    # SL/TP are left out: the engine blanks the bracket that closed a trade
+    for column in ["EntryTime", "ExitTime"]:
+        if not (trades[column].to_numpy() == expected[column].to_numpy()).all():
+            different.append(column)
+    if not same_values(equity["Equity"], stats["_equity_curve"]["Equity"]):
+        different.append("equity curve")
+    for key in STATS:
+        if chunked[key] != stats[key]:
+            different.append(key)
+    return different
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked backtest benchmark.")
+    parser.add_argument("--bars", type=int, default=200_000)
+    parser.add_argument(
+        "--chunk-rows", type=int, nargs="+", default=[10_000, 50_000, 200_000]
+    )
+    parser.add_argument("--skip-memory-run", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import chunked_backtest
+    from backtest import run_backtest
+    from optimizer import default_params
+
+    tmp = tempfile.mkdtemp(prefix="chunked_backtest_benchmark_")
+    path = os.path.join(tmp, "ohlcv_1m.csv")
+    generate_ohlcv(args.bars, seed=11, timeframe="1m").to_csv(path)
+    print(f"{args.bars:,} bars, {os.path.getsize(path) / 1e6:.0f} MB CSV")
+
+    ok = True
+    try:
+        for name in STRATEGIES:
+            config = {
+                "initial_cash": 100_000,
+                "commission": 0.001,
+                "position_size": 50,
+                "indicators": default_params(name),
+            }
+            output = os.path.join(tmp, name.replace(" ", "_"))
+            chunked, seconds = timed(
+                chunked_backtest.run_chunked_backtest,
+                path,
+                name,
+                config,
+                output,
+                args.chunk_rows[0],
+            )
+            line = f"{name}: chunked {seconds:6.1f}s, {chunked['# Trades']} trades"
+            if not args.skip_memory_run:
+                stats, seconds = timed(in_memory, path, name, config, run_backtest)
+                different = compare(stats, chunked)
+                ok &= not different
+                line += (
+                    f" | in memory {seconds:6.1f}s, {stats['# Trades']} trades | "
+                    + ("identical" if not different else f"DIFFERENT: {different}")
+                )
+            print(line)
+
+        # Peak memory, with the modules already imported by the runs above
+        name = STRATEGIES[0]
+        config = {"initial_cash": 100_000, "indicators": default_params(name)}
+        if not args.skip_memory_run:
+            peak = traced_peak(in_memory, path, name, config, run_backtest)
+            print(f"{name} in memory: peak {peak:7.1f} MB")
+        for chunk_rows in args.chunk_rows:
+            peak = traced_peak(
+                chunked_backtest.run_chunked_backtest,
+                path,
+                name,
+                config,
+                os.path.join(tmp, "sizes"),
+                chunk_rows,
+            )
+            print(f"{name}, {chunk_rows:>9,} rows per chunk: peak {peak:7.1f} MB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print("OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
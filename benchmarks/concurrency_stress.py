@@ -0,0 +1,102 @@
+# benchmarks/concurrency_stress.py
+# Runs many backtests of the same strategy at once on a thread pool, each with
+# different parameters, and checks every result against a sequential run with
+# the same parameters. Any leak of parameters between runs shows up as a
+# mismatch. Exits with status 1 on a mismatch.
+#
+# Usage (from the project root):
+#   python benchmarks/concurrency_stress.py
+#   python benchmarks/concurrency_stress.py --runs 64 --workers 16 --bars 50000
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+# Metrics compared between the concurrent and the sequential run
+CHECKED_METRICS = ["# Trades", "Return [%]", "Equity Final [$]", "Max. Drawdown [%]"]
+
+
+def make_configs(runs):
+    """`runs` distinct parameter sets for the Bollinger/RSI family of strategies."""
+    configs = []
+    for i in range(runs):
+        configs.append(
+            {
+                "initial_cash": 100_000,
+                "position_size": 50 + i % 50,
+                "commission": 0.001,
+                "indicators": {
+                    "rsi_length": 6 + i % 16,
+                    "rsi_overbought": 65 + i % 4 * 3,
+                    "rsi_oversold": 35 - i % 4 * 3,
+                    "bb_length": 10 + (i * 3) % 30,
+                    "bb_std": 1.5 + (i % 3) * 0.5,
+                },
+            }
+        )
+    return configs
+
+
+def summary(stats):
+    return {metric: stats[metric] for metric in CHECKED_METRICS}
+
+
+def same(a, b):
+    """Metric dicts equal, treating NaN == NaN."""
+    return all(
+        a[k] == b[k] or (a[k] != a[k] and b[k] != b[k]) for k in CHECKED_METRICS
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent backtest stress test.")
+    parser.add_argument("--strategy", default="Strategy 1")
+    parser.add_argument("--runs", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--bars", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    from backtest import get_strategy_classes, run_backtest
+
+    df = generate_ohlcv(args.bars, seed=args.seed)
+    configs = make_configs(args.runs)
+
+    start = time.perf_counter()
+    expected = [summary(run_backtest(df, args.strategy, c)) for c in configs]
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_backtest, df, args.strategy, c) for c in configs]
+        actual = [summary(f.result()) for f in futures]
+    concurrent = time.perf_counter() - start
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if not same(a, b)]
+    distinct = len({tuple(map(str, r.values())) for r in expected})
+    StrategyClass = get_strategy_classes()[args.strategy]
+    leaked = "strategy_params" in vars(StrategyClass)
+
+    print(f"{args.runs} runs of {args.strategy} on {args.bars:,} bars, {args.workers} threads")
+    print(f"sequential {sequential:.2f}s, concurrent {concurrent:.2f}s")
+    print(f"{distinct} distinct results across {args.runs} parameter sets")
+    for i in mismatches:
+        print(f"run {i}: expected {expected[i]}, got {actual[i]}")
+    print(f"base class strategy_params modified: {leaked}")
+    if mismatches or leaked:
+        print(f"FAILED: {len(mismatches)} mismatching run(s)")
+        sys.exit(1)
+    print("OK: every concurrent run matches its sequential run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/import_time.py
+# Measures cold import cost of the app modules (python -X importtime) and the
+# cold load time of a Streamlit page, each in a fresh interpreter.
+#
+# Usage (from the project root):
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --top 15 --page pages/Backtest_Strategies.py
+#   python benchmarks/import_time.py --json import_times.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported when the Backtest page opens
+DEFAULT_MODULES = [
+    "logger",
+    "strategy_storage",
+    "data_cache",
+    "job_runner",
+    "chart_utils",
+    "data_preview",
+    "trade_analysis",
+    "metrics_display",
+    "theme_manager",
+    "backtest",
+]
+
+PAGE_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+AppTest.from_file({page!r}, default_timeout=120).run()
+print(time.perf_counter() - start)
+"""
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_imports(modules):
+    """Import `modules` in a fresh interpreter and return the importtime table."""
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure_page(page):
+    """Seconds for the first (cold) run of a Streamlit page script."""
+    result = subprocess.run(
+        [sys.executable, "-c", PAGE_SCRIPT.format(page=page)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import and page load time.")
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--page", default="pages/Backtest_Strategies.py")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = measure_imports(args.modules)
+    wall = time.perf_counter() - start
+
+    print(f"Cold import of {len(args.modules)} app modules: {wall:.2f}s wall")
+    print(f"\n{'module':40s} {'cumulative ms':>14s}")
+    for module in args.modules:
+        if module in timings:
+            print(f"{module:40s} {timings[module][1] / 1000:14.1f}")
+
+    # Heaviest top-level packages pulled in along the way
+    top_level = {
+        name: cumulative
+        for name, (_, cumulative) in timings.items()
+        if "." not in name and name not in args.modules
+    }
+    print(f"\nTop {args.top} third-party/stdlib packages:")
+    for name, cumulative in sorted(top_level.items(), key=lambda kv: -kv[1])[
+        : args.top
+    ]:
+        print(f"{name:40s} {cumulative / 1000:14.1f}")
+
+    page_seconds = None
+    if args.page:
+        page_seconds = measure_page(args.page)
+        print(f"\nCold page run of {args.page}: {page_seconds:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "import_wall_seconds": wall,
+                    "modules_ms": {
+                        m: timings[m][1] / 1000 for m in args.modules if m in timings
+                    },
+                    "packages_ms": {k: v / 1000 for k, v in top_level.items()},
+                    "page": args.page,
+                    "page_seconds": page_seconds,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/logging_overhead.py
+# Backtest slowdown caused by logging: disabled vs. default level vs. a DEBUG
+# run through the background queue vs. DEBUG written synchronously (the old
+# setup, kept here only as a reference point).
+#
+# Usage (from the project root):
+#   python benchmarks/logging_overhead.py
+#   python benchmarks/logging_overhead.py --strategy "Strategy 2" --repeat 10
+
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import logger as app_logger  # noqa: E402
+from backtest import run_backtest  # noqa: E402
+
+DEFAULT_CSV = "ohlcv_data/coinbase_1h_RevBB&RSI_btc.csv"
+# Same rescaling the Backtest page applies so BTC prices fit the cash
+PRICE_FACTOR = 1000
+
+
+@contextlib.contextmanager
+def logging_mode(mode):
+    """Temporarily switch the logging setup to one of the benchmark modes."""
+    root = logging.getLogger()
+    if mode == "off":
+        logging.disable(logging.CRITICAL)
+        try:
+            yield
+        finally:
+            logging.disable(logging.NOTSET)
+    elif mode == "default":
+        yield
+    elif mode == "debug":
+        with app_logger.run_context(level="DEBUG"):
+            yield
+    elif mode == "debug-sync":
+        handlers = root.handlers[:]
+        with tempfile.TemporaryDirectory() as tmp:
+            sync_handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+            sync_handler.setFormatter(app_logger.JsonFormatter())
+            sync_handler.addFilter(app_logger.RunContextFilter())
+            root.handlers = [sync_handler]
+            try:
+                with app_logger.run_context(level="DEBUG"):
+                    yield
+            finally:
+                root.handlers = handlers
+                sync_handler.close()
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+def load_data(path):
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    return df[["Open", "High", "Low", "Close", "Volume"]] / PRICE_FACTOR
+
+
+def time_runs(df, strategy, mode, repeat):
+    config = {"initial_cash": 10000, "position_size": 99, "commission": 0.001}
+    timings = []
+    with logging_mode(mode):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run_backtest(df, strategy, dict(config))
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure logging overhead.")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--strategy", default="Strategy 1")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--modes", nargs="*", default=["off", "default", "debug", "debug-sync"]
+    )
+    args = parser.parse_args()
+
+    df = load_data(args.csv)
+    # Warm up imports and indicator code paths
+    time_runs(df, args.strategy, "off", 1)
+
+    print(f"{args.strategy} on {len(df):,} bars, {args.repeat} runs per mode\n")
+    print(f"{'mode':12s} {'median s':>10s} {'min s':>10s} {'vs off':>8s}")
+    baseline = None
+    for mode in args.modes:
+        timings = time_runs(df, args.strategy, mode, args.repeat)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(
+            f"{mode:12s} {median:10.3f} {min(timings):10.3f} "
+            f"{median / baseline:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/optimizer_benchmark.py
+# Compares optimizer.py against an exhaustive grid on the same search space:
+# runs every grid point once, then the TPE and genetic samplers with a fraction
+# of the evaluations, and reports how close each gets to the grid optimum (and
+# the best score's rank among all grid points). Trials are not stored.
+#
+# Usage (from the project root):
+#   python benchmarks/optimizer_benchmark.py
+#   python benchmarks/optimizer_benchmark.py --bars 20000 --trials 40 --workers 8
+
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+CONFIG = {"initial_cash": 100_000, "position_size": 50, "commission": 0.001}
+
+
+def benchmark_space(optimizer):
+    """A Strategy 1 space small enough to grid (13 x 9 x 4 = 468 points)."""
+    return [
+        optimizer.Dimension("rsi_length", 6, 30, 2),
+        optimizer.Dimension("bb_length", 10, 50, 5),
+        optimizer.Dimension("bb_std", 1.5, 3.0, 0.5),
+    ]
+
+
+def grid(space):
+    points = [{}]
+    for dimension in space:
+        points = [
+            {**point, dimension.name: dimension.value(i)}
+            for point in points
+            for i in range(dimension.size)
+        ]
+    return points
+
+
+def run_grid(optimizer, df, strategy, space, workers):
+    import shared_data
+
+    points = grid(space)
+    with shared_data.share(df) as dataset, ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=optimizer._init_worker,
+        initargs=(dataset.descriptor,),
+    ) as executor:
+        futures = [
+            executor.submit(optimizer._evaluate_in_worker, strategy, CONFIG, point)
+            for point in points
+        ]
+        scores = [future.result()[1] for future in futures]
+    return [-math.inf if s is None else s for s in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimizer vs exhaustive grid.")
+    parser.add_argument("--bars", type=int, default=10_000)
+    parser.add_argument("--trials", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import optimizer
+
+    strategy = "Strategy 1"
+    df = generate_ohlcv(args.bars, seed=args.seed, timeframe="1h")
+    space = benchmark_space(optimizer)
+
+    start = time.perf_counter()
+    grid_scores = run_grid(optimizer, df, strategy, space, args.workers)
+    grid_seconds = time.perf_counter() - start
+    grid_best = max(grid_scores)
+    print(
+        f"grid: {len(grid_scores)} runs in {grid_seconds:.1f}s, "
+        f"best Sharpe {grid_best:.4f}"
+    )
+
+    for method in optimizer.SAMPLERS:
+        start = time.perf_counter()
+        study = optimizer.optimize(
+            df,
+            strategy,
+            CONFIG,
+            method=method,
+            n_trials=args.trials,
+            space=space,
+            workers=args.workers,
+            seed=args.seed,
+            store=False,
+        )
+        seconds = time.perf_counter() - start
+        best = study.best.score if study.best else -math.inf
+        rank = sum(score > best for score in grid_scores) + 1
+        print(
+            f"{method}: {len(study.trials)} runs "
+            f"({len(study.trials) / len(grid_scores):.0%} of the grid) in "
+            f"{seconds:.1f}s, best Sharpe {best:.4f} "
+            f"({best / grid_best:.1%} of the grid optimum, rank {rank})"
+        )
+
+
+if __name__ == "__main__":
+    main()
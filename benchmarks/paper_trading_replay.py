@@ -0,0 +1,162 @@
+# benchmarks/paper_trading_replay.py
+# End-to-end check of paper_trading.py on synthetic data:
+#   1. fills: every strategy runs bar by bar through LiveStrategy over the
+#      whole frame; its closed round trips must equal run_backtest's trades
+#      (entry/exit time, price and size).
+#   2. feed: the replay server serves the same frame on a local port from bar
+#      --warmup, and a PaperTrader polls it (warming up on the history
+#      endpoint); its fills must equal an in-process run warmed up on the same
+#      bars, so every candle arrived exactly once and in order. Prints the
+#      bar-to-decision latency per strategy.
+# Fills are stored in a temporary database. Exits with status 1 on a mismatch.
+#
+# Usage (from the project root):
+#   python benchmarks/paper_trading_replay.py
+#   python benchmarks/paper_trading_replay.py --bars 5000 --speed 500
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from aiohttp import web
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+STRATEGIES = ["Strategy 1", "Strategy 2", "Strategy 3", "Strategy 4"]
+PRODUCT = "SYN-USD"
+
+
+def frame_bars(df, paper_trading):
+    return [
+        paper_trading.Bar(t, *values)
+        for t, values in zip(df.index, df[list(paper_trading.COLUMNS)].to_numpy())
+    ]
+
+
+def round_trips(fills):
+    """Closed trades from fills, in run_backtest's _trades columns."""
+    rows = [
+        (
+            fill["entry_time"],
+            fill["bar_time"],
+            fill["entry_price"],
+            fill["price"],
+            fill["quantity"] if fill["side"] == "sell" else -fill["quantity"],
+        )
+        for fill in fills
+        if fill["reason"] != "entry"
+    ]
+    return pd.DataFrame(
+        rows, columns=["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "Size"]
+    )
+
+
+def check_fills(df, config, paper_trading, run_backtest):
+    ok = True
+    bars = frame_bars(df, paper_trading)
+    for name in STRATEGIES:
+        live = paper_trading.LiveStrategy(name, config(name), PRODUCT)
+        start = time.perf_counter()
+        fills = [fill for bar in bars for fill in live.on_bar(bar)]
+        elapsed = time.perf_counter() - start
+        paper = round_trips(fills)
+        trades = run_backtest(df, name, config(name))._trades[paper.columns]
+        same = len(paper) == len(trades) and all(
+            (paper[c].to_numpy() == trades[c].to_numpy()).all()
+            for c in paper.columns
+        )
+        ok &= same
+        print(
+            f"{name}: {len(paper)} paper trades vs {len(trades)} backtest "
+            f"trades, {elapsed / len(bars) * 1e6:.1f} us/bar, "
+            f"{'identical' if same else 'DIFFERENT'}"
+        )
+    return ok
+
+
+async def check_feed(df, config, paper_trading, args):
+    app = paper_trading.create_replay_app({PRODUCT: df}, args.speed, args.warmup)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    granularity = int((df.index[1] - df.index[0]).total_seconds())
+    trader = paper_trading.PaperTrader(
+        [paper_trading.LiveStrategy(n, config(n), PRODUCT) for n in STRATEGIES],
+        session="replay benchmark",
+    )
+    try:
+        async with paper_trading.PollingFeed(
+            PRODUCT, granularity, f"http://127.0.0.1:{port}", args.poll
+        ) as feed:
+            await trader.run(
+                feed, args.warmup, len(df) - args.warmup, report_every=0
+            )
+    finally:
+        await runner.cleanup()
+
+    expected = paper_trading.PaperTrader(
+        [paper_trading.LiveStrategy(n, config(n), PRODUCT) for n in STRATEGIES],
+        store=False,
+    )
+    bars = frame_bars(df, paper_trading)
+    expected.warm_up(bars[: args.warmup])
+    for bar in bars[args.warmup :]:
+        expected.on_bar(bar)
+
+    columns = ["strategy_name", "bar_time", "side", "reason", "price", "quantity"]
+    received = pd.DataFrame(trader.fills, columns=columns)
+    wanted = pd.DataFrame(expected.fills, columns=columns)
+    same = trader.bars == len(bars) - args.warmup and received.equals(wanted)
+    print(
+        f"replay feed: {trader.bars} bars, {len(received)} fills, "
+        f"{'identical' if same else 'DIFFERENT'} to the in-process run"
+    )
+    print(trader.latency_report().to_string())
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paper trading replay check.")
+    parser.add_argument("--bars", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=300)
+    parser.add_argument("--speed", type=float, default=1000, help="bars per second")
+    parser.add_argument("--poll", type=float, default=0.01, help="seconds")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import paper_trading
+    import strategy_storage
+    from backtest import run_backtest
+
+    strategy_storage.db_file = os.path.join(
+        tempfile.mkdtemp(prefix="paper_trading_replay_"), "paper.db"
+    )
+    strategy_storage.init_db()
+
+    df = generate_ohlcv(args.bars, seed=7, timeframe="1h")
+
+    def config(name):
+        return paper_trading.default_config(name, initial_cash=100_000)
+
+    ok = check_fills(df, config, paper_trading, run_backtest)
+    ok &= asyncio.run(check_feed(df, config, paper_trading, args))
+    stored = strategy_storage.fetch_paper_fills("replay benchmark")
+    print(f"{len(stored)} fills stored")
+
+    print("OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
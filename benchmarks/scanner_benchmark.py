@@ -0,0 +1,137 @@
+# benchmarks/scanner_benchmark.py
+# Times scanner.py on a synthetic universe: writes one long CSV per symbol of
+# binance_precisions.json into a temporary folder, scans it cold (tails read
+# from disk) and warm (tails from the cache), and checks every signal against
+# the strategies' entry rules computed with `ta` over each symbol's full
+# history; every few symbols are recent listings shorter than the scanned
+# tail. With --backtests it also times the old way: one full backtest per
+# symbol. Exits with status 1 on any mismatch.
+#
+# Usage (from the project root):
+#   python benchmarks/scanner_benchmark.py
+#   python benchmarks/scanner_benchmark.py --symbols 60 --bars 50000 --backtests
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import ta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+STRATEGIES = [
+    "Strategy 1",
+    "Strategy 2",
+    "Strategy 3",
+    "Strategy 4",
+    "Strategy 5",
+    "Strategy 6",
+]
+# Every SHORT_EVERY-th symbol is a recent listing with fewer bars than the
+# scanner's tail (scanner.DEFAULT_BARS)
+SHORT_EVERY = 5
+SHORT_BARS = [10, 60, 150, 320]
+
+
+def full_history_signals(df):
+    """{(strategy, side)} met on the last bar, with `ta` on the whole frame."""
+    close, high, low = df["Close"], df["High"], df["Low"]
+    rsi = ta.momentum.rsi(close, 14).iloc[-1]
+    lower = ta.volatility.bollinger_lband(close, 20, 2).iloc[-1]
+    upper = ta.volatility.bollinger_hband(close, 20, 2).iloc[-1]
+    width = ta.volatility.bollinger_wband(close, 20, 2).iloc[-1]
+    sma = ta.trend.sma_indicator(close, 200).iloc[-1]
+    # ta raises on histories shorter than the ADX warm-up, where it is 0
+    adx = ta.trend.adx(high, low, close, 14).iloc[-1] if len(df) > 28 else 0.0
+    # Strategy 3 passes (macd_fast, macd_slow) as ta's (window_slow, window_fast)
+    macd = ta.trend.macd(close, 12, 26, 9).iloc[-2:].to_numpy()
+    fast = ta.trend.ema_indicator(close, 12).iloc[-2:].to_numpy()
+    slow = ta.trend.ema_indicator(close, 26).iloc[-2:].to_numpy()
+    last = close.iloc[-1]
+    rules = {
+        ("Strategy 1", "long"): rsi < 25 and last < lower,
+        ("Strategy 1", "short"): rsi > 75 and last > upper,
+        ("Strategy 2", "long"): rsi > 75 and last > upper,
+        ("Strategy 2", "short"): rsi < 25 and adx > 30,
+        ("Strategy 3", "long"): macd[0] < 0 < macd[1] and width > 0,
+        ("Strategy 3", "short"): macd[0] > 0 > macd[1] and width > 0,
+        ("Strategy 4", "long"): rsi > 50 and last > sma,
+        ("Strategy 4", "short"): rsi < 50 and last < sma,
+        ("Strategy 5", "long"): sma < last < lower and rsi < 30,
+        ("Strategy 5", "short"): sma > last > upper and rsi > 70,
+        ("Strategy 6", "long"): fast[0] < slow[0] and fast[1] > slow[1] and adx > 25,
+        ("Strategy 6", "short"): fast[0] > slow[0] and fast[1] < slow[1] and adx > 25,
+    }
+    return {key for key, met in rules.items() if met}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Universe scanner benchmark.")
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--bars", type=int, default=20_000)
+    parser.add_argument("--backtests", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import scanner
+    from position_sizing import load_precisions
+
+    tmp = tempfile.mkdtemp(prefix="scanner_benchmark_")
+    symbols = list(load_precisions())[: args.symbols]
+    frames = {}
+    for seed, symbol in enumerate(symbols):
+        n_bars = args.bars
+        if seed % SHORT_EVERY == SHORT_EVERY - 1:
+            n_bars = SHORT_BARS[seed // SHORT_EVERY % len(SHORT_BARS)]
+        df = generate_ohlcv(n_bars, seed=seed, timeframe="1h")
+        df.to_csv(scanner.universe_path(symbol, "1h", tmp))
+        frames[symbol] = df
+    print(
+        f"wrote {len(symbols)} symbols x {args.bars} bars (every {SHORT_EVERY}th "
+        f"with {SHORT_BARS} bars) to {tmp}"
+    )
+
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        table = scanner.scan(STRATEGIES, timeframe="1h", data_dir=tmp)
+        print(
+            f"{label} scan: {len(symbols)} symbols in "
+            f"{time.perf_counter() - start:.3f}s, {len(table)} signals"
+        )
+    print(table.head(10).to_string(index=False))
+
+    found = set(zip(table["symbol"], table["strategy"], table["side"]))
+    expected = {
+        (symbol, strategy, side)
+        for symbol, df in frames.items()
+        for strategy, side in full_history_signals(df)
+    }
+    mismatches = found ^ expected
+
+    if args.backtests:
+        from backtest import run_backtest
+
+        config = {"initial_cash": 100_000, "position_size": 50, "commission": 0.001}
+        start = time.perf_counter()
+        for df in frames.values():
+            for strategy in STRATEGIES:
+                run_backtest(df, strategy, config)
+        print(
+            f"full backtests: {len(frames) * len(STRATEGIES)} runs in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+    print("OK" if not mismatches else f"MISMATCH: {sorted(mismatches)}")
+    sys.exit(0 if not mismatches else 1)
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 120)
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/shared_data_benchmark.py
+# Per-task dispatch cost of handing a dataset to worker processes: each task
+# either receives the pickled DataFrame or the shared_data descriptor and
+# attaches to the shared block. The task itself only reads the last close, so
+# the timings are the cost of getting the data there. Also checks that the
+# attached frame equals the original, including frames with a numeric index.
+#
+# Usage (from the project root):
+#   python benchmarks/shared_data_benchmark.py
+#   python benchmarks/shared_data_benchmark.py --sizes 10000 1000000 --tasks 50
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+
+def last_close_pickled(df):
+    return float(df["Close"].iloc[-1])
+
+
+def last_close_shared(descriptor):
+    import shared_data
+
+    return float(shared_data.attach(descriptor)["Close"].iloc[-1])
+
+
+def equals_original(descriptor, path):
+    import pandas as pd
+
+    import shared_data
+
+    return shared_data.attach(descriptor).equals(pd.read_pickle(path))
+
+
+def attached_equals(executor, shared_data, df, path):
+    """Whether a worker attaching to shared `df` gets the same frame."""
+    with shared_data.share(df) as dataset:
+        df.to_pickle(path)
+        same = executor.submit(equals_original, dataset.descriptor, path).result()
+        os.remove(path)
+    return same
+
+
+def time_tasks(executor, fn, argument, tasks):
+    executor.submit(fn, argument).result()  # warm up the worker
+    start = time.perf_counter()
+    results = [executor.submit(fn, argument) for _ in range(tasks)]
+    values = {future.result() for future in results}
+    return (time.perf_counter() - start) / tasks, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory dataset dispatch.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 5_000_000]
+    )
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import shared_data
+
+    tmp = tempfile.mkdtemp(prefix="shared_data_benchmark_")
+    context = multiprocessing.get_context("spawn")
+    ok = True
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        for size in args.sizes:
+            df = generate_ohlcv(size, seed=size, timeframe="1m")
+            pickled, pickled_values = time_tasks(
+                executor, last_close_pickled, df, args.tasks
+            )
+            with shared_data.share(df) as dataset:
+                shared, shared_values = time_tasks(
+                    executor, last_close_shared, dataset.descriptor, args.tasks
+                )
+                path = os.path.join(tmp, f"check_{size}.pkl")
+                same = attached_equals(executor, shared_data, df, path)
+            ok &= same and pickled_values == shared_values
+            print(
+                f"{size:>10,} bars ({dataset.nbytes / 1e6:7.1f} MB): "
+                f"pickled {pickled * 1e3:8.2f} ms/task, "
+                f"shared {shared * 1e3:6.2f} ms/task, "
+                f"{'identical' if same else 'DIFFERENT'}"
+            )
+
+        # Frames without a DatetimeIndex, e.g. after reset_index()
+        df = generate_ohlcv(1000, seed=1, timeframe="1m").reset_index(drop=True)
+        for label, frame in [
+            ("RangeIndex", df),
+            ("float index", df.set_axis(df.index * 0.5)),
+        ]:
+            path = os.path.join(tmp, "check_index.pkl")
+            same = attached_equals(executor, shared_data, frame, path)
+            ok &= same
+            print(f"{label}: {'identical' if same else 'DIFFERENT'}")
+    print("OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/streaming_indicators_benchmark.py
+# Cost of one new candle: recomputing an indicator over the whole history with
+# indicators.py (what a strategy's init() does) against one update() of its
+# streaming_indicators.py counterpart. Also checks that the streaming values
+# match the batch ones at every bar.
+#
+# Usage (from the project root):
+#   python benchmarks/streaming_indicators_benchmark.py
+#   python benchmarks/streaming_indicators_benchmark.py --bars 200000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+# Largest relative difference allowed between streaming and batch values
+TOLERANCE = 1e-8
+
+
+def cases(indicators, streaming):
+    """name -> (batch function of the bars, streaming factory, input columns)"""
+    close = ("Close",)
+    return {
+        "sma(200)": (
+            lambda d: indicators.sma(d["Close"], 200),
+            lambda: streaming.SMA(200),
+            close,
+        ),
+        "bollinger_lband(20, 2)": (
+            lambda d: indicators.bollinger_lband(d["Close"], 20, 2),
+            lambda: _Lower(streaming.BollingerBands(20, 2)),
+            close,
+        ),
+        "ema(50)": (
+            lambda d: indicators.ema(d["Close"], 50),
+            lambda: streaming.EMA(50),
+            close,
+        ),
+        "rsi(14)": (
+            lambda d: indicators.rsi(d["Close"], 14),
+            lambda: streaming.RSI(14),
+            close,
+        ),
+        "macd_signal(26, 12, 9)": (
+            lambda d: indicators.macd_signal(d["Close"]),
+            lambda: _Signal(streaming.MACD()),
+            close,
+        ),
+        "adx(14)": (
+            lambda d: indicators.adx(d["High"], d["Low"], d["Close"], 14),
+            lambda: streaming.ADX(14),
+            ("High", "Low", "Close"),
+        ),
+    }
+
+
+class _Lower:
+    """Lower Bollinger band alone, as the batch function returns it."""
+
+    def __init__(self, bands):
+        self.bands = bands
+
+    def update(self, close):
+        return self.bands.update(close)[0]
+
+
+class _Signal:
+    """MACD signal line alone."""
+
+    def __init__(self, macd):
+        self.macd = macd
+
+    def update(self, close):
+        self.macd.update(close)
+        return self.macd.signal
+
+
+def max_relative_difference(a, b):
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf
+    valid = ~np.isnan(a)
+    scale = np.maximum(np.abs(b[valid]), 1.0)
+    return float(np.max(np.abs(a[valid] - b[valid]) / scale, initial=0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs batch indicators.")
+    parser.add_argument("--bars", type=int, default=50_000)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import indicators
+    import streaming_indicators
+
+    df = generate_ohlcv(args.bars, seed=11, timeframe="1h")
+    data = {column: df[column].to_numpy() for column in ("High", "Low", "Close")}
+
+    ok = True
+    all_cases = cases(indicators, streaming_indicators)
+    for name, (batch, factory, columns) in all_cases.items():
+        start = time.perf_counter()
+        expected = batch(data)
+        batch_seconds = time.perf_counter() - start
+
+        indicator = factory()
+        start = time.perf_counter()
+        values = streaming_indicators.run(indicator, *(data[c] for c in columns))
+        update_seconds = (time.perf_counter() - start) / args.bars
+
+        difference = max_relative_difference(values, np.asarray(expected))
+        ok &= difference <= TOLERANCE
+        print(
+            f"{name:24s} full recompute {batch_seconds * 1e3:8.2f} ms, "
+            f"update {update_seconds * 1e6:5.2f} us "
+            f"({batch_seconds / update_seconds:,.0f}x), max diff {difference:.1e}"
+        )
+    print("OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
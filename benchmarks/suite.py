@@ -0,0 +1,267 @@
+# benchmarks/suite.py
+# Reproducible benchmark suite on seeded synthetic OHLCV data.
+#
+# Times every registered strategy (including the declarative ones from
+# strategy_specs.json and their compiled signal evaluation), the ta indicator
+# calls the strategies use, process_trades, save_strategy/load_strategy and
+# format_ohlcv_data. Reports the median wall time, throughput in bars/s and
+# peak traced memory of each case, and writes everything to a JSON file that
+# can be compared against a run from another commit.
+#
+# Usage (from the project root):
+#   python benchmarks/suite.py --output bench.json
+#   python benchmarks/suite.py --sizes 10000 100000 1000000 10000000 --repeat 1
+#   python benchmarks/suite.py --output new.json --baseline old.json --threshold 0.15
+#   python benchmarks/suite.py --compare old.json new.json
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ta  # noqa: E402
+
+from synthetic import generate_ohlcv, to_coinbase_candles  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_THRESHOLD = 0.10  # 10% slower than the baseline counts as a regression
+BACKTEST_CONFIG = {"initial_cash": 100_000, "position_size": 99, "commission": 0.001}
+
+# Indicator calls made by the strategies in All_strategies.py (default lengths)
+INDICATORS = {
+    "bollinger_hband": lambda df: ta.volatility.bollinger_hband(df["Close"], 20, 2),
+    "bollinger_lband": lambda df: ta.volatility.bollinger_lband(df["Close"], 20, 2),
+    "bollinger_wband": lambda df: ta.volatility.bollinger_wband(df["Close"], 20, 2),
+    "rsi": lambda df: ta.momentum.rsi(df["Close"], 14),
+    "adx": lambda df: ta.trend.adx(df["High"], df["Low"], df["Close"], 14),
+    "macd": lambda df: ta.trend.macd(df["Close"], 26, 12),
+    "sma_200": lambda df: ta.trend.sma_indicator(df["Close"], 200),
+}
+
+
+def measure(fn, repeat, trace_memory=True):
+    """
+    Run fn() `repeat` times untraced for timing, then once under tracemalloc
+    for the peak memory (tracing slows code down, so it is kept separate).
+    Returns (median seconds, peak MB or None, last result).
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return statistics.median(timings), peak_mb, result
+
+
+def load_registry():
+    from backtest import get_strategy_classes
+
+    return get_strategy_classes()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def serializable_results(stats):
+    """Backtest stats reduced to what save_strategy stores (strings)."""
+    results = {k: str(v) for k, v in stats.items() if not k.startswith("_")}
+    results["_trades"] = stats["_trades"].astype(str).to_dict(orient="records")
+    return results
+
+
+def run_suite(sizes, repeat, trace_memory, seed, only=None):
+    """Run every case on each size and return {"case@bars": result}."""
+    from backtest import run_backtest
+    from coinbase_data import format_ohlcv_data
+    from strategy_dsl import compile_spec, load_specs
+    from trade_analysis import process_trades
+
+    registry = load_registry()
+    specs = load_specs()
+    cases = {}
+    scratch = tempfile.mkdtemp(prefix="bench_storage_")
+
+    def add(case, n_bars, fn):
+        if only and not any(pattern in case for pattern in only):
+            return None
+        seconds, peak_mb, result = measure(fn, repeat, trace_memory)
+        cases[f"{case}@{n_bars}"] = {
+            "case": case,
+            "bars": n_bars,
+            "seconds": seconds,
+            "bars_per_sec": n_bars / seconds if seconds else None,
+            "peak_mb": peak_mb,
+        }
+        mem = f"{peak_mb:9.1f} MB" if peak_mb is not None else ""
+        print(f"{case:32s} {n_bars:>10,} {seconds:10.4f} s {n_bars / seconds:14,.0f} bars/s {mem}")
+        return result
+
+    # Warm up imports and the strategy registry so the first case is not penalised
+    run_backtest(generate_ohlcv(1_000, seed=seed), next(iter(registry)), dict(BACKTEST_CONFIG))
+
+    for n_bars in sizes:
+        df = generate_ohlcv(n_bars, seed=seed)
+
+        for name, fn in INDICATORS.items():
+            add(f"indicator:{name}", n_bars, lambda fn=fn: fn(df))
+
+        columns = {column: df[column].to_numpy() for column in df.columns}
+        for name, spec in specs.items():
+            add(
+                f"signals:{name}",
+                n_bars,
+                lambda spec=spec: compile_spec(spec).evaluate(columns),
+            )
+
+        stats = None
+        for strategy_name in registry:
+            result = add(
+                f"strategy:{strategy_name}",
+                n_bars,
+                lambda s=strategy_name: run_backtest(df, s, dict(BACKTEST_CONFIG)),
+            )
+            stats = stats if stats is not None else result
+        if stats is None:  # Strategies filtered out; later cases still need a run
+            stats = run_backtest(df, next(iter(registry)), dict(BACKTEST_CONFIG))
+
+        add("process_trades", n_bars, lambda: process_trades(stats, df))
+
+        candles = to_coinbase_candles(df)
+        add("format_ohlcv_data", n_bars, lambda: format_ohlcv_data(candles))
+
+        results = serializable_results(stats)
+        # Storage writes go to a scratch directory, never the real database
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            import strategy_storage
+
+            add(
+                "save_strategy",
+                n_bars,
+                lambda: strategy_storage.save_strategy(
+                    "bench", {"strategy": "bench"}, df, results
+                ),
+            )
+            add(
+                "load_strategy",
+                n_bars,
+                lambda: strategy_storage.load_strategy("bench"),
+            )
+        finally:
+            os.chdir(cwd)
+        del df
+    shutil.rmtree(scratch, ignore_errors=True)
+    return cases
+
+
+def compare(baseline, current, threshold):
+    """
+    Print the relative change of every case present in both runs and return
+    the cases that got slower by more than `threshold` (0.1 = 10%).
+    """
+    regressions = []
+    print(f"\n{'case':44s} {'baseline s':>11s} {'current s':>11s} {'change':>8s}")
+    for key, new in current["cases"].items():
+        old = baseline["cases"].get(key)
+        if old is None or not old["seconds"]:
+            continue
+        change = new["seconds"] / old["seconds"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{key:44s} {old['seconds']:11.4f} {new['seconds']:11.4f} {change:+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(key)
+    print(
+        f"\n{len(regressions)} regression(s) above {threshold:.0%} "
+        f"(baseline {baseline.get('commit')}, current {current.get('commit')})"
+    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Run cases containing these names")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc pass")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results against this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Only compare two existing result files",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    os.chdir(PROJECT_ROOT)  # strategy_registry.json / str_params.json paths
+    print(f"{'case':32s} {'bars':>10s} {'median':>12s} {'throughput':>21s} {'peak':>12s}")
+    cases = run_suite(
+        args.sizes, args.repeat, not args.no_memory, args.seed, only=args.only
+    )
+    current = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sizes": args.sizes,
+        "cases": cases,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nWrote {len(cases)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/synthetic.py
+# Seeded synthetic OHLCV data: geometric Brownian motion whose drift and
+# volatility switch between market regimes (bull, bear, choppy) at random
+# intervals. The same seed always gives the same frame.
+
+import numpy as np
+import pandas as pd
+
+# (annualised drift, annualised volatility, mean regime length in bars)
+REGIMES = {
+    "bull": (0.40, 0.35, 2_000),
+    "bear": (-0.50, 0.60, 1_000),
+    "choppy": (0.00, 0.25, 1_500),
+}
+BARS_PER_YEAR = {"1m": 525_600, "5m": 105_120, "15m": 35_040, "1h": 8_760, "1d": 365}
+
+
+def regime_path(n_bars, rng, regimes=REGIMES):
+    """Per-bar regime number: geometric regime lengths, next regime drawn at random."""
+    names = list(regimes)
+    mean_lengths = np.array([regimes[name][2] for name in names], dtype=np.float64)
+    labels, total = [], 0
+    current = rng.integers(len(names))
+    while total < n_bars:
+        # Draw regime lengths in batches so 10M bars need only a few iterations
+        batch = 1024
+        choices = np.empty(batch, dtype=np.int64)
+        for i in range(batch):
+            choices[i] = current
+            current = (current + rng.integers(1, len(names))) % len(names)
+        lengths = rng.geometric(1.0 / mean_lengths[choices])
+        labels.append(np.repeat(choices, lengths))
+        total += int(lengths.sum())
+    return np.concatenate(labels)[:n_bars], names
+
+
+def generate_ohlcv(
+    n_bars, seed=42, timeframe="1m", start_price=100.0, start="2005-01-01"
+):
+    """
+    Build an OHLCV frame with a UTC DatetimeIndex and the columns
+    Open/High/Low/Close/Volume, like the frames the data loaders return.
+    """
+    rng = np.random.default_rng(seed)
+    regimes, names = regime_path(n_bars, rng)
+    params = np.array([REGIMES[name][:2] for name in names])
+    dt = 1.0 / BARS_PER_YEAR[timeframe]
+    mu, sigma = params[regimes, 0], params[regimes, 1]
+
+    # GBM log returns per bar
+    shocks = rng.standard_normal(n_bars)
+    log_returns = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * shocks
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    # Open near the previous close, wicks proportional to bar volatility
+    bar_sigma = sigma * np.sqrt(dt)
+    open_ = np.empty(n_bars)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * np.exp(0.1 * bar_sigma[1:] * rng.standard_normal(n_bars - 1))
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * np.exp(np.abs(rng.standard_normal(n_bars)) * 0.5 * bar_sigma)
+    low = body_low * np.exp(-np.abs(rng.standard_normal(n_bars)) * 0.5 * bar_sigma)
+    volume = rng.lognormal(mean=10.0, sigma=0.5, size=n_bars) * (sigma / 0.35)
+
+    index = pd.date_range(
+        start, periods=n_bars, freq=pd.Timedelta(days=365) * dt, tz="UTC", name="Date"
+    )
+    return pd.DataFrame(
+        {
+            "Open": open_.round(4),
+            "High": high.round(4),
+            "Low": low.round(4),
+            "Close": close.round(4),
+            "Volume": volume.round(2),
+        },
+        index=index,
+    )
+
+
+def to_coinbase_candles(df):
+    """Raw candle rows in Coinbase order: [time, low, high, open, close, volume]."""
+    times = df.index.asi8 // 10**9
+    return np.column_stack(
+        [times, df["Low"], df["High"], df["Open"], df["Close"], df["Volume"]]
+    ).tolist()
@@ -0,0 +1,131 @@
+# benchmarks/work_queue_demo.py
+# Local run of work_queue.py: enqueues a sweep of strategies x datasets x
+# parameters into a temporary SQLite file and drains it with several worker
+# processes, printing queue depth and jobs/s every second. One extra worker
+# claims a batch and dies without finishing it, so its jobs are only done once
+# their short lease has expired and another worker re-leased them. Exits with
+# status 1 unless every job ends with exactly one result.
+#
+# Usage (from the project root):
+#   python benchmarks/work_queue_demo.py
+#   python benchmarks/work_queue_demo.py --workers 8 --bars 20000 --lease 10
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_ohlcv  # noqa: E402
+
+STRATEGIES = ["Strategy 1", "Strategy 4"]
+
+
+def make_jobs(datasets):
+    jobs = []
+    for dataset in datasets:
+        for strategy_name in STRATEGIES:
+            for rsi_length in (7, 10, 14, 21):
+                for position_size in (25, 50, 100):
+                    jobs.append(
+                        {
+                            "sweep": "demo",
+                            "strategy_name": strategy_name,
+                            "dataset": dataset,
+                            "config": {
+                                "initial_cash": 100_000,
+                                "position_size": position_size,
+                                "commission": 0.001,
+                                "indicators": {"rsi_length": rsi_length},
+                            },
+                        }
+                    )
+    return jobs
+
+
+def crashing_worker(db, batch, lease):
+    """Claims a batch and exits without finishing or releasing it."""
+    import work_queue
+
+    jobs = work_queue.WorkQueue(db, lease).claim("crashed-worker", batch)
+    print(f"crashed-worker took jobs {[job['job_id'] for job in jobs]} and died")
+    os._exit(1)
+
+
+def worker(db, batch, lease):
+    import work_queue
+
+    work_queue.run_worker(
+        db, batch_size=batch, lease_seconds=lease, idle_exit_seconds=2
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local work queue demo.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--datasets", type=int, default=3)
+    parser.add_argument("--bars", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--lease", type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    import work_queue
+
+    tmp = tempfile.mkdtemp(prefix="work_queue_demo_")
+    db = os.path.join(tmp, "queue.db")
+    datasets = []
+    for seed in range(args.datasets):
+        path = os.path.join(tmp, f"synthetic_{seed}.csv")
+        generate_ohlcv(args.bars, seed=seed, timeframe="1h").to_csv(path)
+        datasets.append(path)
+
+    queue = work_queue.WorkQueue(db, lease_seconds=args.lease)
+    jobs = make_jobs(datasets)
+    ids = queue.enqueue_many(jobs)
+    # Enqueueing the same sweep again adds nothing
+    assert queue.enqueue_many(jobs) == ids
+    print(f"enqueued {len(ids)} jobs into {db}")
+
+    context = multiprocessing.get_context("spawn")
+    crasher = context.Process(
+        target=crashing_worker, args=(db, args.batch, args.lease)
+    )
+    crasher.start()
+    crasher.join()
+
+    start = time.perf_counter()
+    processes = [
+        context.Process(target=worker, args=(db, args.batch, args.lease))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    while any(process.is_alive() for process in processes):
+        time.sleep(1)
+        stats = queue.stats(window_seconds=10)
+        print(
+            f"{time.perf_counter() - start:5.1f}s  queued {stats['queued']:4d}  "
+            f"leased {stats['leased']:3d}  done {stats['done']:4d}  "
+            f"failed {stats['failed']:3d}  {stats['jobs_per_second']:.2f} jobs/s"
+        )
+    elapsed = time.perf_counter() - start
+
+    depth = queue.depth()
+    results = queue.results("demo")
+    print(
+        f"{depth['done']} jobs done in {elapsed:.1f}s "
+        f"({depth['done'] / elapsed:.2f} jobs/s with {args.workers} workers)"
+    )
+    ok = depth["done"] == len(ids) and len(results) == len(ids)
+    print("OK" if ok else f"MISMATCH: {depth}, {len(results)} results")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bracket_orders.py
+# Take-profit / stop-loss brackets attached to entry orders.
+#
+# bracket_prices() turns percentages into the absolute sl=/tp= prices that
+# backtesting.py attaches to an order; the engine then closes the trade as
+# soon as a bar's High/Low touches either level. first_exit_bar() finds the
+# same exit with one vectorized search, for code that evaluates trades without
+# the engine. Both follow the engine's rules: the brackets are live from the
+# entry bar on, a gap through a level fills at the open, and when both levels
+# fall inside the same bar the stop-loss is assumed to come first.
+
+import numpy as np
+
+
+def bracket_prices(price, is_long, take_profit_pct=None, stop_loss_pct=None):
+    """
+    (sl, tp) around `price` for fractional percentages (0.05 = 5%), None
+    for a level that is not set (or not positive).
+    """
+    sl = tp = None
+    if is_long:
+        if stop_loss_pct:
+            sl = price * (1 - stop_loss_pct)
+        if take_profit_pct:
+            tp = price * (1 + take_profit_pct)
+    else:
+        if stop_loss_pct:
+            sl = price * (1 + stop_loss_pct)
+        if take_profit_pct:
+            tp = price * (1 - take_profit_pct)
+    return sl, tp
+
+
+def first_exit_bar(open_, high, low, entry_bar, is_long, sl=None, tp=None):
+    """
+    First bar at or after `entry_bar` where the trade's stop-loss or
+    take-profit is touched. Returns (bar, fill price, "sl" or "tp"), or
+    (None, None, None) if neither level is reached.
+    """
+    high = np.asarray(high, dtype=float)[entry_bar:]
+    low = np.asarray(low, dtype=float)[entry_bar:]
+    never = np.zeros(len(high), dtype=bool)
+    if is_long:
+        sl_hit = low <= sl if sl is not None else never
+        tp_hit = high >= tp if tp is not None else never
+    else:
+        sl_hit = high >= sl if sl is not None else never
+        tp_hit = low <= tp if tp is not None else never
+
+    hit = sl_hit | tp_hit
+    if not hit.any():
+        return None, None, None
+    offset = int(np.argmax(hit))
+    bar = entry_bar + offset
+    bar_open = float(open_[bar])
+    if sl_hit[offset]:
+        return bar, (min(bar_open, sl) if is_long else max(bar_open, sl)), "sl"
+    return bar, (max(bar_open, tp) if is_long else min(bar_open, tp)), "tp"
@@ -0,0 +1,154 @@
+# chart_utils.py
+# Downsampled WebGL line traces so charts stay small regardless of dataset size.
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Roughly the pixel width of a wide chart; more points cannot be told apart
+DEFAULT_MAX_POINTS = 2000
+
+
+def _as_numeric(x):
+    """Return x as float64 (datetimes become nanoseconds since epoch)."""
+    x = pd.Index(x)
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(np.float64)
+    return np.asarray(x, dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of the `n_out` points that best preserve the visual
+    shape of the series. First and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries for the n_out - 2 middle points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if next_end > next_start else y[-1]
+
+        bx, by = x[start:end], y[start:end]
+        area = np.abs(
+            (x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev])
+        )
+        area = np.nan_to_num(area, nan=-1.0)
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Min/max bucketing: keep the lowest and highest point of every bucket,
+    so spikes survive downsampling. Returns at most 2 * n_buckets indices.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    width = int(np.max(np.diff(edges)))
+    # Pad buckets to equal width so argmin/argmax run vectorized
+    padded_idx = edges[:-1, None] + np.arange(width)[None, :]
+    valid = padded_idx < edges[1:, None]
+    padded_idx = np.minimum(padded_idx, n - 1)
+    values = y[padded_idx]
+    lows = np.where(valid, np.nan_to_num(values, nan=np.inf), np.inf).argmin(axis=1)
+    highs = np.where(valid, np.nan_to_num(values, nan=-np.inf), -np.inf).argmax(axis=1)
+    rows = np.arange(n_buckets)
+    picked = np.concatenate([padded_idx[rows, lows], padded_idx[rows, highs]])
+    return np.unique(picked)
+
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """
+    Reduce (x, y) to at most `max_points` points.
+
+    Args:
+        x: Index-like x values (numbers or datetimes).
+        y: Values to plot.
+        max_points: Upper bound on the number of returned points.
+        method: "lttb" (shape preserving) or "minmax" (extremes preserving).
+
+    Returns:
+        (x, y) downsampled, with the original types of x preserved.
+    """
+    x = pd.Index(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    if method == "minmax":
+        idx = minmax_indices(y, max_points // 2)
+    else:
+        idx = lttb_indices(x, y, max_points)
+    return x[idx], y[idx]
+
+
+def line_trace(x, y, name, line=None, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """A WebGL line trace with at most `max_points` points."""
+    import plotly.graph_objects as go
+
+    x_ds, y_ds = downsample(x, y, max_points=max_points, method=method)
+    return go.Scattergl(x=x_ds, y=y_ds, mode="lines", name=name, line=line or {})
+
+
+def zoom_range(index, key):
+    """
+    Date range slider for a chart. Charts are re-downsampled from the full
+    series inside the chosen window, so zooming in reveals full resolution.
+
+    Returns:
+        (start, end) bounds of the selected window.
+    """
+    index = pd.Index(index)
+    if len(index) < 2:
+        return (index.min(), index.max()) if len(index) else (None, None)
+
+    start, end = index.min(), index.max()
+    if isinstance(index, pd.DatetimeIndex):
+        start, end = start.to_pydatetime(), end.to_pydatetime()
+    return st.slider(
+        "🔎 Zoom range",
+        min_value=start,
+        max_value=end,
+        value=(start, end),
+        key=key,
+        help="Narrow the window to see the data at full resolution.",
+    )
+
+
+def _align_tz(value, index):
+    """Give a naive bound the timezone of a tz-aware DatetimeIndex."""
+    value = pd.Timestamp(value)
+    tz = getattr(index, "tz", None)
+    if tz is not None and value.tzinfo is None:
+        return value.tz_localize(tz)
+    return value
+
+
+def clip_to_range(series, window):
+    """Restrict a Series with a sorted index to the (start, end) window."""
+    start, end = window
+    if start is None or len(series) == 0:
+        return series
+    if isinstance(series.index, pd.DatetimeIndex):
+        start, end = _align_tz(start, series.index), _align_tz(end, series.index)
+    return series.loc[start:end]
@@ -0,0 +1,254 @@
+# chunked_backtest.py
+# Out-of-core backtests for datasets too large to load at once (years of 1m
+# bars): the CSV is read in time-ordered chunks of `chunk_rows` rows and each
+# bar goes through paper_trading.LiveStrategy, the bar-by-bar replica of the
+# backtest engine. Its streaming indicators and open position are the only
+# state carried from one chunk to the next (the indicator warm-up tail is a
+# ring buffer of the window, or the last smoothed value), so peak memory
+# depends on the chunk size, not on the length of the history.
+#
+# The equity curve and the closed trades are appended to CSV files as each
+# chunk finishes, in the columns of the engine's _equity_curve and _trades,
+# and the summary statistics are accumulated on the way. Trades and equity
+# are the same as run_backtest's on the whole frame (up to float rounding
+# when lot_size > 1). Strategies with live indicators only (see
+# paper_trading.LIVE_INDICATORS).
+#
+# Usage (from the project root):
+#   python chunked_backtest.py ohlcv_data/BTC_1m_5y.csv "Strategy 1"
+#       --chunk-rows 200000 --output chunked_results/btc_s1
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from logger import get_logger, run_context
+from paper_trading import COLUMNS, Bar, LiveStrategy
+
+logger = get_logger(__name__)
+
+CHUNK_ROWS = 100_000
+BLOCK_ROWS = 10_000  # rows converted (and written) at a time within a chunk
+TRADE_COLUMNS = [
+    "Size",
+    "EntryBar",
+    "ExitBar",
+    "EntryPrice",
+    "ExitPrice",
+    "SL",
+    "TP",
+    "PnL",
+    "ReturnPct",
+    "EntryTime",
+    "ExitTime",
+    "Duration",
+]
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    OHLCV frames of up to `chunk_rows` rows from a CSV with the time in its
+    first column; raises ValueError if the rows are not in time order.
+    """
+    index_column = pd.read_csv(path, nrows=0).columns[0]
+    reader = pd.read_csv(
+        path,
+        index_col=0,
+        parse_dates=True,
+        usecols=[index_column, *COLUMNS],
+        dtype={column: float for column in COLUMNS},
+        chunksize=chunk_rows,
+    )
+    last = None
+    with reader:
+        for chunk in reader:
+            if not chunk.index.is_monotonic_increasing or (
+                last is not None and chunk.index[0] <= last
+            ):
+                raise ValueError(f"{path} is not sorted by time")
+            last = chunk.index[-1]
+            yield chunk[list(COLUMNS)]
+
+
+class ChunkedBacktest:
+    """
+    One strategy over a sequence of chunks. run_chunk() advances it by one
+    chunk and returns that chunk's equity curve and closed trades;
+    stats() summarises everything so far.
+    """
+
+    def __init__(self, strategy_name, strategy_config):
+        self.strategy = LiveStrategy(strategy_name, strategy_config)
+        self.initial_cash = self.strategy.cash
+        self.bars = 0
+        self.start = self.end = None
+        self.final_equity = self.initial_cash
+        self.peak = self.initial_cash
+        self.max_drawdown = 0.0
+        self.trades = 0
+        self.winning = 0
+        self._entry_bar = None
+
+    def run_chunk(self, chunk):
+        strategy = self.strategy
+        equity = np.empty(len(chunk))
+        trades = []
+        values = chunk.to_numpy()
+        for block in range(0, len(chunk), BLOCK_ROWS):
+            # Python floats make the per-bar arithmetic faster; a block at a
+            # time keeps the boxed copy small
+            rows = values[block : block + BLOCK_ROWS].tolist()
+            times = chunk.index[block : block + BLOCK_ROWS]
+            for i, (time_, row) in enumerate(zip(times, rows), block):
+                bar = Bar(time_, *row)
+                for fill in strategy.on_bar(bar):
+                    if fill["reason"] == "entry":
+                        self._entry_bar = self.bars + i
+                    else:
+                        trades.append(self._trade(fill, self.bars + i))
+                equity[i] = strategy.equity(bar.close)
+
+        # Running peak carried over from the previous chunks
+        peaks = np.maximum.accumulate(np.append(self.peak, equity))[1:]
+        drawdown = 1 - equity / peaks
+        trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+        if len(chunk):
+            self.start = chunk.index[0] if self.start is None else self.start
+            self.end = chunk.index[-1]
+            self.final_equity = equity[-1]
+            self.peak = peaks[-1]
+            self.max_drawdown = max(self.max_drawdown, drawdown.max())
+        self.bars += len(chunk)
+        self.trades += len(trades)
+        self.winning += int((trades["PnL"] > 0).sum())
+        equity = pd.DataFrame(
+            {"Equity": equity, "DrawdownPct": drawdown}, index=chunk.index
+        )
+        return equity, trades
+
+    def _trade(self, fill, exit_bar):
+        size = fill["quantity"] if fill["side"] == "sell" else -fill["quantity"]
+        entry, exit_ = fill["entry_price"], fill["price"]
+        return [
+            size,
+            self._entry_bar,
+            exit_bar,
+            entry,
+            exit_,
+            fill["sl"],
+            fill["tp"],
+            fill["pnl"],
+            np.copysign(1, size) * (exit_ / entry - 1),
+            fill["entry_time"],
+            fill["bar_time"],
+            fill["bar_time"] - fill["entry_time"],
+        ]
+
+    def stats(self):
+        """The run's summary, with the engine's names for the same values."""
+        final = self.final_equity
+        return pd.Series(
+            {
+                "Start": self.start,
+                "End": self.end,
+                "Bars": self.bars,
+                "Equity Final [$]": final,
+                "Equity Peak [$]": self.peak,
+                "Return [%]": (final - self.initial_cash) / self.initial_cash * 100,
+                "Max. Drawdown [%]": -self.max_drawdown * 100,
+                "# Trades": self.trades,
+                "Win Rate [%]": (
+                    self.winning / self.trades * 100 if self.trades else np.nan
+                ),
+            }
+        )
+
+
+def run_chunked_backtest(
+    path,
+    strategy_name,
+    strategy_config,
+    output_dir,
+    chunk_rows=CHUNK_ROWS,
+    progress_callback=None,
+):
+    """
+    Backtest `strategy_name` on the CSV at `path` chunk by chunk, appending
+    the equity curve and trades to equity.csv and trades.csv in
+    `output_dir`. Returns the summary stats. If given,
+    progress_callback(bars_done) is called after every chunk.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    equity_path = os.path.join(output_dir, "equity.csv")
+    trades_path = os.path.join(output_dir, "trades.csv")
+    backtest = ChunkedBacktest(strategy_name, strategy_config)
+
+    with run_context() as run_id:
+        logger.info(
+            f"Running chunked backtest {run_id} for {strategy_name} on {path} "
+            f"({chunk_rows} rows per chunk)"
+        )
+        start = time.perf_counter()
+        for n, chunk in enumerate(read_chunks(path, chunk_rows)):
+            equity, trades = backtest.run_chunk(chunk)
+            mode, header = ("w", True) if n == 0 else ("a", False)
+            equity.to_csv(
+                equity_path, mode=mode, header=header, chunksize=BLOCK_ROWS
+            )
+            trades.to_csv(trades_path, mode=mode, header=header, index=False)
+            if progress_callback is not None:
+                progress_callback(backtest.bars)
+            logger.debug(f"Chunk {n}: {backtest.bars} bars, {backtest.trades} trades")
+
+        stats = backtest.stats()
+        logger.info(
+            f"Chunked backtest {run_id} done: {stats['Bars']} bars, "
+            f"{stats['# Trades']} trades in {time.perf_counter() - start:.1f}s"
+        )
+    stats["_equity_curve"] = equity_path
+    stats["_trades"] = trades_path
+    return stats
+
+
+def main():
+    from optimizer import default_params
+
+    parser = argparse.ArgumentParser(description="Chunked (out-of-core) backtest.")
+    parser.add_argument("csv")
+    parser.add_argument("strategy")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--output", help="folder for equity.csv and trades.csv")
+    parser.add_argument("--cash", type=float, default=10000)
+    parser.add_argument("--commission", type=float, default=0.001)
+    parser.add_argument("--position-size", type=float, default=50)
+    parser.add_argument("--trade-mode", default="both")
+    args = parser.parse_args()
+
+    config = {
+        "initial_cash": args.cash,
+        "commission": args.commission,
+        "position_size": args.position_size,
+        "trade_mode": args.trade_mode,
+        "indicators": default_params(args.strategy),
+    }
+    stem = os.path.splitext(os.path.basename(args.csv))[0]
+    output = args.output or os.path.join(
+        "chunked_results", f"{stem}_{args.strategy.replace(' ', '_')}"
+    )
+    stats = run_chunked_backtest(
+        args.csv,
+        args.strategy,
+        config,
+        output,
+        args.chunk_rows,
+        lambda bars: print(f"{bars:,} bars", end="\r"),
+    )
+    print()
+    print(stats.to_string())
+
+
+if __name__ == "__main__":
+    main()
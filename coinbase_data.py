@@ -12,8 +12,10 @@ MAX_RETRIES = 5
 RATE_LIMIT_DELAY = 1.5
 
 
-async def fetch_ohlcv(session, product_id, granularity, start_time, end_time):
-    url = f"{BASE_URL}/products/{product_id}/candles"
+async def fetch_ohlcv(
+    session, product_id, granularity, start_time, end_time, base_url=BASE_URL
+):
+    url = f"{base_url}/products/{product_id}/candles"
     params = {
         "granularity": granularity,
         "start": start_time.isoformat(),
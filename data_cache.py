@@ -0,0 +1,170 @@
+# data_cache.py
+# Process-wide cache of fetched and cleaned OHLCV frames shared by all Streamlit sessions.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Memory cap for all cached frames together (override with OHLCV_CACHE_MAX_MB)
+DEFAULT_MAX_MB = int(os.environ.get("OHLCV_CACHE_MAX_MB", 512))
+
+
+def make_key(source, symbol, timeframe, data_range):
+    """
+    Build a cache key. `data_range` is anything hashable describing the
+    requested period (e.g. (start_date, end_date) or a file mtime).
+    """
+    return (str(source), str(symbol), str(timeframe), data_range)
+
+
+def frame_nbytes(df):
+    """Resident size of a frame including its index."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def make_read_only(df):
+    """
+    Return a frame whose column arrays cannot be written to, so a frame
+    shared between sessions cannot be modified in place by one of them.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index.copy(), copy=False)
+
+
+class OHLCVCache:
+    """Thread-safe LRU cache of read-only DataFrames bounded by total memory."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (frame, nbytes, expires_at)
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> Lock, so concurrent misses load only once
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached frame for `key` or None (counts a hit or miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, df, ttl_seconds=None):
+        """
+        Store a read-only copy of `df` and return it. Least recently used
+        entries are evicted until the cache fits under its memory cap.
+        """
+        frame = make_read_only(df)
+        nbytes = frame_nbytes(frame)
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                logger.warning(
+                    f"Frame for {key} ({nbytes / 1e6:.1f} MB) exceeds the cache cap; not cached"
+                )
+                return frame
+            while self._bytes + nbytes > self.max_bytes and self._entries:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self.evictions += 1
+                logger.info(f"Evicted {evicted_key} from the OHLCV cache")
+            self._entries[key] = (frame, nbytes, expires_at)
+            self._bytes += nbytes
+        return frame
+
+    def get_or_load(self, key, loader, ttl_seconds=None):
+        """
+        Return the cached frame for `key`, calling `loader()` on a miss.
+        Concurrent callers missing the same key wait for a single load.
+        Returns None if the loader returns None or an empty frame.
+        """
+        frame = self.get(key)
+        if frame is not None:
+            return frame
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another session may have loaded it while we were waiting
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            try:
+                df = loader()
+                if df is None or df.empty:
+                    return None
+                return self.put(key, df, ttl_seconds=ttl_seconds)
+            finally:
+                # Only once the entry is stored (or the load failed): a caller
+                # arriving before that must wait on key_lock, not load again
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss statistics and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide cache instance (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OHLCVCache()
+        return _cache
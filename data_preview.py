@@ -0,0 +1,124 @@
+# data_preview.py
+# Paged DataFrame preview: only one page (or head/tail) is sent to the browser.
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [50, 100, 500]
+HEAD_TAIL_ROWS = 10
+MAX_CACHED_PAGES = 256
+
+_pages = OrderedDict()  # (cache_key, kind, page, page_size) -> pa.Table
+_summaries = {}  # cache_key -> summary DataFrame
+_lock = threading.Lock()
+
+
+def _cached(cache_key, builder):
+    """LRU cache of serialized (Arrow) pages shared by all sessions."""
+    with _lock:
+        table = _pages.get(cache_key)
+        if table is not None:
+            _pages.move_to_end(cache_key)
+            return table
+    table = builder()
+    with _lock:
+        _pages[cache_key] = table
+        while len(_pages) > MAX_CACHED_PAGES:
+            _pages.popitem(last=False)
+    return table
+
+
+def _to_arrow(df):
+    """Serialize once; frames Arrow cannot type are left for Streamlit to fix."""
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df.copy()
+
+
+def get_page(df, cache_key, page, page_size):
+    """Rows of page `page` (1-based) as an Arrow table."""
+    start = (page - 1) * page_size
+    return _cached(
+        (cache_key, "page", page, page_size),
+        lambda: _to_arrow(df.iloc[start : start + page_size]),
+    )
+
+
+def get_head_tail(df, cache_key, rows=HEAD_TAIL_ROWS):
+    """First and last `rows` rows as an Arrow table."""
+    return _cached(
+        (cache_key, "head_tail", rows, None),
+        lambda: _to_arrow(pd.concat([df.head(rows), df.tail(rows)])),
+    )
+
+
+def get_summary(df, cache_key):
+    """Summary statistics of the numeric columns (computed once per key)."""
+    with _lock:
+        summary = _summaries.get(cache_key)
+    if summary is None:
+        summary = df.describe()
+        with _lock:
+            _summaries[cache_key] = summary
+            if len(_summaries) > MAX_CACHED_PAGES:
+                _summaries.pop(next(iter(_summaries)))
+    return summary
+
+
+def forget(cache_key):
+    """Drop all cached pages and summaries of a frame."""
+    with _lock:
+        for key in [k for k in _pages if k[0] == cache_key]:
+            del _pages[key]
+        _summaries.pop(cache_key, None)
+
+
+def render_preview(df, cache_key, key):
+    """
+    Show a DataFrame without sending all of it to the frontend.
+
+    Args:
+        df: Frame to preview.
+        cache_key: Stable identifier of the frame's content (e.g. the data
+            cache key or a job id); pages are cached under it.
+        key: Widget key prefix, unique on the page.
+    """
+    n_rows = len(df)
+    st.caption(f"{n_rows:,} rows × {df.shape[1]} columns")
+
+    mode = st.radio(
+        "Preview mode",
+        ["Head / Tail", "Pages", "Summary"],
+        horizontal=True,
+        key=f"{key}_mode",
+        label_visibility="collapsed",
+    )
+
+    if mode == "Summary":
+        st.dataframe(get_summary(df, cache_key))
+        return
+
+    if mode == "Head / Tail" or n_rows <= HEAD_TAIL_ROWS * 2:
+        st.dataframe(get_head_tail(df, cache_key), use_container_width=True)
+        return
+
+    col_size, col_page = st.columns([1, 1])
+    with col_size:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+    num_pages = max(1, -(-n_rows // page_size))
+    with col_page:
+        page = st.number_input(
+            f"Page (of {num_pages})",
+            min_value=1,
+            max_value=num_pages,
+            value=1,
+            step=1,
+            key=f"{key}_page_{page_size}",
+        )
+    st.dataframe(get_page(df, cache_key, page, page_size), use_container_width=True)
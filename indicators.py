@@ -0,0 +1,152 @@
+# indicators.py
+# NumPy versions of the technical indicators used by the strategies. They give
+# the same values as the `ta` functions called in All_strategies.py (same
+# windows, warm-up NaNs and smoothing), but take and return plain arrays.
+#
+# Every function works along the last axis: pass a 1D array for one series or
+# a 2D array with one series per row (e.g. one row per symbol).
+
+import numpy as np
+import pandas as pd
+
+
+def _along_last_axis(values, kernel):
+    """Run a column-wise pandas kernel (rolling/ewm) along the last axis."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return kernel(pd.Series(values)).to_numpy()
+    return kernel(pd.DataFrame(values.T)).to_numpy().T
+
+
+def _shift(values, periods=1):
+    """Shift right along the last axis, filling the first `periods` with NaN."""
+    values = np.asarray(values, dtype=float)
+    shifted = np.full_like(values, np.nan)
+    if periods < values.shape[-1]:
+        shifted[..., periods:] = values[..., :-periods]
+    return shifted
+
+
+def _wilder(first, values, window):
+    """
+    Wilder's smoothing y[i] = y[i-1] + (values[i] - y[i-1]) / window, seeded
+    with `first`; run as an adjust=False EWM so the loop stays in C.
+    """
+    seeded = np.concatenate([np.asarray(first)[..., None], values], axis=-1)
+    return _along_last_axis(
+        seeded, lambda s: s.ewm(alpha=1 / window, adjust=False).mean()
+    )
+
+
+def sma(close, window):
+    return _along_last_axis(
+        close, lambda s: s.rolling(window, min_periods=window).mean()
+    )
+
+
+def ema(close, window):
+    return _along_last_axis(
+        close, lambda s: s.ewm(span=window, min_periods=window, adjust=False).mean()
+    )
+
+
+def rolling_std(close, window):
+    """Population (ddof=0) rolling standard deviation, as Bollinger Bands use."""
+    return _along_last_axis(
+        close, lambda s: s.rolling(window, min_periods=window).std(ddof=0)
+    )
+
+
+def bollinger_mavg(close, window=20):
+    return sma(close, window)
+
+
+def bollinger_hband(close, window=20, window_dev=2):
+    return sma(close, window) + window_dev * rolling_std(close, window)
+
+
+def bollinger_lband(close, window=20, window_dev=2):
+    return sma(close, window) - window_dev * rolling_std(close, window)
+
+
+def bollinger_wband(close, window=20, window_dev=2):
+    mavg = sma(close, window)
+    band = window_dev * rolling_std(close, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((mavg + band) - (mavg - band)) / mavg * 100
+
+
+def rsi(close, window=14):
+    diff = np.diff(np.asarray(close, dtype=float), axis=-1, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ewm = lambda s: s.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    avg_up = _along_last_axis(up, ewm)
+    avg_down = _along_last_axis(down, ewm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+
+
+def macd(close, window_slow=26, window_fast=12):
+    return ema(close, window_fast) - ema(close, window_slow)
+
+
+def macd_signal(close, window_slow=26, window_fast=12, window_sign=9):
+    return ema(macd(close, window_slow, window_fast), window_sign)
+
+
+def macd_diff(close, window_slow=26, window_fast=12, window_sign=9):
+    line = macd(close, window_slow, window_fast)
+    return line - ema(line, window_sign)
+
+
+def _directional_sums(values, window):
+    """
+    ta's running sums of true range / directional movement: the sum of the
+    first `window` values after the leading NaN, then Wilder-smoothed. Like
+    ta, the last element is left at 0.
+    """
+    length = values.shape[-1] - (window - 1)
+    sums = np.zeros(values.shape[:-1] + (length,))
+    first = values[..., 1 : window + 1].sum(axis=-1)
+    rest = values[..., window + 1 : window + length - 1]
+    smoothed = _wilder(first / window, rest, window)
+    sums[..., : length - 1] = smoothed * window
+    return sums
+
+
+def adx(high, low, close, window=14):
+    """Average Directional Index, 0 during the warm-up (as in ta)."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n_bars = close.shape[-1]
+    result = np.zeros(close.shape)
+    if n_bars < 2 * window + 1:
+        return result
+
+    prev_close = _shift(close)
+    true_range = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    diff_up = high - _shift(high)
+    diff_down = _shift(low) - low
+    with np.errstate(invalid="ignore"):
+        pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+        neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    trs = _directional_sums(true_range, window)
+    dip = _directional_sums(pos, window)
+    din = _directional_sums(neg, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_pos = np.where(trs != 0, 100 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100 * din / trs, 0.0)
+        total = di_pos + di_neg
+        dx = np.where(total != 0, 100 * np.abs((di_pos - di_neg) / total), 0.0)
+
+    # ADX[window] is the mean DX of the first window, then Wilder-smoothed
+    # with a one-bar lag; the series is placed `window - 1` bars in
+    length = trs.shape[-1]
+    smoothed = _wilder(
+        dx[..., :window].mean(axis=-1), dx[..., window : length - 1], window
+    )
+    result[..., 2 * window - 1 :] = smoothed
+    return result
@@ -0,0 +1,175 @@
+# job_runner.py
+# Runs backtests on a bounded background thread pool so the Streamlit script thread never blocks.
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from logger import get_logger, run_context
+from memory_profiling import use as use_memory_profile
+from timing import Timings, collect
+
+logger = get_logger(__name__)
+
+# Maximum number of backtests running at once on this server
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_BACKTESTS", 2))
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION_SECONDS = 60 * 60
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+
+class Job:
+    """State of one submitted backtest."""
+
+    def __init__(self, job_id, meta=None):
+        self.id = job_id
+        self.meta = meta or {}
+        self.status = QUEUED
+        self.bars_done = 0
+        self.total_bars = 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = Timings()  # Per-phase seconds recorded while running
+        self._cancel = threading.Event()
+
+    @property
+    def is_active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def progress(self):
+        """Fraction of bars processed, between 0 and 1."""
+        if not self.total_bars:
+            return 0.0
+        return min(self.bars_done / self.total_bars, 1.0)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report_progress(self, bars_done, total_bars):
+        """Progress callback handed to run_backtest; also enforces cancellation."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.bars_done = bars_done
+        self.total_bars = total_bars
+
+
+class JobRunner:
+    """Thread pool with a job registry that outlives Streamlit reruns."""
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="backtest-job"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, meta=None, **kwargs):
+        """
+        Run `fn(*args, progress_callback=..., **kwargs)` in the pool and
+        return the job id immediately.
+        """
+        self._prune()
+        job = Job(uuid.uuid4().hex[:12], meta=meta)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Submitted job {job.id} ({job.meta.get('strategy', fn.__name__)})")
+        return job.id
+
+    def submit_backtest(self, df, strategy_name, strategy_config, meta=None):
+        """Submit run_backtest(df, strategy_name, strategy_config) as a job."""
+        from backtest import run_backtest
+
+        meta = {"strategy": strategy_name, **(meta or {})}
+        return self.submit(run_backtest, df, strategy_name, strategy_config, meta=meta)
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._stop_profile(job)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            # The job id doubles as the run id in the log; meta may lower the level
+            with run_context(job.id, job.meta.get("log_level")), collect(
+                job.timings
+            ), use_memory_profile(job.meta.get("memory_profile")):
+                job.result = fn(*args, progress_callback=job.report_progress, **kwargs)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+            logger.info(f"Job {job.id} cancelled after {job.bars_done} bars")
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            logger.exception(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            if job.status != DONE:
+                self._stop_profile(job)
+
+    @staticmethod
+    def _stop_profile(job):
+        """A memory profile is finished by the page, unless the run never completes."""
+        profile = job.meta.get("memory_profile")
+        if profile is not None:
+            profile.finish()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and job.is_active:
+            job.cancel()
+            return True
+        return False
+
+    def list_jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self):
+        return sum(1 for job in self.list_jobs() if job.is_active)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            for job_id in [
+                j.id
+                for j in self._jobs.values()
+                if not j.is_active and j.finished_at and j.finished_at < cutoff
+            ]:
+                del self._jobs[job_id]
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """The process-wide job runner shared by all sessions."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
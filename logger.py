@@ -1,29 +1,178 @@
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Create logs directory if it doesn't exist
+# Log directory and file path
 log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-# Log file path
 log_file = os.path.join(log_dir, "strategy_debug.log")
 
-# Configure rotating file handler (max 10MB per file, keep 5 backups)
-handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5)
-handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(levelname)s - [%(name)s] %(message)s")
-)
+# Default level; a single run can override it with run_context(level=...)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Set for the duration of a backtest run (per thread / task)
+_run_id = contextvars.ContextVar("run_id", default=None)
+_run_level = contextvars.ContextVar("run_level", default=None)
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class RunLogger(logging.Logger):
+    """Logger whose threshold can be lowered or raised for the current run."""
+
+    def isEnabledFor(self, level):
+        run_level = _run_level.get()
+        if run_level is not None:
+            return level >= run_level and level > self.manager.disable
+        return super().isEnabledFor(level)
+
+
+class RunContextFilter(logging.Filter):
+    """Stamp records with the current run id (runs in the calling thread)."""
+
+    def filter(self, record):
+        record.run_id = _run_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N records of a call site logged with extra={"sample_every": N}.
+    Records without the extra pass through untouched.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        every = getattr(record, "sample_every", None)
+        if not every or every <= 1:
+            return True
+        site = (record.pathname, record.lineno, getattr(record, "run_id", None))
+        with self._lock:
+            if len(self._counts) > 10000:  # one entry per site and run
+                self._counts.clear()
+            count = self._counts.get(site, 0)
+            self._counts[site] = count + 1
+        if count % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", None),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "sampled", None):
+            entry["sampled"] = record.sampled
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RunQueueHandler(QueueHandler):
+    """
+    Hand records to the background writer. The message and traceback are
+    rendered here so nothing mutable crosses the thread boundary.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging():
+    """
+    Route all records through a queue to a background thread that writes
+    JSON lines to the rotating log file. Safe to call many times.
+    """
+    global _configured, _listener
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+
+        # Create logs directory if it doesn't exist
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        # Configure rotating file handler (max 10MB per file, keep 5 backups)
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=10 * 1024 * 1024, backupCount=5, delay=True
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = RunQueueHandler(log_queue)
+        queue_handler.addFilter(RunContextFilter())
+        queue_handler.addFilter(SamplingFilter())
+
+        logging.setLoggerClass(RunLogger)
+        logging.basicConfig(level=LOG_LEVEL, handlers=[queue_handler])
+
+        _listener = QueueListener(log_queue, file_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        # Suppress excessive logs from `watchdog`
+        logging.getLogger("watchdog.observers.inotify_buffer").setLevel(
+            logging.WARNING
+        )
+        _configured = True
+
+
+def current_run_id():
+    return _run_id.get()
 
-# Get root logger and attach handler
-logging.basicConfig(level=logging.DEBUG, handlers=[handler])
 
-# Suppress excessive logs from `watchdog`
-logging.getLogger("watchdog.observers.inotify_buffer").setLevel(logging.WARNING)
+@contextlib.contextmanager
+def run_context(run_id=None, level=None):
+    """
+    Tag every record logged inside the block with `run_id` (a new one if not
+    given and none is active) and optionally use `level` as the threshold.
+    """
+    run_id = run_id or _run_id.get() or uuid.uuid4().hex[:12]
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    id_token = _run_id.set(run_id)
+    level_token = _run_level.set(level if level is not None else _run_level.get())
+    try:
+        yield run_id
+    finally:
+        _run_level.reset(level_token)
+        _run_id.reset(id_token)
 
 
 # Function to get logger for a module
 def get_logger(name):
+    configure_logging()
     logger = logging.getLogger(name)
     return logger
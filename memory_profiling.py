@@ -0,0 +1,256 @@
+# memory_profiling.py
+# Opt-in memory profiling of a backtest: tracemalloc snapshots at the end of
+# every phase, the allocation sites that grew the most in each phase and the
+# size of the objects kept in st.session_state.
+#
+# tracemalloc is process-wide, so allocations of other sessions running at the
+# same time show up in the report as well. Profiling slows the run down, and
+# modules imported while tracing make snapshots slow: import them beforehand.
+
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+TOP_SITES = 10
+# Frames kept per allocation, so sites can be attributed to this project's code
+TRACE_FRAMES = 10
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_profile = contextvars.ContextVar("memory_profile", default=None)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _acquire_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users = max(_tracing_users - 1, 0)
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _short_path(filename):
+    if filename.startswith(PROJECT_ROOT):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    if "site-packages" in filename:
+        return filename.split("site-packages", 1)[1].lstrip(os.sep)
+    return filename
+
+
+# Allocations made by the profiler itself and by the import machinery
+_EXCLUDED_FILES = (
+    tracemalloc.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+)
+
+
+def _site(traceback):
+    """
+    (allocating line, innermost line of this project on the way there), so
+    library allocations are attributed to the app code that triggered them.
+    """
+    frame = traceback[-1]  # Tracebacks are ordered oldest frame first
+    if frame.filename in _EXCLUDED_FILES:
+        return None
+    caller = next(
+        (f for f in reversed(traceback) if f.filename.startswith(PROJECT_ROOT)),
+        None,
+    )
+    return (
+        f"{_short_path(frame.filename)}:{frame.lineno}",
+        f"{_short_path(caller.filename)}:{caller.lineno}" if caller else "",
+    )
+
+
+def _site_totals():
+    """Snapshot the traced memory as {(site, via): (bytes, blocks)}."""
+    totals = {}
+    # One statistic per distinct traceback, not one object per allocation
+    # like Snapshot.compare_to() builds
+    for stat in tracemalloc.take_snapshot().statistics("traceback"):
+        site = _site(stat.traceback)
+        if site is None:
+            continue
+        size, count = totals.get(site, (0, 0))
+        totals[site] = (size + stat.size, count + stat.count)
+    return totals
+
+
+def _top_sites(before, after, top_n):
+    """Sites whose allocated size changed the most between two totals."""
+    changes = []
+    for site in after.keys() | before.keys():
+        size_after, count_after = after.get(site, (0, 0))
+        size_before, count_before = before.get(site, (0, 0))
+        if size_after != size_before:
+            changes.append((site, size_after - size_before, count_after - count_before))
+    changes.sort(key=lambda change: -abs(change[1]))
+    return [
+        {"site": site, "via": via, "size_diff_mb": size / MB, "count_diff": count}
+        for (site, via), size, count in changes[:top_n]
+    ]
+
+
+class MemoryProfile:
+    """Snapshots taken at phase boundaries of one backtest run."""
+
+    def __init__(self, top_n=TOP_SITES):
+        self.top_n = top_n
+        self.phases = []
+        self.started_at = None
+        self.finished = False
+        self._last = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self._last is not None and not self.finished
+
+    def start(self):
+        _acquire_tracing()
+        self.started_at = time.time()
+        with self._lock:
+            self._last = _site_totals()
+        tracemalloc.reset_peak()
+        return self
+
+    def checkpoint(self, phase):
+        """Record what was allocated since the previous checkpoint as `phase`."""
+        with self._lock:
+            if not self.active:
+                return
+            totals = _site_totals()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            self.phases.append(
+                {
+                    "phase": phase,
+                    "delta_mb": (
+                        sum(size for size, _ in totals.values())
+                        - sum(size for size, _ in self._last.values())
+                    )
+                    / MB,
+                    "current_mb": current / MB,
+                    "peak_mb": peak / MB,
+                    "top_sites": _top_sites(self._last, totals, self.top_n),
+                }
+            )
+            self._last = totals
+
+    def finish(self):
+        with self._lock:
+            if self.finished or self._last is None:
+                return
+            self.finished = True
+            self._last = None
+        _release_tracing()
+
+    def report(self, session_state=None):
+        """JSON-serializable summary; includes session object sizes if given."""
+        return {
+            "started_at": self.started_at,
+            "peak_mb": max((p["peak_mb"] for p in self.phases), default=0.0),
+            "phases": self.phases,
+            "session_state": (
+                session_state_sizes(session_state) if session_state is not None else []
+            ),
+        }
+
+
+@contextlib.contextmanager
+def use(profile):
+    """Make `profile` (may be None) the target of checkpoint() inside the block."""
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+def is_active():
+    profile = _profile.get()
+    return profile is not None and profile.active
+
+
+def checkpoint(phase):
+    """Checkpoint the active profile, if any."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.checkpoint(phase)
+
+
+def object_size(obj, _seen=None, _depth=0):
+    """
+    Approximate deep size of an object in bytes. pandas and numpy objects
+    report their buffers; containers and plain objects are walked a few levels.
+    """
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, pd.Series):
+        if obj.dtype == object:
+            return int(obj.index.memory_usage(deep=True)) + sum(
+                object_size(v, _seen, _depth + 1) for v in obj.values
+            )
+        return int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj, 0)
+    if _depth >= 4:
+        return size
+    if isinstance(obj, dict):
+        size += sum(
+            object_size(k, _seen, _depth + 1) + object_size(v, _seen, _depth + 1)
+            for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_size(v, _seen, _depth + 1) for v in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += object_size(vars(obj), _seen, _depth + 1)
+    return size
+
+
+def session_state_sizes(session_state):
+    """[{key, type, size_mb}] for every entry of st.session_state, largest first."""
+    sizes = []
+    for key in list(session_state.keys()):
+        if key == "memory_report":
+            continue
+        try:
+            value = session_state[key]
+            sizes.append(
+                {
+                    "key": str(key),
+                    "type": type(value).__name__,
+                    "size_mb": object_size(value) / MB,
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Could not size session_state[{key!r}]: {e}")
+    return sorted(sizes, key=lambda row: -row["size_mb"])
@@ -1,3 +1,5 @@
+import json
+
 import streamlit as st
 
 
@@ -78,3 +80,69 @@ def display_metrics(
         """,
         unsafe_allow_html=True,
     )
+
+
+def display_timings(timings, expanded=False):
+    """Expandable per-phase timing breakdown ({phase: seconds})."""
+    with st.expander("⏱️ Timing breakdown", expanded=expanded):
+        if not timings:
+            st.caption("No timings recorded for this run.")
+            return
+        total = sum(timings.values())
+        st.caption(f"Total: {total:.3f} s")
+        st.dataframe(
+            [
+                {
+                    "Phase": phase,
+                    "Seconds": round(seconds, 4),
+                    "Share": seconds / total if total else 0.0,
+                }
+                for phase, seconds in timings.items()
+            ],
+            column_config={
+                "Share": st.column_config.ProgressColumn(
+                    "Share", min_value=0.0, max_value=1.0, format="percent"
+                )
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+def display_memory_report(report, key="memory_report"):
+    """Expandable memory profile: per-phase growth, top sites, session state sizes."""
+    with st.expander("🧠 Memory profile", expanded=False):
+        st.caption(f"Peak traced memory: {report.get('peak_mb', 0):.1f} MB")
+        phases = report.get("phases", [])
+        st.dataframe(
+            [
+                {
+                    "Phase": p["phase"],
+                    "Δ MB": round(p["delta_mb"], 2),
+                    "Current MB": round(p["current_mb"], 2),
+                    "Peak MB": round(p["peak_mb"], 2),
+                }
+                for p in phases
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        if phases:
+            phase = st.selectbox(
+                "Top allocation sites of phase",
+                [p["phase"] for p in phases],
+                key=f"{key}_phase",
+            )
+            sites = next(p["top_sites"] for p in phases if p["phase"] == phase)
+            st.dataframe(sites, hide_index=True, use_container_width=True)
+
+        st.markdown("**Session state objects**")
+        st.dataframe(report.get("session_state", []), hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "⬇️ Export JSON",
+            json.dumps(report, indent=2, default=str),
+            file_name="memory_profile.json",
+            mime="application/json",
+            key=f"{key}_download",
+        )
@@ -0,0 +1,145 @@
+# multi_timeframe.py
+# Indicators computed on a higher timeframe (e.g. a daily 200MA for an hourly
+# strategy) and mapped back onto the base bars.
+#
+# The base data is resampled once per timeframe and the indicator is computed
+# once on the resampled bars. Each base bar then gets the value of the last
+# higher-timeframe bar that had already closed when the base bar closed. A
+# base bar never sees a daily bar that is still forming, so there is no
+# look-ahead. The alignment is a single searchsorted over close times, so
+# 1m data needs no per-bar work. Resampled frames and aligned indicators are
+# cached per dataset.
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from data_cache import OHLCVCache
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Memory cap for resampled frames and aligned indicators (HTF_CACHE_MAX_MB)
+DEFAULT_MAX_MB = int(os.environ.get("HTF_CACHE_MAX_MB", 128))
+
+OHLCV_AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+_cache = OHLCVCache(max_bytes=DEFAULT_MAX_MB * 1024 * 1024)
+
+
+def timeframe_delta(timeframe):
+    """Duration of a fixed timeframe such as "4h", "1D" or "15min"."""
+    try:
+        return pd.Timedelta(to_offset(timeframe))
+    except (ValueError, TypeError):
+        raise ValueError(
+            f"Unsupported timeframe {timeframe!r}: use a fixed duration "
+            f"such as '15min', '4h' or '1D'"
+        )
+
+
+def bar_duration(index):
+    """Typical spacing of a DatetimeIndex (median, so gaps don't matter)."""
+    if len(index) < 2:
+        raise ValueError("Need at least two bars to infer the bar duration")
+    return pd.Timedelta(int(np.median(np.diff(index.asi8))), unit="ns")
+
+
+def dataset_key(df):
+    """
+    Fingerprint of an OHLCV frame (a digest of its index and OHLCV columns):
+    two runs on the same data share cached higher-timeframe results, and any
+    edited value gives a different key. One O(n) hashing pass per call.
+    """
+    columns = [column for column in OHLCV_AGGREGATION if column in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=True)
+    return (len(df), hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest())
+
+
+def resample_ohlcv(df, timeframe):
+    """
+    Resample to `timeframe` bars labelled by their open time; periods with
+    no base bars (e.g. weekends) are dropped.
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("Higher timeframes need data with a DatetimeIndex")
+    aggregation = {k: v for k, v in OHLCV_AGGREGATION.items() if k in df.columns}
+    resampled = df.resample(timeframe, label="left", closed="left").agg(aggregation)
+    return resampled.dropna(subset=["Close"])
+
+
+def align(values, htf_close_times, base_close_times):
+    """
+    For every base bar, the value of the last higher-timeframe bar that
+    closed at or before the base bar's close (NaN before the first one).
+    """
+    values = np.asarray(values, dtype=float)
+    positions = np.searchsorted(htf_close_times, base_close_times, side="right") - 1
+    aligned = np.full(len(base_close_times), np.nan)
+    available = positions >= 0
+    aligned[available] = values[positions[available]]
+    return aligned
+
+
+def get_resampled(df, timeframe, key=None):
+    """`df` resampled to `timeframe`, cached per dataset."""
+    key = key if key is not None else dataset_key(df)
+    return _cache.get_or_load(
+        ("resampled", key, timeframe), lambda: resample_ohlcv(df, timeframe)
+    )
+
+
+def htf_indicator(df, timeframe, func, *args, columns=("Close",), **kwargs):
+    """
+    Compute func(*resampled columns, *args, **kwargs) on `timeframe` bars and
+    align it to the bars of `df`. `func` takes pandas Series (like the `ta`
+    functions) and returns one series of the same length. Cached per
+    dataset, timeframe, function and arguments.
+    """
+    step = timeframe_delta(timeframe)
+    base_step = bar_duration(df.index)
+    if step <= base_step:
+        raise ValueError(
+            f"Timeframe {timeframe} is not higher than the data's bar size "
+            f"({base_step})"
+        )
+
+    key = dataset_key(df)
+    cache_key = (
+        "indicator",
+        key,
+        timeframe,
+        func,
+        tuple(columns),
+        args,
+        tuple(sorted(kwargs.items())),
+    )
+
+    def compute():
+        resampled = get_resampled(df, timeframe, key)
+        values = func(*(resampled[column] for column in columns), *args, **kwargs)
+        aligned = align(
+            values,
+            (resampled.index + step).asi8,
+            (df.index + base_step).asi8,
+        )
+        logger.debug(
+            f"Computed {getattr(func, '__name__', func)} on {len(resampled)} "
+            f"{timeframe} bars for {len(df)} base bars"
+        )
+        return pd.DataFrame({"value": aligned})
+
+    return _cache.get_or_load(cache_key, compute)["value"].to_numpy()
+
+
+def cache_stats():
+    return _cache.stats()
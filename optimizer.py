@@ -0,0 +1,585 @@
+# optimizer.py
+# Parameter search over the indicator settings in str_params.json.
+#
+# Two samplers share one loop: a TPE-style Bayesian search (after a few random
+# trials, new candidates are drawn where good parameter sets were dense and bad
+# ones sparse) and a genetic algorithm (tournament selection, uniform crossover,
+# mutation, elitism). Candidates are evaluated on a process pool, and each run
+# stops early at a partial-history checkpoint once its drawdown is over the
+# limit; the workers map the dataset from shared memory (shared_data.py) instead
+# of each getting a pickled copy. Every finished trial is written to
+# strategy_storage as it arrives, so a long study can be followed (or survive a
+# crash) from the database.
+
+import copy
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import datetime
+
+import numpy as np
+
+import shared_data
+import strategy_dsl
+import strategy_storage
+from backtest import (
+    DRAWDOWN_CHECKPOINTS,
+    DrawdownLimitExceeded,
+    get_strategy_classes,
+    run_backtest,
+)
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+PARAMS_PATH = "str_params.json"
+DEFAULT_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+
+COMPLETE = "complete"
+PRUNED = "pruned"
+FAILED = "failed"
+
+# Pairs that only make sense as first < second
+ORDERED_PAIRS = [("macd_fast", "macd_slow"), ("rsi_oversold", "rsi_overbought")]
+
+# TPE settings: random trials first, then the best GAMMA of the trials model
+# the "good" density and N_CANDIDATES draws from it compete per proposal
+N_STARTUP_TRIALS = 10
+GAMMA = 0.25
+N_CANDIDATES = 24
+
+
+class Dimension:
+    """One searched parameter: the values low, low + step, ... up to high."""
+
+    def __init__(self, name, low, high, step):
+        if high < low or step <= 0:
+            raise ValueError(f"Invalid range for {name}: [{low}, {high}] step {step}")
+        self.name = name
+        self.low = low
+        self.high = high
+        self.step = step
+        self.is_int = all(float(v).is_integer() for v in (low, high, step))
+
+    @property
+    def size(self):
+        # Values past `high` are not allowed: floor, with a tolerance for float steps
+        return math.floor((self.high - self.low) / self.step + 1e-9) + 1
+
+    def value(self, index):
+        value = self.low + int(index) * self.step
+        return int(round(value)) if self.is_int else round(value, 10)
+
+    def snap(self, x):
+        """Nearest allowed value to `x`."""
+        index = np.clip(round((x - self.low) / self.step), 0, self.size - 1)
+        return self.value(index)
+
+    def sample(self, rng):
+        return self.value(rng.integers(self.size))
+
+    def normalize(self, value):
+        """Position of `value` in the range, from 0 to 1."""
+        return (value - self.low) / (self.high - self.low) if self.size > 1 else 0.5
+
+    def from_unit(self, u):
+        """Allowed value nearest to position `u` (0 to 1) in the range."""
+        return self.snap(self.low + u * (self.high - self.low))
+
+    def __repr__(self):
+        return f"Dimension({self.name!r}, {self.low}, {self.high}, {self.step})"
+
+
+def _default_range(name, default):
+    """(low, high, step) around a default value, or None to keep it fixed."""
+    if isinstance(default, bool) or not isinstance(default, (int, float)):
+        return None
+    if default <= 0:
+        return None  # e.g. ma_timeframe_hours = 0 switches a feature off
+    if name.endswith("_pct"):
+        return 0.5, 4 * default, 0.5
+    if name.endswith(("_overbought", "_oversold", "_threshold")):
+        return max(default - 20, 0), min(default + 20, 100), 1
+    if "length" in name or name.startswith("macd_"):
+        step = max(int(default) // 10, 1)
+        return max(int(default) // 3, 2), int(default) * 3, step
+    if "std" in name:
+        return max(default / 2, 0.5), default * 1.75, 0.1
+    if isinstance(default, int):
+        return max(default // 2, 1), default * 2, 1
+    return default / 2, default * 2, default / 10
+
+
+def default_params(strategy_name, path=PARAMS_PATH):
+    """Default indicator values of a strategy (str_params.json or its spec)."""
+    with open(path, "r") as f:
+        strategies = json.load(f)["strategies"]
+    if strategy_name in strategies:
+        return dict(strategies[strategy_name].get("indicators", {}))
+    spec = strategy_dsl.load_specs().get(strategy_name)
+    if spec is not None:
+        return dict(spec.get("indicators", {}))
+    raise KeyError(f"No parameters found for strategy '{strategy_name}'")
+
+
+def search_space(strategy_name, names=None, path=PARAMS_PATH):
+    """
+    Dimensions for a strategy's numeric indicator parameters, derived from
+    their defaults. A "search_space" entry next to "indicators" in
+    str_params.json overrides them: {"rsi_length": [5, 30, 1], ...}.
+    `names` restricts the search to those parameters.
+    """
+    with open(path, "r") as f:
+        overrides = (
+            json.load(f)["strategies"].get(strategy_name, {}).get("search_space", {})
+        )
+    space = []
+    for name, default in default_params(strategy_name, path).items():
+        if names is not None and name not in names:
+            continue
+        bounds = overrides.get(name) or _default_range(name, default)
+        if bounds is None:
+            continue
+        low, high = bounds[0], bounds[1]
+        step = bounds[2] if len(bounds) > 2 else 1
+        space.append(Dimension(name, low, high, step))
+    return space
+
+
+def grid_size(space):
+    """Number of parameter sets an exhaustive grid over `space` would run."""
+    return math.prod(dimension.size for dimension in space)
+
+
+def is_valid(params):
+    return all(
+        params[a] < params[b] for a, b in ORDERED_PAIRS if a in params and b in params
+    )
+
+
+def _key(params):
+    return tuple(sorted(params.items()))
+
+
+def _random_params(space, rng, seen, attempts=100):
+    for _ in range(attempts):
+        params = {d.name: d.sample(rng) for d in space}
+        if is_valid(params) and _key(params) not in seen:
+            return params
+    return None
+
+
+def _score(trial_score):
+    return -math.inf if trial_score is None else trial_score
+
+
+class TPESampler:
+    """
+    Tree-structured Parzen estimator over independent dimensions: proposes
+    the candidate that maximizes l(x) / g(x), the densities of the good and
+    the remaining trials.
+    """
+
+    def __init__(self, space, seed=None, n_startup=N_STARTUP_TRIALS, gamma=GAMMA):
+        self.space = space
+        self.rng = np.random.default_rng(seed)
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.history = []  # (params, score)
+        self.seen = set()
+
+    def tell(self, params, score):
+        self.history.append((params, _score(score)))
+
+    def ask(self):
+        if len(self.history) < self.n_startup:
+            params = _random_params(self.space, self.rng, self.seen)
+        else:
+            params = self._propose()
+        if params is not None:
+            self.seen.add(_key(params))
+        return params
+
+    def _propose(self):
+        ranked = sorted(self.history, key=lambda item: item[1], reverse=True)
+        n_good = max(int(math.ceil(self.gamma * len(ranked))), 1)
+        good = [params for params, _ in ranked[:n_good]]
+        bad = [params for params, _ in ranked[n_good:]]
+
+        candidates = np.empty((N_CANDIDATES, len(self.space)))
+        scores = np.zeros(N_CANDIDATES)
+        for j, dimension in enumerate(self.space):
+            good_x = np.array([dimension.normalize(p[dimension.name]) for p in good])
+            bad_x = np.array([dimension.normalize(p[dimension.name]) for p in bad])
+            # Score the snapped values: that is what would be evaluated
+            x = np.array(
+                [
+                    dimension.normalize(dimension.from_unit(u))
+                    for u in self._sample_parzen(good_x, N_CANDIDATES)
+                ]
+            )
+            candidates[:, j] = x
+            scores += np.log(self._parzen_pdf(x, good_x)) - np.log(
+                self._parzen_pdf(x, bad_x)
+            )
+
+        for index in np.argsort(-scores):
+            params = {
+                d.name: d.from_unit(candidates[index, j])
+                for j, d in enumerate(self.space)
+            }
+            if is_valid(params) and _key(params) not in self.seen:
+                return params
+        return _random_params(self.space, self.rng, self.seen)
+
+    @staticmethod
+    def _bandwidth(n):
+        return max(0.25 * n ** -0.2, 0.03)
+
+    def _sample_parzen(self, centers, n):
+        """Draw from the mixture of the centers' Gaussians and a uniform prior."""
+        bandwidth = self._bandwidth(len(centers))
+        component = self.rng.integers(len(centers) + 1, size=n)
+        uniform = component == len(centers)
+        samples = np.empty(n)
+        samples[uniform] = self.rng.uniform(0, 1, uniform.sum())
+        picked = centers[component[~uniform]]
+        samples[~uniform] = self.rng.normal(picked, bandwidth)
+        return np.clip(samples, 0, 1)
+
+    def _parzen_pdf(self, x, centers):
+        if len(centers) == 0:
+            return np.ones(len(x))
+        bandwidth = self._bandwidth(len(centers))
+        z = (x[:, None] - centers[None, :]) / bandwidth
+        kernels = np.exp(-0.5 * z**2) / (bandwidth * math.sqrt(2 * math.pi))
+        # The uniform prior keeps the density positive everywhere
+        return (kernels.sum(axis=1) + 1.0) / (len(centers) + 1)
+
+
+class GeneticSampler:
+    """
+    Generational genetic algorithm: each generation keeps the best `elite`
+    parameter sets and breeds the rest by tournament selection, uniform
+    crossover and per-gene mutation. Parameter sets already evaluated are
+    never proposed again.
+    """
+
+    def __init__(
+        self, space, seed=None, population_size=16, elite=2, mutation_rate=None
+    ):
+        self.space = space
+        self.rng = np.random.default_rng(seed)
+        self.population_size = population_size
+        self.elite = elite
+        self.mutation_rate = mutation_rate or max(1 / len(space), 0.2)
+        self.seen = set()
+        self.scores = {}  # params key -> score
+        self.generation = 0
+        self._queue = []  # members of this generation not handed out yet
+        for _ in range(population_size):
+            params = _random_params(space, self.rng, self.seen)
+            if params is not None:
+                self.seen.add(_key(params))
+                self._queue.append(params)
+        self._waiting = len(self._queue)
+        self._population = []  # (params, score) of the current generation
+
+    def tell(self, params, score):
+        self.scores[_key(params)] = _score(score)
+        self._population.append((params, _score(score)))
+        self._waiting -= 1
+        if self._waiting == 0 and not self._queue:
+            self._breed()
+
+    def ask(self):
+        """The next unevaluated member of this generation, or None to wait."""
+        if not self._queue:
+            return None
+        return self._queue.pop(0)
+
+    def _tournament(self, population, size=3):
+        picks = self.rng.integers(len(population), size=min(size, len(population)))
+        return max((population[i] for i in picks), key=lambda item: item[1])[0]
+
+    def _child(self, population):
+        mother = self._tournament(population)
+        father = self._tournament(population)
+        child = {}
+        for dimension in self.space:
+            parent = mother if self.rng.random() < 0.5 else father
+            value = parent[dimension.name]
+            if self.rng.random() < self.mutation_rate:
+                spread = 0.15 * (dimension.high - dimension.low)
+                value = dimension.snap(value + self.rng.normal(0, spread))
+            child[dimension.name] = value
+        return child
+
+    def _breed(self):
+        population = sorted(self._population, key=lambda item: item[1], reverse=True)
+        # Elites carry over with their known score; only new children are run
+        survivors = population[: self.elite]
+        self._population = list(survivors)
+        children = []
+        for _ in range(self.population_size - len(survivors)):
+            for _ in range(20):
+                child = self._child(population)
+                if is_valid(child) and _key(child) not in self.seen:
+                    break
+            else:
+                child = _random_params(self.space, self.rng, self.seen)
+            if child is not None:
+                self.seen.add(_key(child))
+                children.append(child)
+        self.generation += 1
+        self._queue = children
+        self._waiting = len(children)
+        logger.debug(
+            f"Generation {self.generation}: best score {population[0][1]:.4f}, "
+            f"{len(children)} new children"
+        )
+
+
+SAMPLERS = {"tpe": TPESampler, "ga": GeneticSampler}
+
+
+class Trial:
+    """One evaluated parameter set."""
+
+    def __init__(
+        self, number, params, status, score=None, metrics=None, pruned_at_bar=None
+    ):
+        self.number = number
+        self.params = params
+        self.status = status
+        self.score = score
+        self.metrics = metrics or {}
+        self.pruned_at_bar = pruned_at_bar
+
+    def __repr__(self):
+        return (
+            f"Trial({self.number}, {self.status}, score={self.score}, "
+            f"params={self.params})"
+        )
+
+
+class Study:
+    """The trials of one optimization run, in completion order."""
+
+    def __init__(self, name, strategy_name, objective):
+        self.name = name
+        self.strategy_name = strategy_name
+        self.objective = objective
+        self.trials = []
+
+    @property
+    def best(self):
+        scored = [
+            t for t in self.trials if t.status == COMPLETE and t.score is not None
+        ]
+        return max(scored, key=lambda t: t.score, default=None)
+
+    def counts(self):
+        counts = {COMPLETE: 0, PRUNED: 0, FAILED: 0}
+        for trial in self.trials:
+            counts[trial.status] += 1
+        return counts
+
+
+def _scalar_metrics(stats):
+    """The JSON-friendly scalar statistics of a backtest."""
+    metrics = {}
+    for key, value in stats.items():
+        if str(key).startswith("_"):
+            continue
+        metrics[key] = value if isinstance(value, (int, float)) else str(value)
+    return metrics
+
+
+def evaluate(
+    df,
+    strategy_name,
+    base_config,
+    params,
+    objective="Sharpe Ratio",
+    max_drawdown_pct=None,
+    checkpoints=DRAWDOWN_CHECKPOINTS,
+):
+    """
+    Backtest one parameter set; returns (status, score, metrics, pruned_at_bar).
+    A run whose drawdown passes `max_drawdown_pct` (at a checkpoint or at the
+    end) is pruned. A NaN objective (e.g. no trades) scores None.
+    """
+    config = copy.deepcopy(base_config)
+    config["indicators"] = {**config.get("indicators", {}), **params}
+    try:
+        stats = run_backtest(
+            df,
+            strategy_name,
+            config,
+            max_drawdown_pct=max_drawdown_pct,
+            checkpoints=checkpoints,
+        )
+    except DrawdownLimitExceeded as e:
+        return PRUNED, None, {}, e.bar
+    except Exception as e:
+        logger.exception(f"Trial {params} of {strategy_name} failed: {e}")
+        return FAILED, None, {}, None
+    if stats is None:
+        return FAILED, None, {}, None
+
+    metrics = _scalar_metrics(stats)
+    drawdown = -float(stats.get("Max. Drawdown [%]", 0) or 0)
+    if max_drawdown_pct is not None and drawdown > max_drawdown_pct:
+        return PRUNED, None, metrics, len(df)
+    score = float(stats.get(objective, math.nan))
+    return COMPLETE, (None if math.isnan(score) else score), metrics, None
+
+
+_worker_df = None
+
+
+def _init_worker(descriptor):
+    global _worker_df
+    _worker_df = shared_data.attach(descriptor)
+
+
+def _evaluate_in_worker(*args, **kwargs):
+    return evaluate(_worker_df, *args, **kwargs)
+
+
+def optimize(
+    df,
+    strategy_name,
+    base_config=None,
+    method="tpe",
+    n_trials=50,
+    objective="Sharpe Ratio",
+    max_drawdown_pct=None,
+    checkpoints=DRAWDOWN_CHECKPOINTS,
+    space=None,
+    workers=DEFAULT_WORKERS,
+    seed=None,
+    patience=None,
+    study=None,
+    store=True,
+    callback=None,
+):
+    """
+    Search the strategy's parameters to maximize `objective` (a backtest
+    statistic) with "tpe" or "ga" and return the Study.
+
+    Up to `workers` backtests run at once in separate processes (1 runs
+    them in a thread of this process). `patience` stops the search after
+    that many finished trials without a new best. With `store`, every trial
+    is saved to strategy_storage under the study's name as soon as it
+    finishes; `callback(trial)` is called at the same moment.
+    """
+    if strategy_name not in get_strategy_classes():
+        raise KeyError(f"Strategy '{strategy_name}' not found")
+    space = space if space is not None else search_space(strategy_name)
+    if not space:
+        raise ValueError(f"'{strategy_name}' has no parameters to search")
+
+    base_config = copy.deepcopy(base_config or {})
+    base_config["indicators"] = {
+        **default_params(strategy_name),
+        **base_config.get("indicators", {}),
+    }
+    sampler = SAMPLERS[method](space, seed=seed)
+    study = Study(
+        study or f"{strategy_name} {method} {datetime.now():%Y-%m-%d %H:%M:%S}",
+        strategy_name,
+        objective,
+    )
+    logger.info(
+        f"Optimizing {strategy_name} with {method}: {n_trials} trials over "
+        f"{len(space)} parameters ({grid_size(space):,} grid points), "
+        f"{workers} workers"
+    )
+
+    dataset = None
+    if workers > 1:
+        dataset = shared_data.share(df)
+        executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(dataset.descriptor,),
+        )
+        run = _evaluate_in_worker
+    else:
+        executor = ThreadPoolExecutor(1)
+        run = lambda *args, **kwargs: evaluate(df, *args, **kwargs)  # noqa: E731
+
+    pending = {}  # future -> (trial number, params)
+    submitted = 0
+    best_score, since_best = -math.inf, 0
+    try:
+        while True:
+            stop = patience is not None and since_best >= patience
+            while not stop and len(pending) < workers and submitted < n_trials:
+                params = sampler.ask()
+                if params is None:
+                    break  # GA: wait for the rest of the generation
+                future = executor.submit(
+                    run,
+                    strategy_name,
+                    base_config,
+                    params,
+                    objective=objective,
+                    max_drawdown_pct=max_drawdown_pct,
+                    checkpoints=checkpoints,
+                )
+                pending[future] = (submitted, params)
+                submitted += 1
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number, params = pending.pop(future)
+                status, score, metrics, pruned_at_bar = future.result()
+                trial = Trial(number, params, status, score, metrics, pruned_at_bar)
+                sampler.tell(params, score)
+                study.trials.append(trial)
+
+                if _score(score) > best_score:
+                    best_score, since_best = score, 0
+                else:
+                    since_best += 1
+                if store:
+                    strategy_storage.save_trial(
+                        study.name,
+                        number,
+                        strategy_name,
+                        status,
+                        params,
+                        score,
+                        metrics,
+                        pruned_at_bar,
+                    )
+                if callback is not None:
+                    callback(trial)
+                logger.info(
+                    f"Trial {number} {status}: {objective} = {score} "
+                    f"(best {best_score}) {params}"
+                )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if dataset is not None:
+            dataset.release()
+
+    best = study.best
+    logger.info(
+        f"Study '{study.name}' finished: {study.counts()}, best "
+        f"{best.score if best else None} with {best.params if best else None}"
+    )
+    return study
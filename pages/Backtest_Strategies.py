@@ -1,37 +1,40 @@
 import streamlit as st
 import json
 import pandas as pd
-import numpy as np
 import ast  # Safely evaluate a string representation of a DataFrame
-import aiohttp
 import asyncio
-import nest_asyncio
 
-from backtest import run_backtest
-from backtesting._stats import _Stats
 import importlib
 import traceback
 import time
 import os
+import copy
+import hashlib
 
-yf = __import__("yfinance")  # Import yfinance dynamically
 from datetime import datetime, timedelta
 
-import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-
-from coinbase_data import fetch_all_historical_ohlcv, format_ohlcv_data
+# Heavy dependencies (yfinance, aiohttp, plotly, backtesting) are imported
+# inside the functions that need them so the page opens quickly.
 from trade_analysis import process_trades, display_trade_analysis
-from metrics_display import display_metrics
+from chart_utils import line_trace, zoom_range, clip_to_range
+from data_preview import forget as forget_preview, render_preview
+from metrics_display import display_metrics, display_timings, display_memory_report
 from theme_manager import apply_theme, THEMES
-from strategy_storage import save_strategy
+from strategy_storage import save_strategy, serialize_results, start_compaction_job
+from job_runner import get_runner
+from data_cache import get_cache, make_key
 from logger import get_logger
+from timing import Timings, collect, span
+import memory_profiling
+import position_sizing
+import strategy_dsl
 
 # import view_saved_strategies  # Import the saved strategies page
 # from view_saved_strategies import show_saved_strategies_ui, switch_page
-nest_asyncio.apply()
 logger = get_logger(__name__)
+start_compaction_job()  # Enforce run-history retention in the background
+ohlcv_cache = get_cache()  # Fetched data is shared by all sessions of this server
+job_runner = get_runner()  # Backtests run in a bounded background pool
 # importlib.reload(view_saved_strategies)
 st.set_page_config(page_title="Backtest UI", page_icon="📊")
 
@@ -44,8 +47,8 @@ if "loaded_strategy" not in st.session_state:
     st.session_state.loaded_strategy = None
 if "results" not in st.session_state:
     st.session_state.results = None
-if "df" not in st.session_state:
-    st.session_state.df = None
+if "data_key" not in st.session_state:
+    st.session_state.data_key = None  # Key of this session's data in the shared cache
 
 
 # App Content Starts Here
@@ -76,26 +79,17 @@ TIMEFRAME_LIMITS = {
     "1M": 3650,
 }
 
-# Load Binance precisions file
-with open("binance_precisions.json", "r") as f:
-    binance_precisions = json.load(f)
-
-
-# Function to get precision for a given Yahoo Finance symbol
-def get_binance_precision(yahoo_symbol):
-    """
-    Maps Yahoo symbol (e.g., 'BTC-USD') to Binance's trading pair format and retrieves precision for 'BTCUSDT'.
-    """
-    binance_symbol = (
-        yahoo_symbol.replace("-", "").upper() + "T"
-    )  # Convert BTC-USD -> BTCUSDT
-    return binance_precisions.get(binance_symbol, {}).get("amount_precision", 1)
-
-
 # Load Strategies
 def load_strategies():
     with open("str_params.json", "r") as f:
-        return json.load(f)["strategies"]
+        strategies = json.load(f)["strategies"]
+    # Declarative strategies (strategy_specs.json) use the same settings form
+    for name, spec in strategy_dsl.load_specs().items():
+        strategies[name] = {
+            "description": spec.get("description", name),
+            "indicators": dict(spec.get("indicators", {})),
+        }
+    return strategies
 
 
 strategies = load_strategies()
@@ -111,11 +105,156 @@ def get_valid_date_range(timeframe):
     return start_date, end_date
 
 
+# Live data is refreshed at most this often; CSV files are keyed by their mtime
+LIVE_DATA_TTL_SECONDS = 15 * 60
+
+
+def load_timed(key, loader, **kwargs):
+    """ohlcv_cache.get_or_load() that also returns the fetch/clean timings of a miss."""
+
+    def reload():
+        df = loader()
+        # Live frames are refetched under the same key once their TTL expires:
+        # previews cached for the previous frame must not be shown for this one
+        forget_preview(key)
+        return df
+
+    with collect() as load_timings:
+        df = ohlcv_cache.get_or_load(key, reload, **kwargs)
+    return df, load_timings.as_dict()
+
+
+def timed_read_csv(source):
+    """pd.read_csv recorded as the "fetch" phase."""
+    with span("fetch"):
+        return pd.read_csv(source)
+
+
+def session_df():
+    """The DataFrame of this session, looked up in the shared cache by key."""
+    key = st.session_state.get("data_key")
+    return ohlcv_cache.get(key) if key is not None else None
+
+
+def download_yahoo(symbol, timeframe, start_date, end_date):
+    """Download data from Yahoo Finance and normalise the columns."""
+    import yfinance as yf
+
+    with span("fetch"):
+        df = yf.download(
+            symbol,
+            start=start_date,
+            end=end_date,
+            interval=TIMEFRAME_MAPPING.get(timeframe),  # Ensure interval is mapped correctly
+            auto_adjust=True,
+        )
+    if df.empty:
+        return df
+
+    with span("clean"):
+        return _normalise_yahoo(df)
+
+
+def _normalise_yahoo(df):
+    """Flatten the yfinance frame to a Date index and OHLCV columns."""
+    df.reset_index(inplace=True)
+    if "Datetime" in df.columns:
+        df.rename(columns={"Datetime": "Date"}, inplace=True)
+    df.columns = [
+        "Date",
+        "Open",
+        "High",
+        "Low",
+        "Close",
+        "Volume",
+    ]
+    df.set_index("Date", inplace=True)
+    df.index = pd.to_datetime(df.index)  # Ensure Date column is in datetime format
+    return df
+
+
+def download_coinbase(symbol, granularity, num_days):
+    """Download and format candles from Coinbase."""
+    import nest_asyncio
+    from coinbase_data import fetch_all_historical_ohlcv, format_ohlcv_data
+
+    nest_asyncio.apply()
+    with span("fetch"):
+        raw_data = asyncio.run(fetch_all_historical_ohlcv(symbol, granularity, num_days))
+    with span("clean"):
+        return format_ohlcv_data(raw_data)
+
+
+def load_server_csv(file_path, file_label):
+    """Read a server-side CSV and map its columns to Date/Open/High/Low/Close/Volume."""
+    with span("fetch"):
+        df_raw = pd.read_csv(file_path)
+    with span("clean"):
+        return _clean_server_csv(df_raw, file_label)
+
+
+def _clean_server_csv(df_raw, file_label):
+    """Rename, type-convert and drop incomplete rows of a raw CSV frame."""
+    df_clean = df_raw.copy()
+
+    # 🧠 Flexible time column detection
+    time_candidates = ["date", "datetime", "timestamp", "time"]
+    time_col = next(
+        (col for col in df_clean.columns if col.lower() in time_candidates),
+        None,
+    )
+
+    if not time_col:
+        raise ValueError(f"Missing time column. Tried: {time_candidates}")
+
+    # 🧭 Map all expected columns dynamically
+    expected = ["Open", "High", "Low", "Close", "Volume"]
+    col_mapping = {}
+
+    # Time column mapping
+    col_mapping[time_col] = "Date"
+
+    # Map OHLCV columns (case-insensitive match)
+    for col in expected:
+        match = next((c for c in df_clean.columns if c.lower() == col.lower()), None)
+        if match:
+            col_mapping[match] = col
+        else:
+            raise ValueError(f"Missing expected column: {col}")
+
+    # 🔄 Apply standard names
+    df_clean.rename(columns=col_mapping, inplace=True)
+
+    # ✅ Now safely subset to just the needed columns
+    required_cols = ["Date"] + expected
+    if not all(col in df_clean.columns for col in required_cols):
+        raise ValueError(f"After renaming, missing required columns: {required_cols}")
+
+    df_clean = df_clean[required_cols].copy()
+
+    # 🧼 Convert columns
+    for col in expected:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
+
+    df_clean["Date"] = pd.to_datetime(df_clean["Date"], errors="coerce")
+    df_clean.set_index("Date", inplace=True)
+
+    # 🚿 Drop NaNs
+    before = len(df_clean)
+    df_clean.dropna(inplace=True)
+    after = len(df_clean)
+    dropped = before - after
+
+    logger.info(f"[{file_label}] Dropped {dropped} rows during cleaning.")
+    logger.info(f"[{file_label}] Column mapping used: {col_mapping}")
+    return df_clean
+
+
 # Initialize session state variables
 # Session state defaults
-for key in ["show_backtest", "run_backtest", "data_source", "df", "rerun"]:
+for key in ["show_backtest", "run_backtest", "data_source", "data_key", "rerun"]:
     if key not in st.session_state:
-        st.session_state[key] = None if key == "df" else False
+        st.session_state[key] = None if key == "data_key" else False
 
 # Streamlit Sidebar
 st.sidebar.header("Strategy Selection")
@@ -138,7 +277,7 @@ data_source = st.sidebar.radio("Select Data Source", ["Live Data", "Upload CSV"]
 df = None  # Placeholder for DataFrame
 # Check if data source is changed and reset data
 if st.session_state.data_source != data_source:
-    st.session_state.df = None  # Clear Data Preview
+    st.session_state.data_key = None  # Clear Data Preview
     st.session_state.show_backtest = False  # Hide Backtest Button
     st.session_state.data_source = data_source  # Update selected source
     # st.session_state.updated_indicators = indicators.copy()  # Reset indicators
@@ -182,7 +321,7 @@ if data_source == "Live Data":
             st.session_state.selected_timeframe = None
 
         if st.session_state.selected_timeframe != new_timeframe:
-            st.session_state.df = None  # Clear previously fetched data
+            st.session_state.data_key = None  # Clear previously fetched data
             st.session_state.show_backtest = False  # Hide backtest button
             st.session_state.selected_timeframe = (
                 new_timeframe  # Update selected timeframe
@@ -273,7 +412,7 @@ if data_source == "Live Data":
             st.session_state.selected_timeframe = None
 
         if st.session_state.selected_timeframe != new_timeframe:
-            st.session_state.df = None  # Clear previously fetched data
+            st.session_state.data_key = None  # Clear previously fetched data
             st.session_state.show_backtest = False  # Hide backtest button
             st.session_state.selected_timeframe = (
                 new_timeframe  # Update selected timeframe
@@ -289,8 +428,8 @@ elif data_source == "Upload CSV":
     # Ensure session state variables exist
     if "selected_file" not in st.session_state:
         st.session_state.selected_file = None
-    if "df" not in st.session_state:
-        st.session_state.df = None
+    if "data_key" not in st.session_state:
+        st.session_state.data_key = None
 
     st.sidebar.markdown(
         "**Note**: Ensure your CSV file has the required columns: Date, Open, High, Low, Close, Volume."
@@ -310,7 +449,24 @@ elif data_source == "Upload CSV":
             and uploaded_file != st.session_state.selected_file
         ):
             st.session_state.selected_file = uploaded_file
-            st.session_state.df = pd.read_csv(uploaded_file)
+            # Keyed on the contents: two uploads with the same name and size
+            # (e.g. from different sessions) must not share a cached frame
+            upload_key = make_key(
+                "upload",
+                uploaded_file.name,
+                "N/A",
+                hashlib.sha256(uploaded_file.getvalue()).hexdigest(),
+            )
+            _, load_timings = load_timed(
+                upload_key, lambda: timed_read_csv(uploaded_file)
+            )
+            st.session_state.data_key = upload_key
+            st.session_state.data_info = {
+                "source": "Upload",
+                "symbol": uploaded_file.name,
+                "timeframe": "N/A",
+                "timings": load_timings,
+            }
 
     # 🔵 Option 2: Select CSV from Server
     elif data_source == "Select from Server":
@@ -329,74 +485,29 @@ elif data_source == "Upload CSV":
             file_path = os.path.join(SERVER_CSV_FOLDER, selected_file)
 
             try:
-                df_raw = pd.read_csv(file_path)
-                df_clean = df_raw.copy()
-
-                # 🧠 Flexible time column detection
-                time_candidates = ["date", "datetime", "timestamp", "time"]
-                time_col = next(
-                    (col for col in df_clean.columns if col.lower() in time_candidates),
-                    None,
+                server_key = make_key(
+                    "server_csv", file_path, "N/A", os.path.getmtime(file_path)
                 )
-
-                if not time_col:
-                    raise ValueError(f"Missing time column. Tried: {time_candidates}")
-
-                # 🧭 Map all expected columns dynamically
-                expected = ["Open", "High", "Low", "Close", "Volume"]
-                col_mapping = {}
-
-                # Time column mapping
-                col_mapping[time_col] = "Date"
-
-                # Map OHLCV columns (case-insensitive match)
-                for col in expected:
-                    match = next(
-                        (c for c in df_clean.columns if c.lower() == col.lower()), None
-                    )
-                    if match:
-                        col_mapping[match] = col
-                    else:
-                        raise ValueError(f"Missing expected column: {col}")
-
-                # 🔄 Apply standard names
-                df_clean.rename(columns=col_mapping, inplace=True)
-
-                # ✅ Now safely subset to just the needed columns
-                required_cols = ["Date"] + expected
-                if not all(col in df_clean.columns for col in required_cols):
-                    raise ValueError(
-                        f"After renaming, missing required columns: {required_cols}"
-                    )
-
-                df_clean = df_clean[required_cols].copy()
-
-                # 🧼 Convert columns
-                for col in expected:
-                    df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
-
-                df_clean["Date"] = pd.to_datetime(df_clean["Date"], errors="coerce")
-                df_clean.set_index("Date", inplace=True)
-
-                # 🚿 Drop NaNs
-                before = len(df_clean)
-                df_clean.dropna(inplace=True)
-                after = len(df_clean)
-                dropped = before - after
-
-                logger.info(
-                    f"[{selected_file}] Dropped {dropped} rows during cleaning."
+                df_clean, load_timings = load_timed(
+                    server_key, lambda: load_server_csv(file_path, selected_file)
                 )
-                logger.info(f"[{selected_file}] Column mapping used: {col_mapping}")
+                if df_clean is None:
+                    raise ValueError("No rows left after cleaning.")
 
                 # ✅ Save to session
-                st.session_state.df = df_clean
+                st.session_state.data_key = server_key
+                st.session_state.data_info = {
+                    "source": "Server CSV",
+                    "symbol": selected_file,
+                    "timeframe": "N/A",
+                    "timings": load_timings,
+                }
                 st.session_state.show_backtest = True
 
                 st.success(f"✅ Loaded and cleaned '{selected_file}' successfully!")
 
             except Exception as e:
-                st.session_state.df = None
+                st.session_state.data_key = None
                 st.session_state.show_backtest = False
                 logger.error(f"Error processing server CSV '{selected_file}': {str(e)}")
                 logger.error("Traceback:\n" + traceback.format_exc())
@@ -435,41 +546,34 @@ if data_source == "Live Data":
                         st.write(f"Interval Selected: {interval}")
 
                         try:
-                            # Download data from Yahoo Finance
-                            df = yf.download(
+                            # Download data from Yahoo Finance (or reuse another session's copy)
+                            yahoo_key = make_key(
+                                "yahoo",
                                 symbol,
-                                start=start_date,
-                                end=end_date,
-                                interval=TIMEFRAME_MAPPING.get(
-                                    new_timeframe
-                                ),  # Ensure interval is mapped correctly
-                                auto_adjust=True,
+                                new_timeframe,
+                                (start_date.date(), end_date.date()),
+                            )
+                            df, load_timings = load_timed(
+                                yahoo_key,
+                                lambda: download_yahoo(
+                                    symbol, new_timeframe, start_date, end_date
+                                ),
+                                ttl_seconds=LIVE_DATA_TTL_SECONDS,
                             )
 
                             # Check if data is fetched successfully
-                            if df.empty:
+                            if df is None:
                                 st.error(
                                     "Failed to retrieve data. Please check the symbol, timeframe, and date range."
                                 )
                             else:
-                                df.reset_index(inplace=True)
-                                if "Datetime" in df.columns:
-                                    df.rename(
-                                        columns={"Datetime": "Date"}, inplace=True
-                                    )
-                                df.columns = [
-                                    "Date",
-                                    "Open",
-                                    "High",
-                                    "Low",
-                                    "Close",
-                                    "Volume",
-                                ]
-                                df.set_index("Date", inplace=True)
-                                df.index = pd.to_datetime(
-                                    df.index
-                                )  # Ensure Date column is in datetime format
-                                st.session_state.df = df
+                                st.session_state.data_key = yahoo_key
+                                st.session_state.data_info = {
+                                    "source": live_source,
+                                    "symbol": symbol,
+                                    "timeframe": new_timeframe,
+                                    "timings": load_timings,
+                                }
                                 st.session_state.show_backtest = (
                                     True  # Show backtest button after fetching data
                                 )
@@ -501,17 +605,30 @@ if data_source == "Live Data":
                     else:
                         try:
                             # loop = asyncio.get_event_loop()
-                            raw_data = asyncio.run(
-                                fetch_all_historical_ohlcv(
+                            coinbase_key = make_key(
+                                "coinbase",
+                                symbol,
+                                new_timeframe,
+                                (num_days, datetime.utcnow().date()),
+                            )
+                            df, load_timings = load_timed(
+                                coinbase_key,
+                                lambda: download_coinbase(
                                     symbol, granularity, num_days
-                                )
+                                ),
+                                ttl_seconds=LIVE_DATA_TTL_SECONDS,
                             )
-                            df = format_ohlcv_data(raw_data)
 
-                            if df.empty:
+                            if df is None:
                                 st.error("❌ Failed to retrieve data from Coinbase.")
                             else:
-                                st.session_state.df = df
+                                st.session_state.data_key = coinbase_key
+                                st.session_state.data_info = {
+                                    "source": live_source,
+                                    "symbol": symbol,
+                                    "timeframe": new_timeframe,
+                                    "timings": load_timings,
+                                }
                                 st.session_state.show_backtest = True
                                 st.success("✅ Coinbase data fetched successfully!")
 
@@ -528,10 +645,30 @@ if data_source == "Live Data":
             except Exception as e:
                 st.error(f"Error fetching data: {e}")
 
-# Display Data Preview
-if st.session_state.df is not None:
+# Look up this session's data once per rerun
+df_session = session_df()
+if st.session_state.data_key is not None and df_session is None:
+    # Evicted from the shared cache (memory cap or expiry): ask for a refetch
+    st.session_state.data_key = None
+    st.session_state.selected_file = None  # Let CSV sources reload on next run
+    st.session_state.show_backtest = False
+    st.info("ℹ️ Cached data expired. Please fetch or select the data again.")
+
+with st.sidebar.expander("🗄 Shared Data Cache"):
+    cache_stats = ohlcv_cache.stats()
+    st.write(
+        f"{cache_stats['entries']} frames · "
+        f"{cache_stats['bytes'] / 1e6:.1f} / {cache_stats['max_bytes'] / 1e6:.0f} MB"
+    )
+    st.write(
+        f"Hits: {cache_stats['hits']} · Misses: {cache_stats['misses']} · "
+        f"Evictions: {cache_stats['evictions']}"
+    )
+
+# Display Data Preview (one page at a time, pages cached per data key)
+if df_session is not None:
     st.subheader("📊 Data Preview")
-    st.dataframe(st.session_state.df)
+    render_preview(df_session, st.session_state.data_key, key="data_preview")
 
 
 # Initialize General Trading Parameters in session state if not present
@@ -641,208 +778,255 @@ with st.form(key="indicator_form"):
             key=f"indicator_{key}",
         )
 
+    # Log level for this run only (the rest of the app keeps the default)
+    run_log_level = st.selectbox(
+        "🪵 Log level for this run",
+        ["Default", "DEBUG", "INFO", "WARNING", "ERROR"],
+        key="run_log_level",
+        help="DEBUG also writes parameters and data samples to logs/strategy_debug.log.",
+    )
+    profile_memory = st.checkbox(
+        "🧠 Profile memory for this run",
+        key="profile_memory",
+        help="Takes tracemalloc snapshots around each phase. Slows the run down.",
+    )
+
     # Submit button inside form
     run_backtest_button = st.form_submit_button("🚀 Run Backtest")
 
 # --- Process form submission outside of the form ---
 if run_backtest_button:
-    if st.session_state.df is None:
-        warn_msg = st.warning("⚠️ Please fetch data before running the backtest.")
-        time.sleep(2)
-        warn_msg.empty()
+    if df_session is None:
+        st.warning("⚠️ Please fetch data before running the backtest.")
         st.session_state.show_backtest = False  # Hide backtest button
-        st.session_state.rerun = True  # Trigger UI refresh
-    if st.session_state.df is not None:
+    if df_session is not None:
         st.session_state.updated_indicators.update(new_values)
-        success_msg = st.success("Indicator settings updated and backtest running!")
         logger.info("Preparing to run backtest...")
 
-        if "df" not in st.session_state:
+        if st.session_state.data_key is None:
             logger.warning("No dataframe found in session_state.")
-        if not st.session_state.get("df", pd.DataFrame()).shape[0]:
+        if not df_session.shape[0]:
             logger.warning("Dataframe is empty.")
         if not selected_strategy:
             logger.warning("No strategy selected.")
 
-        time.sleep(2)  # Delay for 2 seconds
-        success_msg.empty()  # Clear the success message
-
         # st.subheader("📊 Data Preview")
-        # st.dataframe(st.session_state.df)
-        # Default values to prevent NameError
-        live_source = None
-        symbol = None
-        new_timeframe = None
+        # st.dataframe(df_session)
+        # Symbol/timeframe of the loaded dataset (None for uploads and CSVs)
+        data_info = st.session_state.get("data_info") or {}
+        is_live = data_info.get("source") in ("Yahoo Finance", "Coinbase")
+        data_symbol = data_info.get("symbol") if is_live else None
 
         # Ensure backtest is only shown when data is available
-        if st.session_state.show_backtest and st.session_state.df is not None:
+        if st.session_state.show_backtest and df_session is not None:
             logger.info(
                 f"Running backtest for strategy: {selected_strategy} with parameters: {st.session_state.updated_indicators}"
             )
+            initial_cash = st.session_state.trading_params["initial_cash"]
+            # Quantities are whole lots of the exchange's amount precision
+            # (or a power of ten that buys at least 1000 lots), at real prices
+            lot_size = position_sizing.lot_size(
+                data_symbol, initial_cash, df_session["Close"].max()
+            )
             strategy_config.update(
                 {
-                    "initial_cash": st.session_state.trading_params["initial_cash"],
+                    "initial_cash": initial_cash,
                     "position_size": st.session_state.trading_params["position_size"],
                     "indicators": st.session_state.updated_indicators,
                     # "spread": st.session_state.trading_params["spread"],
                     "commission": st.session_state.trading_params["commission"],
                     # "trade_mode": st.session_state.trading_params["trade_mode"],
-                    "precision_amount": (
-                        get_binance_precision(symbol)
-                        if data_source == "Live Data" and live_source == "Yahoo Finance"
-                        else 1
-                    ),
-                    "symbol": symbol if data_source == "Live Data" else "CSV Data",
-                    "timeframe": new_timeframe if data_source == "Live Data" else "N/A",
+                    "lot_size": lot_size,
+                    "symbol": data_symbol or "CSV Data",
+                    "timeframe": data_info.get("timeframe") if is_live else "N/A",
                 }
             )
 
-            max_price = st.session_state.df["Close"].max()
-            initial_cash = st.session_state.trading_params["initial_cash"]
-            # Ensure we can always buy at least 1000 units
-            if initial_cash < max_price:
-                position_size_factor = 1000
-            elif initial_cash < max_price * 10:
-                position_size_factor = 100
-            elif initial_cash < max_price * 100:
-                position_size_factor = 10
-            else:
-                position_size_factor = 1  # Full position size
-
-            # st.write(st.session_state.df.dtypes)
+            memory_profile = None
+            if profile_memory:
+                # Import the strategy's module and Plotly first so they are not traced
+                import plotly.graph_objects  # noqa: F401
+                from backtest import get_strategy_classes
 
-            # st.write(
-            #     "position_size_factor:",
-            #     position_size_factor,
-            #     type(position_size_factor),
-            # )
-
-            try:
-                df = st.session_state.df / position_size_factor
-                logger.info(
-                    f"Running backtest with DataFrame columns: {df.columns.tolist()}"
-                )
-                logger.info(f"DataFrame shape: {df.shape}")
-                logger.debug(f"First 5 rows of DataFrame:\n{df.head()}")
-
-                logger.info(f"Selected strategy: {selected_strategy}")
-                logger.debug(f"Strategy config: {strategy_config}")
-
-                stats = run_backtest(df, selected_strategy, strategy_config)
-
-                logger.info("Backtest completed successfully.")
-
-            except Exception as e:
-                logger.error(f"Error during backtest execution: {str(e)}")
-                logger.error("Traceback:\n" + traceback.format_exc())
-                st.error(f"Error during backtest execution: {str(e)}")
+                get_strategy_classes().get(selected_strategy)
+                memory_profile = memory_profiling.MemoryProfile().start()
+            logger.info(
+                f"Running backtest with DataFrame columns: {df_session.columns.tolist()}"
+            )
+            logger.info(f"DataFrame shape: {df_session.shape}, lot size: {lot_size}")
+
+            logger.info(f"Selected strategy: {selected_strategy}")
+            logger.debug(f"Strategy config: {strategy_config}")
+
+            # Only one active backtest per session: a new submit replaces the old one
+            previous_job_id = st.session_state.get("backtest_job_id")
+            if previous_job_id:
+                job_runner.cancel(previous_job_id)
+
+            # Run in the background; the page polls the job instead of blocking
+            st.session_state.backtest_job_id = job_runner.submit_backtest(
+                df_session,
+                selected_strategy,
+                copy.deepcopy(strategy_config),
+                meta={
+                    "initial_cash": initial_cash,
+                    "log_level": None if run_log_level == "Default" else run_log_level,
+                    "memory_profile": memory_profile,
+                    # Load phases of the dataset
+                    "timings": dict(data_info.get("timings", {})),
+                    "loaded_params": copy.deepcopy(strategy_config),
+                    "backtest_meta": {
+                        "strategy": selected_strategy,
+                        **{
+                            k: v
+                            for k, v in data_info.items()
+                            if k in ("symbol", "timeframe")
+                        },
+                    },
+                },
+            )
+            st.session_state.stats = None
+            st.session_state.memory_report = None
+            st.session_state.run_backtest = False
 
-                stats = None  # Set stats to None on error
 
-            # --- Display Results ---
-            st.subheader("📊 Backtest Results")
-            st.write(stats)
-            st.session_state.run_backtest = True
+@st.fragment(run_every=1.0)
+def show_backtest_progress(job_id):
+    """Poll a running job without rerunning the whole page."""
+    job = job_runner.get(job_id)
+    if job is None or not job.is_active:
+        st.rerun()  # Finished: rerun the full page to render the results
+        return
 
-            # --- Display Backtest Summary ---
-            st.subheader("📊 Backtest Summary")
-
-            # Ensure values are properly converted before displaying
-            total_trades = int(stats.get("# Trades", 0))
-            returns = float(stats.get("Return [%]", 0))
-            win_rate = float(stats.get("Win Rate [%]", 0))
-            final_equity = float(stats.get("Equity Final [$]", 0))
-            max_drawdown = float(stats.get("Max. Drawdown [%]", 0))
-            profit_factor = float(stats.get("Profit Factor", 0))
-            sharpe_ratio = float(stats.get("Sharpe Ratio", 0) or 0)
-
-            # Correct net profit calculation
-            net_profit = final_equity - initial_cash
-
-            # Display key metrics
-            display_metrics(
-                net_profit,
-                win_rate,
-                max_drawdown,
-                profit_factor,
-                sharpe_ratio,
-                returns,
-            )
-
-            # Store parameters used in backtest
-            st.session_state.loaded_params = strategy_config
-            st.session_state.stats = stats if stats is not None else None
+    if job.status == "queued":
+        st.progress(0.0, text="⏳ Waiting for a free backtest worker...")
+    else:
+        st.progress(
+            job.progress,
+            text=f"🚀 Running backtest: {job.bars_done:,} / {job.total_bars:,} bars",
+        )
+    if st.button("⏹ Cancel Backtest", key=f"cancel_{job_id}"):
+        job_runner.cancel(job_id)
+
+
+def display_backtest_results(stats, initial_cash, job_id):
+    """Render the statistics, equity curve and trades of a finished backtest."""
+    import plotly.graph_objects as go
+
+    # --- Display Results ---
+    st.subheader("📊 Backtest Results")
+    st.write(stats)
+
+    # --- Display Backtest Summary ---
+    st.subheader("📊 Backtest Summary")
+
+    # Ensure values are properly converted before displaying
+    total_trades = int(stats.get("# Trades", 0))
+    returns = float(stats.get("Return [%]", 0))
+    win_rate = float(stats.get("Win Rate [%]", 0))
+    final_equity = float(stats.get("Equity Final [$]", 0))
+    max_drawdown = float(stats.get("Max. Drawdown [%]", 0))
+    profit_factor = float(stats.get("Profit Factor", 0))
+    sharpe_ratio = float(stats.get("Sharpe Ratio", 0) or 0)
+
+    # Correct net profit calculation
+    net_profit = final_equity - initial_cash
+
+    # Display key metrics
+    display_metrics(
+        net_profit,
+        win_rate,
+        max_drawdown,
+        profit_factor,
+        sharpe_ratio,
+        returns,
+    )
 
-            if "_equity_curve" in stats:
+    if "_equity_curve" in stats:
+        try:
+            equity_data = stats["_equity_curve"]
+            # If the data is already a DataFrame, use it directly
+            if isinstance(equity_data, pd.DataFrame):
+                equity_df = equity_data
+            elif isinstance(equity_data, str):
                 try:
-                    equity_data = stats["_equity_curve"]
-                    # If the data is already a DataFrame, use it directly
-                    if isinstance(equity_data, pd.DataFrame):
-                        equity_df = equity_data
-                    elif isinstance(equity_data, str):
-                        try:
-                            # Convert the string back to a dictionary safely
-                            equity_dict = ast.literal_eval(equity_data)
-                            equity_df = pd.DataFrame(equity_dict)
-                        except Exception as e:
-                            st.error(f"Error processing equity curve: {e}")
-                            equity_df = None
-                    else:
-                        st.error("Unexpected format for equity curve data.")
-                        equity_df = None
-
-                    # Plot the equity curve if data is valid
-                    if equity_df is not None and "Equity" in equity_df.columns:
-                        st.subheader("📈 Equity Curve")
-                        fig = px.line(
-                            equity_df,
-                            x=equity_df.index,  # Use the index as the x-axis
-                            y="Equity",
-                            title="Equity Curve",
-                            line_shape="linear",
-                        )
-                        fig.update_layout(
-                            xaxis_title="Date",
-                            yaxis_title="Equity Value",
-                            template="plotly_dark",
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-
+                    # Convert the string back to a dictionary safely
+                    equity_dict = ast.literal_eval(equity_data)
+                    equity_df = pd.DataFrame(equity_dict)
                 except Exception as e:
                     st.error(f"Error processing equity curve: {e}")
-                # Process trade data
-                trades = process_trades(
-                    stats, st.session_state.df, position_size_factor
-                )
-                # Display trade history and profit/loss analysis
-                display_trade_analysis(trades, st.session_state.df)
-
-
-def serialize_results(results):
-    """Convert results to a JSON-serializable format."""
-    if isinstance(results, pd.DataFrame):
-        return results.astype(str).to_dict(
-            orient="records"
-        )  # Convert DataFrame to list of dicts
-
-    elif isinstance(results, pd.Series):
-        return results.astype(str).to_dict()  # Convert Series to a dict
-
-    elif isinstance(results, dict):
-        return {
-            k: serialize_results(v) for k, v in results.items()
-        }  # Recursively serialize dicts
-
-    elif hasattr(results, "__dict__"):  # Handle custom objects
-        return {k: serialize_results(v) for k, v in vars(results).items()}
-
-    elif isinstance(results, pd.Timestamp):
-        return results.isoformat()  # Convert Timestamp to ISO format string
-
-    elif isinstance(results, pd.Timedelta):
-        return str(results)  # Convert Timedelta to string
-
-    return results  # Return as-is if already serializable
+                    equity_df = None
+            else:
+                st.error("Unexpected format for equity curve data.")
+                equity_df = None
+
+            # Plot the equity curve if data is valid
+            if equity_df is not None and "Equity" in equity_df.columns:
+                st.subheader("📈 Equity Curve")
+                window = zoom_range(equity_df.index, key="equity_curve_zoom")
+                with span("render"):
+                    equity = clip_to_range(equity_df["Equity"], window)
+                    fig = go.Figure(line_trace(equity.index, equity.values, "Equity"))
+                    fig.update_layout(
+                        title="Equity Curve",
+                        xaxis_title="Date",
+                        yaxis_title="Equity Value",
+                        template="plotly_dark",
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                memory_profiling.checkpoint("render_equity")
+
+        except Exception as e:
+            st.error(f"Error processing equity curve: {e}")
+        # Process trade data
+        with span("process_trades"):
+            trades = process_trades(stats, df_session)
+        memory_profiling.checkpoint("process_trades")
+        # Display trade history and profit/loss analysis
+        with span("render"):
+            display_trade_analysis(trades, df_session, preview_key=("trades", job_id))
+        memory_profiling.checkpoint("render_trades")
+
+
+# --- Background backtest status / results ---
+backtest_job = job_runner.get(st.session_state.get("backtest_job_id"))
+if backtest_job is not None:
+    if backtest_job.is_active:
+        show_backtest_progress(backtest_job.id)
+    elif backtest_job.status == "cancelled":
+        st.warning("⏹ Backtest cancelled.")
+    elif backtest_job.status == "failed":
+        st.error(f"Error during backtest execution: {backtest_job.error}")
+    elif backtest_job.result is not None and df_session is not None:
+        if not st.session_state.run_backtest:
+            # First render of this job's result: store it for saving
+            st.session_state.run_backtest = True
+            st.session_state.stats = backtest_job.result
+            st.session_state.loaded_params = backtest_job.meta["loaded_params"]
+            st.session_state.backtest_meta = backtest_job.meta["backtest_meta"]
+            logger.info("Backtest completed successfully.")
+        # Render phases are re-measured on every rerun; the rest comes from the job
+        memory_profile = backtest_job.meta.get("memory_profile")
+        with collect() as render_timings, memory_profiling.use(memory_profile):
+            display_backtest_results(
+                backtest_job.result,
+                backtest_job.meta["initial_cash"],
+                backtest_job.id,
+            )
+        if memory_profile is not None and memory_profile.active:
+            # Only the first render is profiled; the report is kept for later reruns
+            memory_profile.finish()
+            st.session_state.memory_report = memory_profile.report(st.session_state)
+        st.session_state.backtest_timings = Timings(
+            {
+                **backtest_job.meta.get("timings", {}),
+                **backtest_job.timings.as_dict(),
+                **render_timings.as_dict(),
+            }
+        ).as_dict()
+        display_timings(st.session_state.backtest_timings)
+        if st.session_state.get("memory_report"):
+            display_memory_report(st.session_state.memory_report)
 
 
 # Save Strategy UI
@@ -852,14 +1036,16 @@ def save_strategy_ui():
 
     if (
         "loaded_params" in st.session_state
-        and "df" in st.session_state
+        and df_session is not None
         and "stats" in st.session_state
     ):
         params = {
             **st.session_state.trading_params,  # Include trading parameters
             "indicators": st.session_state.updated_indicators,
+            # Strategy, symbol and timeframe are indexed for the saved-runs browser
+            **st.session_state.get("backtest_meta", {}),
         }
-        df = st.session_state.df
+        df = df_session
         results = st.session_state.stats
 
         # Convert results to a JSON-serializable format
@@ -867,8 +1053,16 @@ def save_strategy_ui():
 
         if st.button("💾 Save Strategy"):
             if strategy_name:
-                save_strategy(strategy_name, params, df, results_serializable)
-                st.success(f"✅ Strategy '{strategy_name}' saved successfully!")
+                run_id = save_strategy(
+                    strategy_name,
+                    params,
+                    df,
+                    results_serializable,
+                    timings=st.session_state.get("backtest_timings"),
+                )
+                st.success(
+                    f"✅ Strategy '{strategy_name}' saved successfully! (run #{run_id})"
+                )
             else:
                 st.error("⚠️ Please enter a strategy name.")
     else:
@@ -880,7 +1074,9 @@ try:
         stats = st.session_state.stats
         # st.write("Type of stats:", type(stats))  # Check the type of stats
 
-        # Check if stats is an instance of _Stats
+        # Check if stats is an instance of _Stats (backtesting is loaded by now)
+        from backtesting._stats import _Stats
+
         if isinstance(stats, _Stats):
             # st.write("Stats is an instance of _Stats.")
             save_strategy_ui()
@@ -921,10 +1117,16 @@ with col2:
         # ].copy()
         st.session_state.updated_indicators = {}
         # Reset stored strategies
-        st.session_state.df = None
+        st.session_state.data_key = None
         st.session_state.show_backtest = False
         st.session_state.loaded_params = None
         st.session_state.loaded_strategy = None
+        if st.session_state.get("backtest_job_id"):
+            job_runner.cancel(st.session_state.backtest_job_id)
+        st.session_state.backtest_job_id = None
+        st.session_state.stats = None
+        st.session_state.backtest_timings = None
+        st.session_state.memory_report = None
         # st.session_state.backtest_triggered = False
         # Trigger UI refresh
         st.session_state.rerun = True
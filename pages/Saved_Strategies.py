@@ -1,7 +1,18 @@
 import streamlit as st
-from strategy_storage import fetch_all_strategies, load_strategy, delete_strategy
+import pandas as pd
+from strategy_storage import (
+    count_runs,
+    query_runs,
+    distinct_run_values,
+    load_run_metrics,
+    load_run_curves,
+    load_run_timings,
+    delete_run,
+    delete_strategy,
+)
 import time
 from theme_manager import THEMES, apply_theme
+from metrics_display import display_timings
 
 # Set page config
 st.set_page_config(page_title="Saved Strategies", page_icon="📁", layout="wide")
@@ -12,102 +23,189 @@ if "selected_theme" in st.session_state:
 
 st.title("📂 View Saved Strategies")
 
+PAGE_SIZES = [25, 50, 100]
+SORT_OPTIONS = {
+    "Newest": "run_id",
+    "Sharpe Ratio": "sharpe_ratio",
+    "Return [%]": "return_pct",
+    "Max. Drawdown [%]": "max_drawdown_pct",
+    "Win Rate [%]": "win_rate_pct",
+    "# Trades": "num_trades",
+}
+
 # Initialize session state safely
 for key in [
-    "loaded_strategy",
-    "loaded_params",
-    "loaded_df",
-    "loaded_results",
-    "ohlcv_path",
+    "selected_run_id",
     "show_delete_option",
-    "last_selected_strategy",
+    "run_page",
 ]:
     if key not in st.session_state:
         st.session_state[key] = None
 
-# Fetch saved strategies
-strategies = fetch_all_strategies()
+# --- Sidebar: Filters (evaluated in SQL, backed by indexes) ---
+st.sidebar.header("🔍 Filter Runs")
 
-if not strategies:
-    st.warning("No strategies saved yet!")
-    st.stop()
 
-# Add placeholder option
-strategy_options = ["Select a strategy..."] + strategies
-selected_strategy = st.selectbox("🔍 Select Strategy", strategy_options, index=0)
+def filter_select(label, column):
+    options = ["All"] + distinct_run_values(column)
+    choice = st.sidebar.selectbox(label, options, index=0)
+    return None if choice == "All" else choice
+
+
+def optional_number(label, help_text):
+    enabled = st.sidebar.checkbox(label, value=False)
+    if enabled:
+        return st.sidebar.number_input(
+            f"{label} value", value=0.0, help=help_text, label_visibility="collapsed"
+        )
+    return None
+
+
+filters = {
+    "name": st.sidebar.text_input("Name contains", ""),
+    "symbol": filter_select("Symbol", "symbol"),
+    "timeframe": filter_select("Timeframe", "timeframe"),
+    "strategy": filter_select("Strategy Class", "strategy"),
+    "min_sharpe": optional_number("Min Sharpe Ratio", "Only runs with Sharpe >= value"),
+    "min_return": optional_number("Min Return [%]", "Only runs with return >= value"),
+    "max_drawdown": optional_number(
+        "Max Drawdown [%]", "Only runs whose drawdown is at most this many percent"
+    ),
+}
+
+sort_label = st.sidebar.selectbox("Sort by", list(SORT_OPTIONS.keys()), index=0)
+page_size = st.sidebar.selectbox("Runs per page", PAGE_SIZES, index=0)
+
+# Reset to the first page whenever the query changes
+query_key = (tuple(filters.items()), sort_label, page_size)
+if st.session_state.get("run_query_key") != query_key:
+    st.session_state["run_query_key"] = query_key
+    st.session_state["run_page"] = 1
 
-# Reset delete confirmation if strategy selection changes
-if selected_strategy != st.session_state.get("last_selected_strategy"):
+total_runs = count_runs(filters)
+
+if not total_runs:
+    st.warning("No saved runs match the current filters!")
+    st.stop()
+
+num_pages = max(1, -(-total_runs // page_size))
+col_info, col_page = st.columns([3, 1])
+with col_page:
+    page = st.number_input(
+        "Page",
+        min_value=1,
+        max_value=num_pages,
+        value=min(st.session_state["run_page"] or 1, num_pages),
+        step=1,
+    )
+    st.session_state["run_page"] = page
+with col_info:
+    st.write(f"**{total_runs}** runs · page {page} of {num_pages}")
+
+# Only the rows of the current page are fetched from SQLite
+runs = query_runs(
+    filters,
+    order_by=SORT_OPTIONS[sort_label],
+    descending=True,
+    limit=page_size,
+    offset=(page - 1) * page_size,
+)
+runs_df = pd.DataFrame(runs).set_index("run_id")
+
+listing = st.dataframe(
+    runs_df,
+    use_container_width=True,
+    on_select="rerun",
+    selection_mode="single-row",
+    key=f"runs_listing_{page}",
+)
+
+selected_rows = listing.selection.rows if listing is not None else []
+selected_run_id = int(runs_df.index[selected_rows[0]]) if selected_rows else None
+
+# Reset delete confirmation if run selection changes
+if selected_run_id != st.session_state.get("selected_run_id"):
     st.session_state["show_delete_option"] = False
-    st.session_state["last_selected_strategy"] = selected_strategy
+    st.session_state["selected_run_id"] = selected_run_id
+
+if selected_run_id is None:
+    st.info("Select a run in the table to see its details.")
+    st.stop()
+
+selected_name = runs_df.loc[selected_run_id, "strategy_name"]
+
+# --- Detail view: metrics first, heavy payloads only on demand ---
+params, metrics, ohlcv_path = load_run_metrics(selected_run_id)
+if params is None:
+    st.error("Failed to load run. It may have been removed by compaction.")
+    st.stop()
+
+st.markdown(f"## 📌 Run #{selected_run_id}: **{selected_name}**")
+
+st.subheader("📈 Backtest Results")
+st.json(metrics, expanded=False)
+
+st.subheader("📊 Strategy Parameters")
+st.json(params, expanded=False)
+
+st.write(f"**📁 Data Path:** `{ohlcv_path}`")
+
+display_timings(load_run_timings(selected_run_id))
+
+if st.toggle("📉 Show equity curve & trades", key=f"curves_{selected_run_id}"):
+    curves = load_run_curves(selected_run_id)
+    equity = curves.get("_equity_curve")
+    if equity:
+        equity_df = pd.DataFrame(equity)
+        if "Equity" in equity_df.columns:
+            equity_df["Equity"] = pd.to_numeric(equity_df["Equity"], errors="coerce")
+            st.line_chart(equity_df["Equity"])
+    trades = curves.get("_trades")
+    if trades:
+        st.dataframe(pd.DataFrame(trades))
+    if not equity and not trades:
+        st.warning("No curves stored for this run.")
+
+if st.toggle("🗂 Show OHLCV data", key=f"data_{selected_run_id}"):
+    try:
+        df = pd.read_csv(ohlcv_path, index_col=0, parse_dates=True)
+        st.write(f"{len(df)} rows")
+        st.dataframe(df)
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
 
 # Buttons in columns
 col1, col2 = st.columns([1, 1])
 
-# Load Strategy
 with col1:
-    if selected_strategy != "Select a strategy...":
-        if st.button("📤 Load Strategy"):
-            try:
-                params, ohlcv_path, df, results = load_strategy(selected_strategy)
-
-                if params and df is not None and results:
-                    st.session_state["loaded_strategy"] = selected_strategy
-                    st.session_state["loaded_params"] = params
-                    st.session_state["ohlcv_path"] = ohlcv_path
-                    st.session_state["loaded_df"] = df
-                    st.session_state["loaded_results"] = results
-                    st.session_state["show_delete_option"] = False
-                else:
-                    st.error("Failed to load strategy. Missing data.")
-            except Exception as e:
-                st.error(f"Error loading strategy: {e}")
+    if st.button("🗑 Delete Run"):
+        st.session_state["show_delete_option"] = "run"
 
-# Delete Strategy
 with col2:
-    if selected_strategy != "Select a strategy...":
-        if st.button("🗑 Delete Strategy"):
-            st.session_state["show_delete_option"] = True
+    if st.button("🗑 Delete Strategy (all runs)"):
+        st.session_state["show_delete_option"] = "strategy"
 
 # Confirm Deletion
 if st.session_state.get("show_delete_option"):
+    delete_all = st.session_state["show_delete_option"] == "strategy"
+    target = (
+        f"all runs of '{selected_name}'" if delete_all else f"run #{selected_run_id}"
+    )
     with st.form("delete_confirmation_form"):
-        confirm_delete = st.checkbox(f"✅ Confirm deletion of '{selected_strategy}'")
+        confirm_delete = st.checkbox(f"✅ Confirm deletion of {target}")
         delete_submit = st.form_submit_button("❌ Confirm Delete")
 
         if confirm_delete and delete_submit:
             try:
-                delete_strategy(selected_strategy)
-                st.success(f"✅ '{selected_strategy}' has been deleted!")
+                if delete_all:
+                    delete_strategy(selected_name)
+                else:
+                    delete_run(selected_run_id)
+                st.success(f"✅ Deleted {target}!")
                 time.sleep(2)
                 # Reset state
-                for key in [
-                    "loaded_strategy",
-                    "loaded_params",
-                    "loaded_df",
-                    "loaded_results",
-                    "ohlcv_path",
-                ]:
-                    st.session_state[key] = None
+                st.session_state["selected_run_id"] = None
                 st.session_state["show_delete_option"] = False
                 st.rerun()
             except Exception as e:
-                st.error(f"Failed to delete strategy: {e}")
-
-# Show loaded strategy details
-if st.session_state.get("loaded_strategy"):
-    st.markdown(f"## 📌 Loaded Strategy: **{st.session_state['loaded_strategy']}**")
-
-    st.subheader("📊 Strategy Parameters")
-    st.json(st.session_state.get("loaded_params"))
-
-    st.write(f"**📁 Data Path:** `{st.session_state.get('ohlcv_path')}`")
-
-    st.subheader("📈 Backtest Results")
-    st.json(st.session_state.get("loaded_results"))
-
-    st.subheader("📉 OHLCV Data Preview")
-    if st.session_state.get("loaded_df") is not None:
-        st.dataframe(st.session_state["loaded_df"])
-    else:
-        st.warning("No data loaded.")
+                st.error(f"Failed to delete: {e}")
@@ -0,0 +1,702 @@
+# paper_trading.py
+# Paper trading: the registered strategies run forward on live candles.
+#
+# A feed yields closed candles: PollingFeed polls a Coinbase-style REST API
+# (`/time` and `/products/{id}/candles`, as coinbase_data fetches them), either
+# Coinbase itself or the local replay server below, which serves an
+# ohlcv_data/ CSV one candle at a time on a simulated clock.
+#
+# Each LiveStrategy keeps its indicators in streaming_indicators objects and
+# calls the strategy class's own entry_long()/exit_long()/... methods on a
+# stand-in for `self` that holds the last values of each series, so the rules
+# are the ones backtests use. Orders fill like in the backtest engine: decided
+# on a bar's close, filled at the next bar's open, brackets live from the entry
+# bar (stop-loss first). Fills go to the paper_fills table of strategy_storage.
+# The time from receiving a bar to each strategy's decision is recorded.
+#
+# Usage (from the project root):
+#   python paper_trading.py replay --csv "ohlcv_data/coinbase_1h_RevBB&RSI_btc.csv"
+#       --product BTC-USD --speed 20 --start-bar 300
+#   python paper_trading.py run --product BTC-USD --granularity 3600
+#       --url http://127.0.0.1:8081 --warmup 300 --session demo
+
+import argparse
+import asyncio
+import time
+from array import array
+from collections import deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import aiohttp
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+import bracket_orders
+import coinbase_data
+import streaming_indicators
+import strategy_storage
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Values of each series kept for the rules: [-1], and [-2] for crossover()
+HISTORY = 2
+CANDLES_PER_REQUEST = 300  # Coinbase's limit per candles request
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+EPOCH = pd.Timestamp("1970-01-01", tz="UTC")
+
+
+class Bar:
+    """One closed candle; `received` is the perf_counter() at arrival."""
+
+    __slots__ = ("time", "open", "high", "low", "close", "volume", "received")
+
+    def __init__(self, time_, open_, high, low, close, volume, received=None):
+        self.time = time_
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.received = received
+
+    @classmethod
+    def from_coinbase(cls, candle, received=None):
+        """From Coinbase's [time, low, high, open, close, volume]."""
+        time_, low, high, open_, close, volume = candle
+        return cls(
+            pd.Timestamp(int(time_), unit="s", tz="UTC"),
+            float(open_),
+            float(high),
+            float(low),
+            float(close),
+            float(volume),
+            received,
+        )
+
+
+# === Live indicators ===
+# Per strategy class: set the attributes its init() sets (same parameters and
+# defaults) on the context, and return step(bar) -> {series name: value} that
+# updates the streaming indicators with one bar.
+
+
+def _bollinger_rsi_reversal(ctx, indicators):
+    ctx.bb_length = indicators.get("bb_length", 20)
+    ctx.bb_std = indicators.get("bb_std", 2)
+    ctx.rsi_length = indicators.get("rsi_length", 14)
+    ctx.rsi_overbought = indicators.get("rsi_overbought", 75)
+    ctx.rsi_oversold = indicators.get("rsi_oversold", 25)
+    bands = streaming_indicators.BollingerBands(ctx.bb_length, ctx.bb_std)
+    rsi = streaming_indicators.RSI(ctx.rsi_length)
+
+    def step(bar):
+        lower, _, upper = bands.update(bar.close)
+        return {"bb_lower": lower, "bb_upper": upper, "rsi": rsi.update(bar.close)}
+
+    return step
+
+
+def _rsi_breakout_momentum(ctx, indicators):
+    ctx.bb_length = indicators.get("bb_length", 20)
+    ctx.bb_std = indicators.get("bb_std", 2)
+    ctx.rsi_length = indicators.get("rsi_length", 14)
+    ctx.rsi_overbought = indicators.get("rsi_overbought", 75)
+    ctx.rsi_oversold = indicators.get("rsi_oversold", 25)
+    ctx.adx_length = indicators.get("adx_length", 14)
+    ctx.adx_threshold = indicators.get("adx_threshold", 30)
+    ctx.take_profit_pct = indicators.get("take_profit_pct", 5) / 100
+    ctx.stop_loss_pct = indicators.get("stop_loss_pct", 5) / 100
+    bands = streaming_indicators.BollingerBands(ctx.bb_length, ctx.bb_std)
+    rsi = streaming_indicators.RSI(ctx.rsi_length)
+    adx = streaming_indicators.ADX(ctx.adx_length)
+
+    def step(bar):
+        _, _, upper = bands.update(bar.close)
+        return {
+            "bb_upper": upper,
+            "rsi": rsi.update(bar.close),
+            "adx": adx.update(bar.high, bar.low, bar.close),
+        }
+
+    return step
+
+
+def _macd_bollinger_momentum(ctx, indicators):
+    macd_fast = indicators.get("macd_fast", 12)
+    macd_slow = indicators.get("macd_slow", 26)
+    ctx.take_profit_pct = indicators.get("take_profit_pct", 5) / 100
+    ctx.stop_loss_pct = indicators.get("stop_loss_pct", 5) / 100
+    # The class passes (macd_fast, macd_slow, macd_signal) into ta.trend.macd's
+    # (window_slow, window_fast, fillna) slots: its line is EMA(slow) -
+    # EMA(fast), defined from the first bar
+    slow = streaming_indicators.EMA(macd_slow, min_periods=1)
+    fast = streaming_indicators.EMA(macd_fast, min_periods=1)
+    bands = streaming_indicators.BollingerBands(
+        indicators.get("bb_length", 20), indicators.get("bb_std", 2)
+    )
+
+    def step(bar):
+        bands.update(bar.close)
+        return {
+            "macd": slow.update(bar.close) - fast.update(bar.close),
+            "bb_width": bands.width,
+        }
+
+    return step
+
+
+def _moving_average_trend(ctx, indicators):
+    ma_length = indicators.get("ma_length", 200)
+    if indicators.get("ma_timeframe_hours", 0):
+        raise ValueError("Paper trading does not support ma_timeframe_hours yet")
+    ctx.rsi_threshold = indicators.get("rsi_threshold", 50)
+    ctx.take_profit_pct = indicators.get("take_profit_pct", 5) / 100
+    ctx.stop_loss_pct = indicators.get("stop_loss_pct", 5) / 100
+    sma = streaming_indicators.SMA(ma_length)
+    rsi = streaming_indicators.RSI(indicators.get("rsi_length", 14))
+
+    def step(bar):
+        return {"sma_200": sma.update(bar.close), "rsi": rsi.update(bar.close)}
+
+    return step
+
+
+# Strategy class name -> live indicators
+LIVE_INDICATORS = {
+    "BollingerRSIReversal": _bollinger_rsi_reversal,
+    "RSIBreakoutMomentum": _rsi_breakout_momentum,
+    "MACDBollingerMomentum": _macd_bollinger_momentum,
+    "MovingAverageTrend": _moving_average_trend,
+}
+
+
+class _RuleContext:
+    """
+    Stands in for a strategy instance when its entry/exit methods run: the
+    config, the attributes set by init(), and deques of the last HISTORY
+    values of every data column and indicator (so `x[-1]`, `x[-2]` and
+    backtesting.lib.crossover work as on the engine's arrays).
+    """
+
+    def __init__(self, config):
+        self.params = config
+        self.trade_mode = config.get("trade_mode", "both").lower()
+        self.take_profit_pct = None
+        self.stop_loss_pct = None
+        self.data = SimpleNamespace(
+            **{column: deque(maxlen=HISTORY) for column in COLUMNS}
+        )
+
+    def append(self, bar, values):
+        data = self.data
+        data.Open.append(bar.open)
+        data.High.append(bar.high)
+        data.Low.append(bar.low)
+        data.Close.append(bar.close)
+        data.Volume.append(bar.volume)
+        for name, value in values.items():
+            series = self.__dict__.get(name)
+            if series is None:
+                series = self.__dict__[name] = deque(maxlen=HISTORY)
+            series.append(value)
+
+
+def live_indicators(strategy_class):
+    """Live indicator builder for a strategy class (or a subclass), or None."""
+    for cls in strategy_class.__mro__:
+        if cls.__name__ in LIVE_INDICATORS:
+            return LIVE_INDICATORS[cls.__name__]
+    return None
+
+
+class LiveStrategy:
+    """
+    One registered strategy traded on paper, bar by bar, with the backtest
+    engine's fills: whole lots of `lot_size`, sized on the fill bar's open,
+    commission charged on entry and on exit.
+    """
+
+    def __init__(self, strategy_name, config, symbol=None):
+        from backtest import get_strategy_classes
+
+        strategy_class = get_strategy_classes()[strategy_name]
+        builder = live_indicators(strategy_class)
+        if builder is None:
+            raise ValueError(f"{strategy_name} has no live indicators")
+        self.name = strategy_name
+        self.symbol = symbol
+        self.rules = strategy_class  # its methods are called with the context
+        self.context = _RuleContext(config)
+        self._step = builder(self.context, config.get("indicators", {}))
+        self.cash = float(config.get("initial_cash", 10000))
+        self.commission = config.get("commission", 0.001)
+        self.lot_size = config.get("lot_size") or 1
+        self.position = None  # {"size", "entry_price", "entry_time", "sl", "tp"}
+        self.pending = None  # ("close",) or ("entry", is_long, sl, tp)
+        self.latencies = array("d")  # seconds from bar arrival to decision
+        self._undefined = None  # series that have only been NaN so far
+
+    def _update(self, bar):
+        values = self._step(bar)
+        self.context.append(bar, values)
+        if self._undefined is None:
+            self._undefined = set(values)
+        self._undefined.difference_update(
+            name for name, value in values.items() if value == value
+        )
+
+    def warm_up(self, bar):
+        """Feed a historical bar to the indicators only."""
+        self._update(bar)
+
+    def on_bar(self, bar):
+        """Fill pending orders on `bar`, then decide on its close; the fills."""
+        # Like the engine, next() only runs once every indicator was defined
+        # on an earlier bar
+        ready = self._undefined is not None and not self._undefined
+        fills = self._fill_orders(bar)
+        self._update(bar)
+        if ready:
+            self._decide(bar)
+        if bar.received is not None:
+            latency = time.perf_counter() - bar.received
+            self.latencies.append(latency)
+            for fill in fills:
+                fill["latency_ms"] = latency * 1000
+        return fills
+
+    def equity(self, price):
+        if self.position is None:
+            return self.cash
+        position = self.position
+        return self.cash + position["size"] * (price - position["entry_price"])
+
+    def _decide(self, bar):
+        # BaseStrategy.next() on the context
+        rules, ctx = self.rules, self.context
+        try:
+            if self.position is not None:
+                is_long = self.position["size"] > 0
+                if rules.exit_long(ctx) if is_long else rules.exit_short(ctx):
+                    self.pending = ("close",)
+            if self.position is None:
+                for is_long, can_trade, entry in (
+                    (True, rules.can_trade_long, rules.entry_long),
+                    (False, rules.can_trade_short, rules.entry_short),
+                ):
+                    if can_trade(ctx) and entry(ctx):
+                        sl, tp = bracket_orders.bracket_prices(
+                            bar.close, is_long, ctx.take_profit_pct, ctx.stop_loss_pct
+                        )
+                        self.pending = ("entry", is_long, sl, tp)
+                        break
+        except Exception as e:
+            logger.exception(
+                f"[{self.name}] Error deciding on {bar.time}: {e}",
+                extra={"sample_every": 100},
+            )
+
+    def _fill_orders(self, bar):
+        fills = []
+        pending, self.pending = self.pending, None
+        if pending is not None and pending[0] == "close":
+            # A close order comes before the brackets, at the open
+            fills.append(self._close(bar, bar.open, "exit"))
+        elif pending is not None:
+            fill = self._open(bar, *pending[1:])
+            if fill is not None:
+                fills.append(fill)
+        if self.position is not None:
+            position = self.position
+            _, price, kind = bracket_orders.first_exit_bar(
+                (bar.open,),
+                (bar.high,),
+                (bar.low,),
+                0,
+                position["size"] > 0,
+                position["sl"],
+                position["tp"],
+            )
+            if kind is not None:
+                fills.append(self._close(bar, price, kind))
+        return fills
+
+    def _open(self, bar, is_long, sl, tp):
+        price = bar.open
+        fraction = self.rules.calculate_trade_size(self.context)
+        cost = price + fraction * price * self.commission
+        lot_cash = self.cash / self.lot_size
+        lots = int(lot_cash * fraction // cost) if fraction < 1 else 1
+        if lots == 0 or lots * cost > lot_cash:
+            logger.warning(f"[{self.name}] Not enough cash for an entry at {bar.time}")
+            return None
+        quantity = lots * self.lot_size
+        commission = quantity * price * self.commission
+        self.cash -= commission
+        self.position = {
+            "size": quantity if is_long else -quantity,
+            "entry_price": price,
+            "entry_time": bar.time,
+            "sl": sl,
+            "tp": tp,
+        }
+        side = "buy" if is_long else "sell"
+        return self._fill(bar, side, "entry", price, quantity, commission)
+
+    def _close(self, bar, price, reason):
+        position, self.position = self.position, None
+        size = position["size"]
+        pnl = size * (price - position["entry_price"])
+        commission = abs(size) * price * self.commission
+        self.cash += pnl - commission
+        side = "sell" if size > 0 else "buy"
+        fill = self._fill(bar, side, reason, price, abs(size), commission)
+        fill["pnl"] = pnl
+        fill["entry_time"] = position["entry_time"]
+        fill["entry_price"] = position["entry_price"]
+        fill["sl"] = position["sl"]
+        fill["tp"] = position["tp"]
+        return fill
+
+    def _fill(self, bar, side, reason, price, quantity, commission):
+        return {
+            "strategy_name": self.name,
+            "symbol": self.symbol,
+            "bar_time": bar.time,
+            "side": side,
+            "reason": reason,
+            "price": price,
+            "quantity": quantity,
+            "commission": commission,
+            "pnl": None,
+            "cash": self.cash,
+            "latency_ms": None,
+        }
+
+    def latency_stats(self):
+        """Bar-to-decision latency in ms: bars, p50, p95, p99, max."""
+        if not self.latencies:
+            return {"bars": 0}
+        ms = np.frombuffer(self.latencies, dtype=float) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {"bars": len(ms), "p50": p50, "p95": p95, "p99": p99, "max": ms.max()}
+
+
+class PaperTrader:
+    """Runs several LiveStrategy objects on one feed and stores their fills."""
+
+    def __init__(self, strategies, session=None, store=True):
+        self.strategies = strategies
+        self.session = session or f"paper {datetime.now():%Y-%m-%d %H:%M:%S}"
+        self.store = store
+        self.fills = []
+        self.bars = 0
+
+    def warm_up(self, bars):
+        for bar in bars:
+            for strategy in self.strategies:
+                strategy.warm_up(bar)
+        logger.info(f"Warmed up on {len(bars)} bars")
+
+    def on_bar(self, bar):
+        """Run every strategy on `bar`; returns the fills."""
+        fills = []
+        for strategy in self.strategies:
+            fills.extend(strategy.on_bar(bar))
+        self.bars += 1
+        self.fills.extend(fills)
+        return fills
+
+    async def run(self, feed, warmup_bars=0, max_bars=None, report_every=100):
+        """Trade on the feed's new bars until `max_bars` (or forever)."""
+        loop = asyncio.get_running_loop()
+        if warmup_bars:
+            self.warm_up(await feed.history(warmup_bars))
+        async for bar in feed.bars():
+            fills = self.on_bar(bar)
+            for fill in fills:
+                logger.info(
+                    f"[{fill['strategy_name']}] {fill['reason']} {fill['side']} "
+                    f"{fill['quantity']} @ {fill['price']:.6g} on {bar.time}"
+                )
+            if fills and self.store:
+                # Off the event loop, after the decisions were timed
+                await loop.run_in_executor(
+                    None, strategy_storage.save_paper_fills, self.session, fills
+                )
+            if report_every and self.bars % report_every == 0:
+                self.log_latency()
+            if max_bars is not None and self.bars >= max_bars:
+                break
+        self.log_latency()
+
+    def latency_report(self):
+        """Bar-to-decision latency (ms) per strategy."""
+        return pd.DataFrame(
+            {s.name: s.latency_stats() for s in self.strategies}
+        ).T.round(3)
+
+    def log_latency(self):
+        for strategy in self.strategies:
+            stats = strategy.latency_stats()
+            if stats["bars"]:
+                logger.info(
+                    f"[{strategy.name}] {stats['bars']} bars, bar-to-decision "
+                    f"p50 {stats['p50']:.3f} ms, p95 {stats['p95']:.3f} ms, "
+                    f"max {stats['max']:.3f} ms"
+                )
+
+
+# === Feeds ===
+
+
+class PollingFeed:
+    """
+    Closed candles from a Coinbase-style REST API, polled every
+    `poll_seconds`. The server's /time decides which candles are closed, so
+    the same feed works against the replay server's simulated clock.
+    """
+
+    def __init__(
+        self, product_id, granularity, base_url=coinbase_data.BASE_URL, poll_seconds=5
+    ):
+        self.product_id = product_id
+        self.granularity = int(granularity)
+        self.base_url = base_url.rstrip("/")
+        self.poll_seconds = poll_seconds
+        self.last_time = None  # epoch seconds of the last candle yielded
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def server_time(self):
+        async with self._session.get(
+            f"{self.base_url}/time", headers=coinbase_data.HEADERS
+        ) as response:
+            response.raise_for_status()
+            return float((await response.json())["epoch"])
+
+    async def _closed_candles(self, start, now):
+        """Raw candles opened at or after `start` and closed by `now`, oldest first."""
+        candles = []
+        last = now - self.granularity  # latest opening time of a closed candle
+        while start <= last:
+            # `end` is inclusive: at most CANDLES_PER_REQUEST opening times
+            end = min(start + (CANDLES_PER_REQUEST - 1) * self.granularity, last)
+            batch = await coinbase_data.fetch_ohlcv(
+                self._session,
+                self.product_id,
+                self.granularity,
+                datetime.fromtimestamp(start, timezone.utc),
+                datetime.fromtimestamp(end, timezone.utc),
+                base_url=self.base_url,
+            )
+            candles.extend(c for c in batch or [] if start <= c[0] <= end)
+            start = end + self.granularity
+        # Coinbase returns newest first, and windows may overlap by a candle
+        return sorted({c[0]: c for c in candles}.values(), key=lambda c: c[0])
+
+    async def history(self, n_bars):
+        """The last `n_bars` closed candles, for warming up indicators."""
+        now = await self.server_time()
+        start = (now // self.granularity - n_bars) * self.granularity
+        candles = (await self._closed_candles(start, now))[-n_bars:]
+        if candles:
+            self.last_time = candles[-1][0]
+        return [Bar.from_coinbase(c) for c in candles]
+
+    async def bars(self):
+        """New closed candles as they appear (async iterator)."""
+        while True:
+            now = await self.server_time()
+            start = (
+                self.last_time + self.granularity
+                if self.last_time is not None
+                else (now // self.granularity - 1) * self.granularity
+            )
+            for candle in await self._closed_candles(start, now):
+                received = time.perf_counter()
+                self.last_time = candle[0]
+                yield Bar.from_coinbase(candle, received)
+            await asyncio.sleep(self.poll_seconds)
+
+
+# === Replay server ===
+# A local stand-in for the exchange: serves /time and
+# /products/{id}/candles like Coinbase, from OHLCV frames, with a clock that
+# starts at bar `start_bar` on the first request and advances `speed` bars
+# per second.
+
+REPLAY_KEY = web.AppKey("replay", dict)
+
+
+def _epochs(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return ((index - EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def load_replay_csv(path):
+    return pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+
+
+def _replay_now(replay):
+    if replay["started"] is None:  # the clock starts with the first request
+        replay["started"] = time.monotonic()
+    elapsed = time.monotonic() - replay["started"]
+    now = replay["start"] + elapsed * replay["speed"] * replay["granularity"]
+    return min(now, replay["end"])
+
+
+async def replay_time(request):
+    now = _replay_now(request.app[REPLAY_KEY])
+    iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    return web.json_response({"iso": iso, "epoch": now})
+
+
+async def replay_candles(request):
+    replay = request.app[REPLAY_KEY]
+    product = replay["products"].get(request.match_info["product_id"])
+    if product is None:
+        return web.json_response({"message": "NotFound"}, status=404)
+    try:
+        granularity = int(request.query.get("granularity", replay["granularity"]))
+        start = pd.Timestamp(request.query["start"]).timestamp()
+        end = pd.Timestamp(request.query["end"]).timestamp()
+    except (KeyError, ValueError):
+        return web.json_response({"message": "Invalid start/end"}, status=400)
+    if granularity != replay["granularity"]:
+        return web.json_response({"message": "Unsupported granularity"}, status=400)
+
+    times, rows = product
+    closed_by = _replay_now(replay) - granularity
+    lo = np.searchsorted(times, start, side="left")
+    hi = np.searchsorted(times, min(end, closed_by), side="right")
+    lo = max(lo, hi - CANDLES_PER_REQUEST)
+    # Newest first, [time, low, high, open, close, volume], as Coinbase sends
+    return web.json_response(rows[lo:hi][::-1])
+
+
+def create_replay_app(datasets, speed=10.0, start_bar=0):
+    """
+    Replay server app for {product_id: OHLCV frame}; all frames must share
+    one bar size.
+    """
+    from multi_timeframe import bar_duration
+
+    products, granularities, firsts, lasts = {}, set(), [], []
+    for product_id, df in datasets.items():
+        times = _epochs(df.index)
+        rows = [
+            [int(t), low, high, open_, close, volume]
+            for t, open_, high, low, close, volume in zip(
+                times, *(df[c].to_numpy(dtype=float) for c in COLUMNS)
+            )
+        ]
+        products[product_id] = (times, rows)
+        granularities.add(int(bar_duration(df.index).total_seconds()))
+        firsts.append(times[0])
+        lasts.append(times[-1])
+    if len(granularities) != 1:
+        raise ValueError(f"Datasets have different bar sizes: {granularities}")
+    granularity = granularities.pop()
+
+    app = web.Application()
+    app[REPLAY_KEY] = {
+        "products": products,
+        "granularity": granularity,
+        "speed": speed,
+        "start": float(min(firsts) + start_bar * granularity),
+        "end": float(max(lasts) + granularity),
+        "started": None,
+    }
+    app.add_routes(
+        [
+            web.get("/time", replay_time),
+            web.get("/products/{product_id}/candles", replay_candles),
+        ]
+    )
+    logger.info(
+        f"Replaying {list(products)} ({granularity}s bars) from bar {start_bar} "
+        f"at {speed} bars/s"
+    )
+    return app
+
+
+def default_config(strategy_name, initial_cash=10000, commission=0.001):
+    """A run config with the strategy's str_params.json indicators."""
+    from optimizer import default_params
+
+    return {
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "position_size": 50,
+        "trade_mode": "both",
+        "indicators": default_params(strategy_name),
+    }
+
+
+async def _run(args):
+    from backtest import get_strategy_classes
+
+    names = args.strategies or [
+        name
+        for name, cls in get_strategy_classes().items()
+        if live_indicators(cls) is not None
+    ]
+    strategies = [
+        LiveStrategy(name, default_config(name, args.cash), args.product)
+        for name in names
+    ]
+    trader = PaperTrader(strategies, session=args.session)
+    async with PollingFeed(
+        args.product, args.granularity, args.url, args.poll
+    ) as feed:
+        await trader.run(feed, args.warmup, args.max_bars)
+    print(trader.latency_report().to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paper trading.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay = commands.add_parser("replay", help="serve a CSV as a live feed")
+    replay.add_argument("--csv", required=True)
+    replay.add_argument("--product", default="BTC-USD")
+    replay.add_argument("--speed", type=float, default=10.0, help="bars per second")
+    replay.add_argument("--start-bar", type=int, default=0)
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=8081)
+
+    run = commands.add_parser("run", help="paper-trade strategies on a feed")
+    run.add_argument("--strategies", nargs="*")
+    run.add_argument("--product", default="BTC-USD")
+    run.add_argument("--granularity", type=int, default=3600)
+    run.add_argument("--url", default=coinbase_data.BASE_URL)
+    run.add_argument("--poll", type=float, default=5.0, help="seconds between polls")
+    run.add_argument("--warmup", type=int, default=300)
+    run.add_argument("--max-bars", type=int)
+    run.add_argument("--cash", type=float, default=10000)
+    run.add_argument("--session")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        app = create_replay_app(
+            {args.product: load_replay_csv(args.csv)}, args.speed, args.start_bar
+        )
+        web.run_app(app, host=args.host, port=args.port)
+    else:
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
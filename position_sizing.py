@@ -0,0 +1,90 @@
+# position_sizing.py
+# Fractional position sizes without rescaling the price data.
+#
+# backtesting.py only trades whole units, so a $10,000 account cannot buy a
+# $60,000 coin. Instead of dividing every price by a factor (a full copy of
+# the frame, and prices the indicators never see in reality), a run trades
+# whole *lots*: the engine gets the cash expressed in lots (cash / lot_size),
+# buys whole lots at the real prices, and the $ figures are converted back
+# with to_units() afterwards. Returns, drawdowns and ratios are unaffected.
+
+import json
+import math
+from functools import lru_cache
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+PRECISIONS_PATH = "binance_precisions.json"
+# Without an exchange lot size, pick one that buys at least this many lots
+MIN_LOTS = 1000
+
+
+@lru_cache(maxsize=None)
+def load_precisions(path=PRECISIONS_PATH):
+    """Binance price/amount precisions per trading pair (read once)."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"{path} not found; lot sizes fall back to the default")
+        return {}
+
+
+def binance_symbol(symbol):
+    """Map 'BTC-USD', 'BTC/USDT' or 'btcusdt' to Binance's 'BTCUSDT'."""
+    pair = str(symbol).replace("-", "").replace("/", "").upper()
+    if pair.endswith("USD"):
+        pair += "T"
+    return pair
+
+
+def amount_precision(symbol, path=PRECISIONS_PATH):
+    """Smallest tradable amount of `symbol` on Binance, or None if unknown."""
+    if not symbol:
+        return None
+    precision = load_precisions(path).get(binance_symbol(symbol), {})
+    return precision.get("amount_precision")
+
+
+def default_lot_size(initial_cash, max_price, min_lots=MIN_LOTS):
+    """
+    Largest power-of-ten lot (at most 1 unit) of which `initial_cash` buys
+    at least `min_lots` at `max_price`.
+    """
+    if not initial_cash or not max_price or max_price <= 0:
+        return 1.0
+    exponent = math.floor(math.log10(initial_cash / (max_price * min_lots)))
+    return float(10 ** min(exponent, 0))
+
+
+def lot_size(symbol, initial_cash, max_price):
+    """The exchange's amount precision for `symbol`, else default_lot_size()."""
+    lot = amount_precision(symbol)
+    if lot:
+        return float(lot)
+    return default_lot_size(initial_cash, max_price)
+
+
+def to_units(stats, lot):
+    """
+    Convert the stats of a run traded in lots of `lot` units back to units
+    and dollars: trade sizes, PnL, commissions, the equity curve and the $
+    statistics. Percentages and ratios need no change. Modifies `stats`.
+    """
+    if lot == 1:
+        return stats
+
+    for key in stats.index:
+        if key.endswith("[$]"):
+            stats[key] = stats[key] * lot
+
+    trades = stats["_trades"]
+    for column in ("Size", "PnL", "Commission"):
+        if column in trades.columns:
+            trades[column] = trades[column] * lot
+
+    equity_curve = stats["_equity_curve"]
+    equity_curve["Equity"] = equity_curve["Equity"] * lot
+    return stats
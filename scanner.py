@@ -0,0 +1,382 @@
+# scanner.py
+# Universe scanner: which symbols meet a strategy's entry condition on their
+# latest bar, without running a backtest per symbol.
+#
+# The last N bars of every symbol are read from the end of its cached CSV
+# (UNIVERSE_DIR/<SYMBOL>_<timeframe>.csv, e.g. ohlcv_data/universe/BTCUSDT_1h.csv)
+# and stacked into 2D arrays, one row per symbol (symbols with a shorter
+# history in arrays of their own, never padded). The indicators each strategy
+# needs are computed on those tails with indicators.py for the whole universe
+# at once, and the strategies' entry rules are evaluated on the last bar.
+# N only has to cover the indicators' warm-up: 500 bars leave RSI/EMA values
+# that match a full-history run.
+#
+# Usage (from the project root):
+#   python scanner.py --timeframe 1h --strategies "Strategy 1" "Strategy 4"
+
+import argparse
+import functools
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import ta
+
+import indicators
+import multi_timeframe
+import strategy_dsl
+from data_cache import get_cache, make_key
+from logger import get_logger
+from position_sizing import load_precisions
+
+logger = get_logger(__name__)
+
+UNIVERSE_DIR = os.environ.get(
+    "SCANNER_DATA_DIR", os.path.join("ohlcv_data", "universe")
+)
+DEFAULT_BARS = 500
+TAIL_BLOCK_BYTES = 64 * 1024
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+SIGNAL_COLUMNS = ["symbol", "strategy", "side", "time", "close", "strength"]
+
+
+def read_csv_tail(path, n_bars):
+    """
+    The last `n_bars` rows of an OHLCV CSV (time in the first column), read
+    block by block from the end of the file instead of parsing all of it.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        position = f.seek(0, os.SEEK_END)
+        blocks, newlines = [], 0
+        # One extra line for a partial first line, one for a trailing newline
+        while position > body_start and newlines < n_bars + 2:
+            size = min(TAIL_BLOCK_BYTES, position - body_start)
+            position = f.seek(position - size)
+            blocks.append(f.read(size))
+            newlines += blocks[-1].count(b"\n")
+    lines = b"".join(reversed(blocks)).splitlines()
+    if position > body_start:
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()][-n_bars:]
+    return pd.read_csv(
+        io.BytesIO(header + b"\n".join(lines)), index_col=0, parse_dates=True
+    )
+
+
+def universe_path(symbol, timeframe, data_dir=UNIVERSE_DIR):
+    return os.path.join(data_dir, f"{symbol}_{timeframe}.csv")
+
+
+def load_tail(symbol, timeframe, n_bars, data_dir=UNIVERSE_DIR):
+    """Last `n_bars` of a symbol's cached CSV (None if there is none), cached."""
+    path = universe_path(symbol, timeframe, data_dir)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    key = make_key("scanner_tail", path, timeframe, (mtime, n_bars))
+    return get_cache().get_or_load(key, lambda: read_csv_tail(path, n_bars))
+
+
+def universe_symbols(timeframe, data_dir=UNIVERSE_DIR):
+    """Symbols of binance_precisions.json that have cached `timeframe` data."""
+    return [
+        symbol
+        for symbol in load_precisions()
+        if os.path.isfile(universe_path(symbol, timeframe, data_dir))
+    ]
+
+
+class Universe:
+    """
+    The tails of several symbols as 2D arrays (one row per symbol), all of the
+    same length and ending on each symbol's last bar.
+    """
+
+    def __init__(self, frames):
+        self.symbols = list(frames)
+        self.frames = frames
+        lengths = {len(df) for df in frames.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Tails of different lengths: {sorted(lengths)}")
+        n_bars = lengths.pop()
+        self.arrays = {}
+        for column in COLUMNS:
+            values = np.full((len(frames), n_bars), np.nan)
+            for row, df in enumerate(frames.values()):
+                if column in df.columns:
+                    values[row] = df[column].to_numpy(float)
+            self.arrays[column] = values
+        self.times = [df.index[-1] for df in frames.values()]
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+def load_universe(symbols, timeframe, n_bars=DEFAULT_BARS, loader=None):
+    """
+    Universes of the symbols that have data, one per tail length: symbols
+    with less than `n_bars` of history get their own instead of being padded,
+    since the indicators would take padding for missing prices (RSI and ADX
+    values of the short rows would differ from ta's). `loader(symbol,
+    timeframe, n_bars)` returns a frame or None; by default the cached CSV
+    tails.
+    """
+    loader = loader or load_tail
+    by_length = {}
+    for symbol in symbols:
+        try:
+            df = loader(symbol, timeframe, n_bars)
+        except Exception as e:
+            logger.warning(f"Skipping {symbol}: could not load data ({e})")
+            continue
+        if df is not None and len(df):
+            df = df.iloc[-n_bars:]
+            by_length.setdefault(len(df), {})[symbol] = df
+    return [Universe(by_length[length]) for length in sorted(by_length, reverse=True)]
+
+
+# === Vectorized entry rules ===
+# Each takes a Universe and the strategy's indicator parameters and returns
+# {"long": bool array, "short": bool array, "strength": float array} for the
+# last bar. They mirror entry_long()/entry_short() of the class in
+# All_strategies.py; "strength" is how far past its threshold the signal is.
+
+
+def _last(values):
+    return np.asarray(values, dtype=float)[:, -1]
+
+
+def _bollinger_rsi_reversal(universe, params):
+    close = universe.arrays["Close"]
+    bb_length = params.get("bb_length", 20)
+    bb_std = params.get("bb_std", 2)
+    oversold = params.get("rsi_oversold", 25)
+    overbought = params.get("rsi_overbought", 75)
+    rsi = _last(indicators.rsi(close, params.get("rsi_length", 14)))
+    lower = _last(indicators.bollinger_lband(close, bb_length, bb_std))
+    upper = _last(indicators.bollinger_hband(close, bb_length, bb_std))
+    last = close[:, -1]
+    with np.errstate(invalid="ignore"):
+        long = (rsi < oversold) & (last < lower)
+        short = (rsi > overbought) & (last > upper)
+    return {
+        "long": long,
+        "short": short,
+        "strength": np.where(long, oversold - rsi, rsi - overbought),
+    }
+
+
+def _rsi_breakout_momentum(universe, params):
+    close = universe.arrays["Close"]
+    overbought = params.get("rsi_overbought", 75)
+    oversold = params.get("rsi_oversold", 25)
+    adx_length = params.get("adx_length", 14)
+    rsi = _last(indicators.rsi(close, params.get("rsi_length", 14)))
+    upper = _last(
+        indicators.bollinger_hband(
+            close, params.get("bb_length", 20), params.get("bb_std", 2)
+        )
+    )
+    adx = _last(
+        indicators.adx(
+            universe.arrays["High"], universe.arrays["Low"], close, adx_length
+        )
+    )
+    with np.errstate(invalid="ignore"):
+        long = (rsi > overbought) & (close[:, -1] > upper)
+        short = (rsi < oversold) & (adx > params.get("adx_threshold", 30))
+    return {
+        "long": long,
+        "short": short,
+        "strength": np.where(long, rsi - overbought, oversold - rsi),
+    }
+
+
+def _macd_bollinger_momentum(universe, params):
+    close = universe.arrays["Close"]
+    # The class passes (macd_fast, macd_slow) into ta.trend.macd's
+    # (window_slow, window_fast) slots, so its line is EMA(slow) - EMA(fast)
+    line = indicators.macd(
+        close, params.get("macd_fast", 12), params.get("macd_slow", 26)
+    )
+    width = _last(
+        indicators.bollinger_wband(
+            close, params.get("bb_length", 20), params.get("bb_std", 2)
+        )
+    )
+    previous, current = line[:, -2], line[:, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        long = (previous < 0) & (current > 0) & (width > 0)
+        short = (previous > 0) & (current < 0) & (width > 0)
+        strength = np.abs(current) / close[:, -1] * 100
+    return {"long": long, "short": short, "strength": strength}
+
+
+def _moving_average_trend(universe, params):
+    close = universe.arrays["Close"]
+    ma_length = params.get("ma_length", 200)
+    ma_timeframe_hours = params.get("ma_timeframe_hours", 0)
+    threshold = params.get("rsi_threshold", 50)
+    if ma_timeframe_hours:
+        # The higher-timeframe MA needs each symbol's own timestamps
+        sma = np.array(
+            [
+                multi_timeframe.htf_indicator(
+                    df, f"{ma_timeframe_hours}h", ta.trend.sma_indicator, ma_length
+                )[-1]
+                for df in universe.frames.values()
+            ],
+            dtype=float,
+        )
+    else:
+        sma = _last(indicators.sma(close, ma_length))
+    rsi = _last(indicators.rsi(close, params.get("rsi_length", 14)))
+    last = close[:, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        long = (rsi > threshold) & (last > sma)
+        short = (rsi < threshold) & (last < sma)
+        strength = np.abs(last / sma - 1) * 100
+    return {"long": long, "short": short, "strength": strength}
+
+
+# Strategy class name -> vectorized entry rules
+VECTORIZED = {
+    "BollingerRSIReversal": _bollinger_rsi_reversal,
+    "RSIBreakoutMomentum": _rsi_breakout_momentum,
+    "MACDBollingerMomentum": _macd_bollinger_momentum,
+    "MovingAverageTrend": _moving_average_trend,
+}
+
+
+def _declarative(spec):
+    """Entry rules of a strategy_specs.json strategy, via its compiled plan."""
+
+    def evaluate(universe, params):
+        plan = strategy_dsl.compile_spec(spec, params)
+        signals = plan.evaluate(universe.arrays)
+        empty = np.zeros(len(universe), dtype=bool)
+        return {
+            "long": signals["entry_long"][:, -1] if "entry_long" in signals else empty,
+            "short": (
+                signals["entry_short"][:, -1] if "entry_short" in signals else empty
+            ),
+            "strength": np.full(len(universe), np.nan),
+        }
+
+    return evaluate
+
+
+def entry_rules(strategy_name):
+    """Vectorized entry rules of a registered strategy, or None."""
+    from backtest import get_strategy_classes
+
+    strategy_class = get_strategy_classes()[strategy_name]
+    spec = getattr(strategy_class, "spec", None)
+    if spec:
+        return _declarative(spec)
+    for cls in strategy_class.__mro__:
+        if cls.__name__ in VECTORIZED:
+            return VECTORIZED[cls.__name__]
+    return None
+
+
+def scannable_strategies():
+    """Registered strategies the scanner can evaluate."""
+    from backtest import get_strategy_classes
+
+    return [name for name in get_strategy_classes() if entry_rules(name)]
+
+
+def scan(
+    strategies=None,
+    symbols=None,
+    timeframe="1h",
+    n_bars=DEFAULT_BARS,
+    params=None,
+    loader=None,
+    data_dir=UNIVERSE_DIR,
+):
+    """
+    Ranked table of the symbols whose latest bar meets an entry rule: one row
+    per symbol, strategy and side, strongest signals first. `params` maps a
+    strategy name to indicator values that override its defaults.
+    """
+    from optimizer import default_params
+
+    start = time.perf_counter()
+    strategies = strategies or scannable_strategies()
+    if symbols is None:
+        symbols = universe_symbols(timeframe, data_dir)
+    if loader is None:
+        loader = functools.partial(load_tail, data_dir=data_dir)
+    universes = load_universe(symbols, timeframe, n_bars, loader)
+    if not universes:
+        logger.warning(f"No {timeframe} data found for the scanned symbols")
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    loaded = time.perf_counter()
+
+    rows = []
+    for strategy_name in strategies:
+        rules = entry_rules(strategy_name)
+        if rules is None:
+            logger.warning(f"{strategy_name} has no vectorized entry rules; skipped")
+            continue
+        strategy_params = {
+            **default_params(strategy_name),
+            **(params or {}).get(strategy_name, {}),
+        }
+        for universe in universes:
+            signals = rules(universe, strategy_params)
+            closes = universe.arrays["Close"][:, -1]
+            for side in ("long", "short"):
+                for row in np.flatnonzero(signals[side]):
+                    rows.append(
+                        (
+                            universe.symbols[row],
+                            strategy_name,
+                            side,
+                            universe.times[row],
+                            closes[row],
+                            signals["strength"][row],
+                        )
+                    )
+
+    table = pd.DataFrame(rows, columns=SIGNAL_COLUMNS)
+    table = table.sort_values(
+        ["strength", "symbol"], ascending=[False, True], na_position="last"
+    ).reset_index(drop=True)
+    n_symbols = sum(len(universe) for universe in universes)
+    logger.info(
+        f"Scanned {n_symbols} symbols x {len(strategies)} strategies in "
+        f"{time.perf_counter() - start:.2f}s (loading {loaded - start:.2f}s): "
+        f"{len(table)} signals"
+    )
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan symbols for entry signals.")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--bars", type=int, default=DEFAULT_BARS)
+    parser.add_argument("--strategies", nargs="*")
+    parser.add_argument("--symbols", nargs="*")
+    parser.add_argument("--data-dir", default=UNIVERSE_DIR)
+    args = parser.parse_args()
+
+    table = scan(
+        args.strategies,
+        args.symbols,
+        args.timeframe,
+        args.bars,
+        data_dir=args.data_dir,
+    )
+    print(table.to_string(index=False) if len(table) else "No signals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# strategy_dsl.py
+# Declarative strategies: strategy_specs.json describes a strategy's parameters,
+# named series, entry/exit rules and TP/SL as plain expressions, e.g.
+#
+#   "entry_long": "rsi(close, rsi_length) < rsi_oversold and close < lower"
+#
+# An expression is compiled once per run (parameters are substituted first)
+# into a plan of unique steps: every subexpression that appears more than once,
+# in any rule, is computed only once. Running the plan evaluates every rule
+# over the whole history as NumPy arrays; the strategy's next() only looks up
+# the current bar.
+
+import ast
+import json
+import operator
+from pathlib import Path
+
+import numpy as np
+
+import indicators
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+SPECS_PATH = "strategy_specs.json"
+RULES = ("entry_long", "exit_long", "entry_short", "exit_short")
+COLUMNS = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+}
+
+
+def _crossover(a, b):
+    """True where `a` crosses above `b` (as backtesting.lib.crossover)."""
+    a, b = np.broadcast_arrays(
+        np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    )
+    crossed = np.zeros(a.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        crossed[..., 1:] = (a[..., :-1] < b[..., :-1]) & (a[..., 1:] > b[..., 1:])
+    return crossed
+
+
+def _crossunder(a, b):
+    return _crossover(b, a)
+
+
+def _shift(values, periods):
+    if periods < 1:
+        raise ValueError("shift() needs periods >= 1: it may only look back")
+    return indicators._shift(np.asarray(values, dtype=float), periods)
+
+
+# name: (function, argument kinds). "s" is a series (or a number), "n" a
+# window length and "x" a number; "n" and "x" must be parameters or literals.
+FUNCTIONS = {
+    "sma": (indicators.sma, "sn"),
+    "ema": (indicators.ema, "sn"),
+    "std": (indicators.rolling_std, "sn"),
+    "rsi": (indicators.rsi, "sn"),
+    "bb_middle": (indicators.bollinger_mavg, "sn"),
+    "bb_upper": (indicators.bollinger_hband, "snx"),
+    "bb_lower": (indicators.bollinger_lband, "snx"),
+    "bb_width": (indicators.bollinger_wband, "snx"),
+    "macd": (lambda close, fast, slow: indicators.macd(close, slow, fast), "snn"),
+    "macd_signal": (
+        lambda close, fast, slow, signal: indicators.macd_signal(
+            close, slow, fast, signal
+        ),
+        "snnn",
+    ),
+    "macd_hist": (
+        lambda close, fast, slow, signal: indicators.macd_diff(
+            close, slow, fast, signal
+        ),
+        "snnn",
+    ),
+    "adx": (indicators.adx, "sssn"),
+    "crossover": (_crossover, "ss"),
+    "crossunder": (_crossunder, "ss"),
+    "shift": (_shift, "sn"),
+    "abs": (np.abs, "s"),
+    "min": (np.fmin, "ss"),
+    "max": (np.fmax, "ss"),
+}
+
+_BINARY = {
+    ast.Add: ("add", operator.add),
+    ast.Sub: ("sub", operator.sub),
+    ast.Mult: ("mul", operator.mul),
+    ast.Div: ("div", operator.truediv),
+}
+_COMPARE = {
+    ast.Lt: ("lt", operator.lt),
+    ast.LtE: ("le", operator.le),
+    ast.Gt: ("gt", operator.gt),
+    ast.GtE: ("ge", operator.ge),
+    ast.Eq: ("eq", operator.eq),
+    ast.NotEq: ("ne", operator.ne),
+}
+_OPERATORS = {
+    **{name: fn for name, fn in _BINARY.values()},
+    **{name: fn for name, fn in _COMPARE.values()},
+    "neg": operator.neg,
+    "and": np.logical_and,
+    "or": np.logical_or,
+    "not": np.logical_not,
+}
+
+
+class SpecError(ValueError):
+    """A strategy spec that cannot be compiled."""
+
+
+class Plan:
+    """
+    Compiled rules: `steps` holds every unique subexpression once, children
+    before parents, and `outputs` maps each rule to its step.
+    """
+
+    def __init__(self, steps, outputs, take_profit_pct=None, stop_loss_pct=None):
+        self.steps = steps
+        self.outputs = outputs
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+
+    def evaluate(self, data):
+        """
+        Evaluate every rule on `data` ({"Close": array, ...}, 1D or 2D with
+        one row per series) and return {rule: boolean array}.
+        """
+        values = {}
+        shape = np.shape(data["Close"])
+        for step in self.steps:
+            kind = step[0]
+            if kind == "const":
+                values[step] = step[1]
+            elif kind == "col":
+                values[step] = np.asarray(data[step[1]], dtype=float)
+            elif kind == "op":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    values[step] = _OPERATORS[step[1]](*(values[a] for a in step[2:]))
+            else:
+                function, kinds = FUNCTIONS[step[1]]
+                values[step] = function(
+                    *(
+                        int(values[a]) if kind == "n" else values[a]
+                        for kind, a in zip(kinds, step[2:])
+                    )
+                )
+        return {
+            rule: np.broadcast_to(np.asarray(values[step], dtype=bool), shape)
+            for rule, step in self.outputs.items()
+        }
+
+
+class _Compiler:
+    def __init__(self, params, series):
+        self.params = params
+        self.series = series
+        self.steps = {}  # step -> None, in insertion (evaluation) order
+        self.references = 0
+        self._resolving = []
+
+    def compile(self, source, where):
+        if isinstance(source, (int, float)) and not isinstance(source, bool):
+            return self._emit(("const", float(source)))
+        if not isinstance(source, str):
+            raise SpecError(f"{where}: expected an expression string, got {source!r}")
+        try:
+            tree = ast.parse(source, mode="eval").body
+        except SyntaxError as e:
+            raise SpecError(f"{where}: invalid expression {source!r}: {e.msg}")
+        return self._node(tree, where)
+
+    def _emit(self, step):
+        self.references += 1
+        self.steps.setdefault(step, None)
+        return step
+
+    def _fold(self, name, args):
+        """Constant-fold an operator whose arguments are all constants."""
+        if all(arg[0] == "const" for arg in args):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = _OPERATORS[name](*(np.float64(arg[1]) for arg in args))
+            return self._emit(("const", float(value)))
+        return self._emit(("op", name) + tuple(args))
+
+    def _node(self, node, where):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, (bool, int, float)):
+                return self._emit(("const", float(node.value)))
+            raise SpecError(f"{where}: unsupported constant {node.value!r}")
+
+        if isinstance(node, ast.Name):
+            return self._name(node.id, where)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            args = [self._node(node.left, where), self._node(node.right, where)]
+            return self._fold(_BINARY[type(node.op)][0], args)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.Not)):
+            name = "neg" if isinstance(node.op, ast.USub) else "not"
+            return self._fold(name, [self._node(node.operand, where)])
+
+        if isinstance(node, ast.BoolOp):
+            name = "and" if isinstance(node.op, ast.And) else "or"
+            args = [self._node(value, where) for value in node.values]
+            result = args[0]
+            for arg in args[1:]:
+                result = self._fold(name, [result, arg])
+            return result
+
+        if isinstance(node, ast.Compare):
+            # a < b < c is (a < b) and (b < c)
+            left = self._node(node.left, where)
+            result = None
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARE:
+                    raise SpecError(f"{where}: unsupported comparison")
+                right = self._node(comparator, where)
+                compared = self._fold(_COMPARE[type(op)][0], [left, right])
+                if result is not None:
+                    compared = self._fold("and", [result, compared])
+                result = compared
+                left = right
+            return result
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            return self._call(node, where)
+
+        raise SpecError(f"{where}: unsupported syntax {ast.unparse(node)!r}")
+
+    def _name(self, name, where):
+        if name in COLUMNS:
+            return self._emit(("col", COLUMNS[name]))
+        if name in self.params:
+            value = self.params[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise SpecError(f"{where}: parameter {name!r} is not a number")
+            return self._emit(("const", float(value)))
+        if name in self.series:
+            if name in self._resolving:
+                cycle = " -> ".join(self._resolving + [name])
+                raise SpecError(f"{where}: series refer to each other ({cycle})")
+            self._resolving.append(name)
+            try:
+                return self.compile(self.series[name], f"series {name!r}")
+            finally:
+                self._resolving.pop()
+        raise SpecError(f"{where}: unknown name {name!r}")
+
+    def _call(self, node, where):
+        name = node.func.id
+        if name not in FUNCTIONS:
+            raise SpecError(f"{where}: unknown function {name}()")
+        if node.keywords:
+            raise SpecError(f"{where}: {name}() takes positional arguments only")
+        kinds = FUNCTIONS[name][1]
+        if len(node.args) != len(kinds):
+            raise SpecError(
+                f"{where}: {name}() takes {len(kinds)} arguments, got {len(node.args)}"
+            )
+        args = []
+        for kind, arg in zip(kinds, node.args):
+            step = self._node(arg, where)
+            if kind != "s":
+                if step[0] != "const":
+                    raise SpecError(
+                        f"{where}: {name}() needs a parameter or number, "
+                        f"got {ast.unparse(arg)!r}"
+                    )
+                if kind == "n" and (step[1] != int(step[1]) or step[1] < 1):
+                    raise SpecError(
+                        f"{where}: {name}() window must be a positive whole "
+                        f"number, got {step[1]:g}"
+                    )
+            args.append(step)
+        return self._emit(("call", name) + tuple(args))
+
+
+def _percent(spec, key, params):
+    """A TP/SL percentage given as a number or a parameter name (or None)."""
+    value = spec.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if value not in params:
+            raise SpecError(f"{key}: unknown parameter {value!r}")
+        value = params[value]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SpecError(f"{key}: expected a number, got {value!r}")
+    return float(value)
+
+
+def compile_spec(spec, params=None):
+    """
+    Compile a strategy spec into a Plan, with `params` (e.g. the values from
+    the indicator form) overriding the spec's default "indicators".
+    """
+    params = {**spec.get("indicators", {}), **(params or {})}
+    compiler = _Compiler(params, spec.get("series", {}))
+    outputs = {
+        rule: compiler.compile(spec[rule], rule) for rule in RULES if rule in spec
+    }
+    if not outputs:
+        raise SpecError(f"no rules: define at least one of {', '.join(RULES)}")
+    plan = Plan(
+        list(compiler.steps),
+        outputs,
+        take_profit_pct=_percent(spec, "take_profit_pct", params),
+        stop_loss_pct=_percent(spec, "stop_loss_pct", params),
+    )
+    logger.debug(
+        f"Compiled {len(outputs)} rules into {len(plan.steps)} steps "
+        f"({compiler.references} before sharing)"
+    )
+    return plan
+
+
+def load_specs(path=SPECS_PATH):
+    """
+    Read strategy_specs.json and return {strategy_name: spec} for the specs
+    that compile with their default parameters; broken specs are logged and
+    skipped. A missing file means no declarative strategies.
+    """
+    specs_path = Path(path)
+    if not specs_path.exists():
+        return {}
+
+    with open(specs_path, "r") as f:
+        raw_specs = json.load(f)["strategies"]
+
+    specs = {}
+    for strategy_name, spec in raw_specs.items():
+        try:
+            compile_spec(spec)
+        except SpecError as e:
+            logger.error(f"Skipping strategy spec '{strategy_name}': {e}")
+            continue
+        specs[strategy_name] = spec
+    return specs
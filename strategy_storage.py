@@ -1,11 +1,72 @@
 import sqlite3
 import os
 import json
+import hashlib
+import threading
+from datetime import datetime, timezone
 import pandas as pd
+from logger import get_logger
+
+logger = get_logger(__name__)
 
 db_file = "backtest_strategies.db"
-if not os.path.exists("ohlcv_data"):  # Create folder to store OHLCV CSVs
-    os.makedirs("ohlcv_data")
+
+# Content-addressed datasets shared by all runs (one CSV per distinct dataset)
+runs_data_dir = os.path.join("ohlcv_data", "runs")
+
+# Retention policy enforced by compact_runs():
+# keep the last N runs of every strategy name plus its top K runs by Sharpe ratio
+RETENTION_POLICY = {
+    "keep_last": 20,
+    "keep_top_sharpe": 5,
+}
+
+# Metric columns promoted out of the results JSON so they can be indexed
+RUN_METRIC_COLUMNS = {
+    "sharpe_ratio": "Sharpe Ratio",
+    "return_pct": "Return [%]",
+    "max_drawdown_pct": "Max. Drawdown [%]",
+    "win_rate_pct": "Win Rate [%]",
+    "num_trades": "# Trades",
+}
+
+# Columns added after the runs table was introduced: name -> SQL type
+RUN_EXTRA_COLUMNS = {
+    "symbol": "TEXT",
+    "timeframe": "TEXT",
+    "strategy": "TEXT",
+    "curves": "TEXT",
+    "timings": "TEXT",
+}
+
+# Columns the Saved Strategies browser can filter on (exact match)
+RUN_FILTER_COLUMNS = ["symbol", "timeframe", "strategy"]
+
+# Columns returned by the run listing (no JSON payloads)
+RUN_LIST_COLUMNS = [
+    "run_id",
+    "strategy_name",
+    "strategy",
+    "symbol",
+    "timeframe",
+    "created_at",
+    *RUN_METRIC_COLUMNS,
+]
+
+# Columns of a paper-trading fill (paper_trading.py), besides session/created_at
+PAPER_FILL_COLUMNS = [
+    "strategy_name",
+    "symbol",
+    "bar_time",
+    "side",
+    "reason",
+    "price",
+    "quantity",
+    "commission",
+    "pnl",
+    "cash",
+    "latency_ms",
+]
 
 
 def init_db():
@@ -22,18 +83,258 @@ def init_db():
             )
             """
         )
+        # Append-only history: every save adds a row, nothing is overwritten
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                strategy_name TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                dataset_hash TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                params TEXT,
+                ohlcv_path TEXT,
+                results TEXT,
+                sharpe_ratio REAL,
+                return_pct REAL,
+                max_drawdown_pct REAL,
+                win_rate_pct REAL,
+                num_trades INTEGER
+            )
+            """
+        )
+        _ensure_run_columns(cursor)
+        # One row per parameter set evaluated by optimizer.py, written as it finishes
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS optimizer_trials (
+                study TEXT NOT NULL,
+                trial INTEGER NOT NULL,
+                strategy_name TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT,
+                score REAL,
+                pruned_at_bar INTEGER,
+                {", ".join(f"{column} REAL" for column in RUN_METRIC_COLUMNS)},
+                PRIMARY KEY (study, trial)
+            )
+            """
+        )
+        # One row per order filled by paper_trading.py
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paper_fills (
+                fill_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT NOT NULL,
+                strategy_name TEXT NOT NULL,
+                symbol TEXT,
+                bar_time TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                side TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                price REAL NOT NULL,
+                quantity REAL NOT NULL,
+                commission REAL,
+                pnl REAL,
+                cash REAL,
+                latency_ms REAL
+            )
+            """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_paper_fills_session "
+            "ON paper_fills (session, strategy_name, fill_id)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_runs_name ON runs (strategy_name, run_id)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_runs_name_sharpe ON runs (strategy_name, sharpe_ratio)"
+        )
+        for column in [*RUN_METRIC_COLUMNS, *RUN_FILTER_COLUMNS]:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_runs_{column} ON runs ({column})"
+            )
+        _backfill_runs(cursor)
         conn.commit()
 
 
-def save_strategy(strategy_name, params, df, results):
+_db_ready = False
+_db_lock = threading.Lock()
+
+
+def _connect():
+    """
+    Open a connection, creating folders and tables on first use in this
+    process instead of at import time.
+    """
+    global _db_ready
+    if not _db_ready:
+        with _db_lock:
+            if not _db_ready:
+                if not os.path.exists("ohlcv_data"):  # Folder to store OHLCV CSVs
+                    os.makedirs("ohlcv_data")
+                init_db()
+                _db_ready = True
+    return sqlite3.connect(db_file)
+
+
+def _ensure_run_columns(cursor):
+    """Add columns introduced after the runs table was first created."""
+    cursor.execute("PRAGMA table_info(runs)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, sql_type in RUN_EXTRA_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE runs ADD COLUMN {column} {sql_type}")
+
+
+def _backfill_runs(cursor):
+    """Copy legacy rows of the strategies table into the runs history once."""
+    cursor.execute(
+        """
+        SELECT strategy_name, params, ohlcv_path, results FROM strategies
+        WHERE strategy_name NOT IN (SELECT DISTINCT strategy_name FROM runs)
+        """
+    )
+    for strategy_name, params, ohlcv_path, results in cursor.fetchall():
+        dataset_hash = ""
+        if ohlcv_path and os.path.exists(ohlcv_path):
+            with open(ohlcv_path, "rb") as f:
+                dataset_hash = _hash_bytes(f.read())
+        _insert_run(
+            cursor,
+            strategy_name,
+            params,
+            dataset_hash,
+            ohlcv_path,
+            json.loads(results) if results else {},
+        )
+        logger.info(f"Backfilled run history for legacy strategy '{strategy_name}'")
+
+
+def _hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _metric_value(results, key):
+    """Results are stored as strings; convert a metric to float or None."""
+    try:
+        value = float(results.get(key))
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN -> NULL
+
+
+def _split_results(results):
+    """
+    Split backtest results into scalar metrics and the large private series
+    (`_equity_curve`, `_trades`, ...) so listings never parse the curves.
+    """
+    metrics = {k: v for k, v in results.items() if not str(k).startswith("_")}
+    curves = {k: v for k, v in results.items() if str(k).startswith("_")}
+    return metrics, curves
+
+
+def _insert_run(
+    cursor, strategy_name, params_json, dataset_hash, ohlcv_path, results, timings=None
+):
+    params = json.loads(params_json) if params_json else {}
+    metrics, curves = _split_results(results)
+    metric_values = [
+        _metric_value(results, key) for key in RUN_METRIC_COLUMNS.values()
+    ]
+    cursor.execute(
+        f"""
+        INSERT INTO runs (strategy_name, params_hash, dataset_hash, created_at,
+                          params, ohlcv_path, results, curves, timings,
+                          {", ".join(RUN_FILTER_COLUMNS)},
+                          {", ".join(RUN_METRIC_COLUMNS)})
+        VALUES ({", ".join("?" * (9 + len(RUN_FILTER_COLUMNS) + len(RUN_METRIC_COLUMNS)))})
+        """,
+        (
+            strategy_name,
+            _hash_bytes(params_json.encode()),
+            dataset_hash,
+            datetime.now(timezone.utc).isoformat(),
+            params_json,
+            ohlcv_path,
+            json.dumps(metrics),
+            json.dumps(curves),
+            json.dumps(timings) if timings else None,
+            *[params.get(column) for column in RUN_FILTER_COLUMNS],
+            *metric_values,
+        ),
+    )
+    return cursor.lastrowid
+
+
+def _encode_dataset(df):
+    """Return the CSV bytes of the OHLCV data with their (hash, path)."""
+    csv_bytes = df.to_csv(index=True).encode()
+    dataset_hash = _hash_bytes(csv_bytes)
+    return csv_bytes, dataset_hash, os.path.join(runs_data_dir, f"{dataset_hash}.csv")
+
+
+def _write_dataset(ohlcv_path, csv_bytes):
+    """Store the OHLCV data once per distinct content."""
+    os.makedirs(runs_data_dir, exist_ok=True)
+    if not os.path.exists(ohlcv_path):
+        with open(ohlcv_path, "wb") as f:
+            f.write(csv_bytes)
+
+
+def serialize_results(results):
+    """Convert results to a JSON-serializable format."""
+    if isinstance(results, pd.DataFrame):
+        return results.astype(str).to_dict(
+            orient="records"
+        )  # Convert DataFrame to list of dicts
+
+    elif isinstance(results, pd.Series):
+        return results.astype(str).to_dict()  # Convert Series to a dict
+
+    elif isinstance(results, dict):
+        return {
+            k: serialize_results(v) for k, v in results.items()
+        }  # Recursively serialize dicts
+
+    elif hasattr(results, "__dict__"):  # Handle custom objects
+        return {k: serialize_results(v) for k, v in vars(results).items()}
+
+    elif isinstance(results, pd.Timestamp):
+        return results.isoformat()  # Convert Timestamp to ISO format string
+
+    elif isinstance(results, pd.Timedelta):
+        return str(results)  # Convert Timedelta to string
+
+    return results  # Return as-is if already serializable
+
+
+def save_strategy(strategy_name, params, df, results, timings=None):
     """
     Save strategy parameters, OHLCV data, and backtest results to SQLite.
+
+    Every call appends a new row to the runs history; the strategies table
+    keeps pointing at the latest run of each name. The optional "strategy",
+    "symbol" and "timeframe" keys of `params` are stored as filterable
+    columns, and `timings` ({phase: seconds}) is kept with the run.
+    Returns the new run id.
     """
-    ohlcv_path = f"ohlcv_data/{strategy_name}.csv"
-    df.to_csv(ohlcv_path, index=True)
+    csv_bytes, dataset_hash, ohlcv_path = _encode_dataset(df)
+    params_json = json.dumps(params, sort_keys=True)
 
-    with sqlite3.connect(db_file) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
+        run_id = _insert_run(
+            cursor,
+            strategy_name,
+            params_json,
+            dataset_hash,
+            ohlcv_path,
+            results,
+            timings,
+        )
         cursor.execute(
             """
             INSERT INTO strategies (strategy_name, params, ohlcv_path, results)
@@ -43,26 +344,50 @@ def save_strategy(strategy_name, params, df, results):
                 ohlcv_path=excluded.ohlcv_path,
                 results=excluded.results
             """,
-            (strategy_name, json.dumps(params), ohlcv_path, json.dumps(results)),
+            (strategy_name, params_json, ohlcv_path, json.dumps(results)),
         )
+        # The file is written only once the rows referencing it are in this
+        # (still open) write transaction: orphan cleanup has to wait for the
+        # commit and then finds the dataset referenced
+        _write_dataset(ohlcv_path, csv_bytes)
         conn.commit()
 
+    return run_id
+
 
 def fetch_all_strategies():
     """
     Fetch all saved strategies.
     """
-    with sqlite3.connect(db_file) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT strategy_name FROM strategies")
         return [row[0] for row in cursor.fetchall()]
 
 
+def fetch_runs(strategy_name):
+    """
+    Fetch the run history of a strategy, newest first (without the payloads).
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT run_id, params_hash, dataset_hash, created_at,
+                   {", ".join(RUN_METRIC_COLUMNS)}
+            FROM runs WHERE strategy_name = ? ORDER BY run_id DESC
+            """,
+            (strategy_name,),
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
 def load_strategy(strategy_name):
     """
     Load strategy parameters and OHLCV data.
     """
-    with sqlite3.connect(db_file) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT params, ohlcv_path, results FROM strategies WHERE strategy_name = ?",
@@ -80,11 +405,289 @@ def load_strategy(strategy_name):
         return None, None, None, None  # Ensure correct return values
 
 
+def load_run(run_id):
+    """
+    Load the parameters, OHLCV data and results of one historical run.
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT params, ohlcv_path, results, curves FROM runs WHERE run_id = ?",
+            (run_id,),
+        )
+        row = cursor.fetchone()
+
+        if row:
+            params = json.loads(row[0])
+            df = pd.read_csv(row[1], index_col=0, parse_dates=True)
+            results = json.loads(row[2])
+            results.update(json.loads(row[3]) if row[3] else {})
+            return params, row[1], df, results
+
+        return None, None, None, None
+
+
+def _run_filter_clause(filters):
+    """
+    Build a WHERE clause for the run listing.
+
+    Supported filters: symbol, timeframe, strategy (exact match),
+    name (substring), min_sharpe, min_return, max_drawdown (largest
+    acceptable drawdown in %, positive number) and min_trades.
+    """
+    filters = filters or {}
+    clauses, args = [], []
+    for column in RUN_FILTER_COLUMNS:
+        if filters.get(column):
+            clauses.append(f"{column} = ?")
+            args.append(filters[column])
+    if filters.get("name"):
+        clauses.append("strategy_name LIKE ?")
+        args.append(f"%{filters['name']}%")
+    if filters.get("min_sharpe") is not None:
+        clauses.append("sharpe_ratio >= ?")
+        args.append(filters["min_sharpe"])
+    if filters.get("min_return") is not None:
+        clauses.append("return_pct >= ?")
+        args.append(filters["min_return"])
+    if filters.get("max_drawdown") is not None:
+        # Drawdowns are stored as negative percentages
+        clauses.append("max_drawdown_pct >= ?")
+        args.append(-abs(filters["max_drawdown"]))
+    if filters.get("min_trades") is not None:
+        clauses.append("num_trades >= ?")
+        args.append(filters["min_trades"])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, args
+
+
+def count_runs(filters=None):
+    """
+    Count the runs matching the given filters.
+    """
+    where, args = _run_filter_clause(filters)
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM runs {where}", args)
+        return cursor.fetchone()[0]
+
+
+def query_runs(filters=None, order_by="run_id", descending=True, limit=50, offset=0):
+    """
+    Fetch one page of the run listing (metric columns only, no payloads).
+    """
+    if order_by not in RUN_LIST_COLUMNS:
+        raise ValueError(f"Cannot order runs by '{order_by}'")
+    where, args = _run_filter_clause(filters)
+    direction = "DESC" if descending else "ASC"
+    # Metric columns may be NULL (e.g. no Sharpe without trades): sort them last
+    order_clause = (
+        f"run_id {direction}"
+        if order_by == "run_id"
+        else f"{order_by} IS NULL, {order_by} {direction}, run_id DESC"
+    )
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT {", ".join(RUN_LIST_COLUMNS)} FROM runs {where}
+            ORDER BY {order_clause}
+            LIMIT ? OFFSET ?
+            """,
+            [*args, limit, offset],
+        )
+        return [dict(zip(RUN_LIST_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def distinct_run_values(column):
+    """
+    Distinct non-empty values of a filter column (served from its index).
+    """
+    if column not in RUN_FILTER_COLUMNS:
+        raise ValueError(f"'{column}' is not a run filter column")
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT DISTINCT {column} FROM runs WHERE {column} IS NOT NULL ORDER BY {column}"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def load_run_timings(run_id):
+    """
+    Load the per-phase timings ({phase: seconds}) recorded for a run.
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT timings FROM runs WHERE run_id = ?", (run_id,))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+
+def load_run_metrics(run_id):
+    """
+    Load only the parameters and scalar metrics of a run.
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT params, results, ohlcv_path FROM runs WHERE run_id = ?",
+            (run_id,),
+        )
+        row = cursor.fetchone()
+
+        if row:
+            metrics, _ = _split_results(json.loads(row[1]))
+            return json.loads(row[0]), metrics, row[2]
+
+        return None, None, None
+
+
+def load_run_curves(run_id):
+    """
+    Load the equity curve and trades of a run.
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT results, curves FROM runs WHERE run_id = ?", (run_id,))
+        row = cursor.fetchone()
+
+        if not row:
+            return {}
+        if row[1]:
+            return json.loads(row[1])
+        # Legacy rows keep everything in the results column
+        _, curves = _split_results(json.loads(row[0]))
+        return curves
+
+
+def save_trial(
+    study, trial, strategy_name, status, params, score, metrics=None, pruned_at_bar=None
+):
+    """
+    Store one optimizer trial (replacing an earlier write of the same trial).
+    `metrics` are backtest stats; the RUN_METRIC_COLUMNS among them are kept.
+    """
+    metrics = metrics or {}
+    with _connect() as conn:
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO optimizer_trials
+                (study, trial, strategy_name, created_at, status, params, score,
+                 pruned_at_bar, {", ".join(RUN_METRIC_COLUMNS)})
+            VALUES ({", ".join("?" * (8 + len(RUN_METRIC_COLUMNS)))})
+            """,
+            (
+                study,
+                trial,
+                strategy_name,
+                datetime.now(timezone.utc).isoformat(),
+                status,
+                json.dumps(params, sort_keys=True),
+                score,
+                pruned_at_bar,
+                *[_metric_value(metrics, key) for key in RUN_METRIC_COLUMNS.values()],
+            ),
+        )
+        conn.commit()
+
+
+def fetch_trials(study, order_by="trial"):
+    """
+    Fetch the trials of an optimizer study, with their params decoded.
+    `order_by` is "trial" (evaluation order) or "score" (best first).
+    """
+    order = "score IS NULL, score DESC" if order_by == "score" else "trial"
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM optimizer_trials WHERE study = ? ORDER BY {order}",
+            (study,),
+        )
+        columns = [c[0] for c in cursor.description]
+        trials = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    for trial in trials:
+        trial["params"] = json.loads(trial["params"]) if trial["params"] else {}
+    return trials
+
+
+def save_paper_fills(session, fills):
+    """Append paper-trading fills (dicts with PAPER_FILL_COLUMNS) to a session."""
+    if not fills:
+        return
+    created_at = datetime.now(timezone.utc).isoformat()
+    with _connect() as conn:
+        conn.executemany(
+            f"""
+            INSERT INTO paper_fills
+                (session, created_at, {", ".join(PAPER_FILL_COLUMNS)})
+            VALUES ({", ".join("?" * (2 + len(PAPER_FILL_COLUMNS)))})
+            """,
+            [
+                (
+                    session,
+                    created_at,
+                    *[
+                        str(fill[c]) if c == "bar_time" else fill.get(c)
+                        for c in PAPER_FILL_COLUMNS
+                    ],
+                )
+                for fill in fills
+            ],
+        )
+        conn.commit()
+
+
+def fetch_paper_fills(session, strategy_name=None):
+    """Fills of a paper-trading session in the order they happened."""
+    query = "SELECT * FROM paper_fills WHERE session = ?"
+    params = [session]
+    if strategy_name is not None:
+        query += " AND strategy_name = ?"
+        params.append(strategy_name)
+    with _connect() as conn:
+        return pd.read_sql_query(query + " ORDER BY fill_id", conn, params=params)
+
+
+def delete_run(run_id):
+    """
+    Delete a single run from the history (and its dataset if now unused).
+    """
+    with _connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        _remove_orphan_datasets(cursor)
+        conn.commit()
+
+
+def _remove_orphan_datasets(cursor):
+    """
+    Delete stored dataset CSVs that no run or strategy references anymore.
+
+    Call it after a write in the same transaction, so it holds the database
+    write lock and cannot run between save_strategy() writing a dataset and
+    committing the run that references it.
+    """
+    if not os.path.isdir(runs_data_dir):
+        return 0
+    cursor.execute(
+        "SELECT ohlcv_path FROM runs UNION SELECT ohlcv_path FROM strategies"
+    )
+    referenced = {os.path.normpath(row[0]) for row in cursor.fetchall() if row[0]}
+    removed = 0
+    for file_name in os.listdir(runs_data_dir):
+        path = os.path.normpath(os.path.join(runs_data_dir, file_name))
+        if file_name.endswith(".csv") and path not in referenced:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
 def delete_strategy(strategy_name):
     """
-    Delete a saved strategy and its OHLCV CSV file.
+    Delete a saved strategy, its run history and its OHLCV CSV file.
     """
-    with sqlite3.connect(db_file) as conn:
+    with _connect() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT ohlcv_path FROM strategies WHERE strategy_name = ?",
@@ -92,13 +695,109 @@ def delete_strategy(strategy_name):
         )
         row = cursor.fetchone()
 
-        if row and os.path.exists(row[0]):
+        cursor.execute(
+            "DELETE FROM strategies WHERE strategy_name = ?", (strategy_name,)
+        )
+        cursor.execute("DELETE FROM runs WHERE strategy_name = ?", (strategy_name,))
+
+        # Legacy per-strategy CSVs are owned by a single row; shared datasets
+        # are only removed once nothing references them
+        if (
+            row
+            and row[0]
+            and os.path.dirname(os.path.normpath(row[0]))
+            != os.path.normpath(runs_data_dir)
+            and os.path.exists(row[0])
+        ):
             os.remove(row[0])  # Delete the OHLCV CSV file
+        _remove_orphan_datasets(cursor)
+        conn.commit()
 
+
+def compact_runs(keep_last=None, keep_top_sharpe=None):
+    """
+    Enforce the retention policy on the runs history.
+
+    A run survives if it is among the last `keep_last` runs of its strategy
+    name or among its `keep_top_sharpe` best runs by Sharpe ratio. Dataset
+    CSVs no longer referenced by any run are removed afterwards.
+
+    Returns:
+        (deleted_runs, deleted_files)
+    """
+    keep_last = RETENTION_POLICY["keep_last"] if keep_last is None else keep_last
+    keep_top_sharpe = (
+        RETENTION_POLICY["keep_top_sharpe"]
+        if keep_top_sharpe is None
+        else keep_top_sharpe
+    )
+
+    with _connect() as conn:
+        cursor = conn.cursor()
         cursor.execute(
-            "DELETE FROM strategies WHERE strategy_name = ?", (strategy_name,)
+            """
+            DELETE FROM runs WHERE run_id IN (
+                SELECT run_id FROM (
+                    SELECT run_id,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY strategy_name ORDER BY run_id DESC
+                        ) AS recent_rank,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY strategy_name
+                            ORDER BY sharpe_ratio IS NULL, sharpe_ratio DESC
+                        ) AS sharpe_rank
+                    FROM runs
+                )
+                WHERE recent_rank > ? AND sharpe_rank > ?
+            )
+            """,
+            (keep_last, keep_top_sharpe),
         )
+        deleted_runs = cursor.rowcount
+        deleted_files = _remove_orphan_datasets(cursor)
         conn.commit()
 
+    if deleted_runs or deleted_files:
+        logger.info(
+            f"Compacted run history: removed {deleted_runs} runs and {deleted_files} dataset files"
+        )
+    return deleted_runs, deleted_files
+
+
+_compaction_thread = None
+_compaction_stop = threading.Event()
+_compaction_lock = threading.Lock()
+
+
+def _compaction_loop(interval_seconds):
+    while not _compaction_stop.wait(interval_seconds):
+        try:
+            compact_runs()
+        except Exception as e:
+            logger.exception(f"Run history compaction failed: {e}")
+
+
+def start_compaction_job(interval_seconds=600):
+    """
+    Start the background thread that periodically runs compact_runs().
+    Safe to call on every script rerun: only one thread is started per process.
+    """
+    global _compaction_thread
+    with _compaction_lock:
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return _compaction_thread
+        _compaction_stop.clear()
+        _compaction_thread = threading.Thread(
+            target=_compaction_loop,
+            args=(interval_seconds,),
+            name="run-history-compaction",
+            daemon=True,
+        )
+        _compaction_thread.start()
+        return _compaction_thread
+
+
+def stop_compaction_job():
+    """Signal the background compaction thread to exit."""
+    _compaction_stop.set()
 
-init_db()
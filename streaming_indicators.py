@@ -0,0 +1,269 @@
+# streaming_indicators.py
+# Incremental versions of the indicators in indicators.py for live evaluation:
+# each object keeps only the state its indicator needs (a ring buffer of the
+# window, or the previous smoothed value) and update() folds in one new bar in
+# O(1), instead of recomputing the whole history on every candle.
+#
+# The values follow indicators.py (and so the `ta` functions the strategies
+# use) bar for bar, with the same warm-up NaNs (ADX: 0). The recursive ones
+# (EMA, RSI, MACD, ADX) use the same arithmetic as pandas' ewm and agree
+# exactly; the rolling ones differ only by rounding (SMA ~1e-16, std ~1e-9
+# relative, about as far as pandas' own rolling std is from an exact one).
+#
+#   rsi = RSI(14)
+#   for close in closes:
+#       value = rsi.update(close)
+
+import math
+from array import array
+
+import numpy as np
+
+NAN = float("nan")
+
+
+class EMA:
+    """
+    Exponential moving average as pandas' ewm(alpha, adjust=False); NaN
+    until `min_periods` values have been seen. Leading NaNs are skipped.
+    """
+
+    __slots__ = ("alpha", "min_periods", "count", "value", "_mean")
+
+    def __init__(self, window, alpha=None, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.min_periods = window if min_periods is None else min_periods
+        self.count = 0
+        self.value = NAN
+        self._mean = NAN
+
+    def update(self, x):
+        if x != x:  # NaN: no observation
+            return self.value
+        self.count += 1
+        if self.count == 1:
+            self._mean = x
+        else:
+            # pandas' adjust=False weights: old = 1 - alpha, new = alpha
+            old = 1 - self.alpha
+            self._mean = (old * self._mean + self.alpha * x) / (old + self.alpha)
+        if self.count >= self.min_periods:
+            self.value = self._mean
+        return self.value
+
+
+class SMA:
+    """Simple moving average over a ring buffer, with a compensated sum."""
+
+    __slots__ = ("window", "count", "value", "_buffer", "_sum", "_error", "_same")
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.value = NAN
+        self._buffer = array("d", bytes(8 * window))
+        self._sum = 0.0
+        self._error = 0.0
+        self._same = 0  # trailing run of identical values
+
+    def _add(self, x):
+        # Kahan summation keeps the running sum from drifting over long runs
+        y = x - self._error
+        total = self._sum + y
+        self._error = (total - self._sum) - y
+        self._sum = total
+
+    def update(self, x):
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self._add(-self._buffer[slot])
+        previous = self._buffer[(self.count - 1) % self.window]
+        self._same = self._same + 1 if self.count and x == previous else 1
+        self._buffer[slot] = x
+        self._add(x)
+        self.count += 1
+        if self.count >= self.window:
+            # A flat window gives its value exactly, as pandas does
+            self.value = x if self._same >= self.window else self._sum / self.window
+        return self.value
+
+
+class RollingStd:
+    """
+    Population (ddof=0) rolling standard deviation over a ring buffer,
+    updated with Welford's add/remove steps.
+    """
+
+    __slots__ = ("window", "count", "value", "_buffer", "_mean", "_m2", "_same")
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.value = NAN
+        self._buffer = array("d", bytes(8 * window))
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._same = 0
+
+    def update(self, x):
+        slot = self.count % self.window
+        previous = self._buffer[(self.count - 1) % self.window]
+        self._same = self._same + 1 if self.count and x == previous else 1
+        if self.count >= self.window:
+            old = self._buffer[slot]
+            mean = self._mean + (x - old) / self.window
+            self._m2 += (x - old) * (x - mean + old - self._mean)
+            self._mean = mean
+        else:
+            n = self.count + 1
+            delta = x - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (x - self._mean)
+        self._buffer[slot] = x
+        self.count += 1
+        if self.count >= self.window:
+            if self._same >= self.window:
+                self.value = 0.0
+            else:
+                self.value = math.sqrt(max(self._m2, 0.0) / self.window)
+        return self.value
+
+
+class BollingerBands:
+    """Bollinger Bands; update() returns (lower, middle, upper)."""
+
+    __slots__ = ("window_dev", "lower", "middle", "upper", "width", "_sma", "_std")
+
+    def __init__(self, window=20, window_dev=2):
+        self.window_dev = window_dev
+        self.lower = self.middle = self.upper = self.width = NAN
+        self._sma = SMA(window)
+        self._std = RollingStd(window)
+
+    def update(self, close):
+        mavg = self._sma.update(close)
+        band = self.window_dev * self._std.update(close)
+        self.middle = mavg
+        self.lower = mavg - band
+        self.upper = mavg + band
+        if mavg == mavg:
+            self.width = (
+                (self.upper - self.lower) / mavg * 100 if mavg != 0 else math.inf
+            )
+        return self.lower, self.middle, self.upper
+
+
+class RSI:
+    """Wilder's RSI; NaN for the first `window - 1` bars."""
+
+    __slots__ = ("value", "_previous", "_up", "_down")
+
+    def __init__(self, window=14):
+        self.value = NAN
+        self._previous = NAN
+        self._up = EMA(window, alpha=1 / window)
+        self._down = EMA(window, alpha=1 / window)
+
+    def update(self, close):
+        diff = close - self._previous
+        self._previous = close
+        avg_up = self._up.update(diff if diff > 0 else 0.0)
+        avg_down = self._down.update(-diff if diff < 0 else 0.0)
+        if avg_down == 0:
+            self.value = 100.0
+        elif avg_up == avg_up and avg_down == avg_down:
+            self.value = 100 - 100 / (1 + avg_up / avg_down)
+        return self.value
+
+
+class MACD:
+    """MACD line, signal and histogram; update() returns the line."""
+
+    __slots__ = ("line", "signal", "diff", "_slow", "_fast", "_signal")
+
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self.line = self.signal = self.diff = NAN
+        self._slow = EMA(window_slow)
+        self._fast = EMA(window_fast)
+        self._signal = EMA(window_sign)
+
+    def update(self, close):
+        self.line = self._fast.update(close) - self._slow.update(close)
+        self.signal = self._signal.update(self.line)
+        self.diff = self.line - self.signal
+        return self.line
+
+
+class ADX:
+    """
+    Average Directional Index as in ta (and indicators.adx): 0 during the
+    2 * window - 1 bars of warm-up. update() takes the bar's high, low and
+    close.
+    """
+
+    __slots__ = (
+        "window",
+        "count",
+        "value",
+        "_previous",
+        "_sums",
+        "_smoothed",
+        "_dx",
+        "_adx",
+    )
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self.value = 0.0
+        self._previous = None  # (high, low, close) of the last bar
+        self._sums = array("d", [0.0, 0.0, 0.0])  # TR, +DM, -DM of the first window
+        self._smoothed = None  # Wilder-smoothed (TR, +DM, -DM)
+        self._dx = array("d")  # DX of the first window
+        self._adx = EMA(window, alpha=1 / window, min_periods=1)
+
+    def update(self, high, low, close):
+        previous, self._previous = self._previous, (high, low, close)
+        self.count += 1
+        if previous is None:
+            return self.value
+        prev_high, prev_low, prev_close = previous
+        true_range = max(high, prev_close) - min(low, prev_close)
+        up, down = high - prev_high, prev_low - low
+        moves = (
+            true_range,
+            up if up > down and up > 0 else 0.0,
+            down if down > up and down > 0 else 0.0,
+        )
+
+        bar = self.count - 1
+        if bar <= self.window:
+            for i, move in enumerate(moves):
+                self._sums[i] += move
+            if bar < self.window:
+                return self.value
+            self._smoothed = [EMA(1, alpha=1 / self.window) for _ in moves]
+            moves = [total / self.window for total in self._sums]
+        trs, dip, din = (
+            smoothed.update(move) * self.window
+            for smoothed, move in zip(self._smoothed, moves)
+        )
+
+        di_pos = 100 * dip / trs if trs != 0 else 0.0
+        di_neg = 100 * din / trs if trs != 0 else 0.0
+        total = di_pos + di_neg
+        dx = 100 * abs((di_pos - di_neg) / total) if total != 0 else 0.0
+
+        # ADX starts as the mean DX of the first window, then Wilder-smooths
+        if len(self._dx) < self.window:
+            self._dx.append(dx)
+            if len(self._dx) == self.window:
+                self.value = self._adx.update(float(np.mean(self._dx)))
+            return self.value
+        self.value = self._adx.update(dx)
+        return self.value
+
+
+def run(indicator, *columns):
+    """Feed whole columns through `indicator`; the value after each bar."""
+    return np.array([indicator.update(*bar) for bar in zip(*columns)], dtype=float)
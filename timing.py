@@ -0,0 +1,82 @@
+# timing.py
+# Lightweight phase timers. Code wraps its work in span("phase"); whoever
+# opened a collect() block receives the per-phase breakdown. Spans outside a
+# collect() block cost one context-variable lookup and record nothing.
+
+import contextlib
+import contextvars
+import threading
+import time
+
+# Phases of a backtest in the order they normally run
+PHASES = [
+    "fetch",
+    "clean",
+    "indicators",
+    "next_loop",
+    "stats",
+    "process_trades",
+    "render",
+]
+
+_active = contextvars.ContextVar("timings", default=None)
+
+
+class Timings:
+    """Seconds spent per phase; repeated spans of a phase add up."""
+
+    def __init__(self, initial=None):
+        self._phases = dict(initial or {})
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def as_dict(self):
+        """Phases in PHASES order first, then any others in insertion order."""
+        with self._lock:
+            phases = dict(self._phases)
+        ordered = {p: phases.pop(p) for p in PHASES if p in phases}
+        ordered.update(phases)
+        return ordered
+
+    @property
+    def total(self):
+        with self._lock:
+            return sum(self._phases.values())
+
+
+def is_active():
+    """True when a collect() block is open in this context."""
+    return _active.get() is not None
+
+
+@contextlib.contextmanager
+def collect(timings=None):
+    """Record every span inside the block into `timings` (a new one if not given)."""
+    timings = timings if timings is not None else Timings()
+    token = _active.set(timings)
+    try:
+        yield timings
+    finally:
+        _active.reset(token)
+
+
+def record(phase, seconds):
+    """Add an externally measured duration to the active collector, if any."""
+    timings = _active.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextlib.contextmanager
+def span(phase):
+    """Time the block as `phase`."""
+    timings = _active.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(phase, time.perf_counter() - start)
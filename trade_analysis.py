@@ -1,16 +1,16 @@
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
+from chart_utils import line_trace, zoom_range, clip_to_range
+from data_preview import render_preview
 
 
-def process_trades(stats, df, position_size_factor=1):
+def process_trades(stats, df):
     """
     Processes trade data and returns a formatted DataFrame.
 
     Args:
         stats: Object containing trade data.
-        df: DataFrame with market prices (used for precision).
-        position_size_factor: Scaling factor for trade sizes.
+        df: DataFrame with market prices the backtest ran on.
 
     Returns:
         trades (pd.DataFrame): Processed trade data.
@@ -18,22 +18,16 @@ def process_trades(stats, df, position_size_factor=1):
     _trades = stats._trades
     trades = _trades.copy()  # Create a copy to prevent modifying the original dataframe
 
-    # Determine decimal precision from the last Close price
-    precision = len(str(df["Close"].iloc[-1]).split(".")[1])
+    # Prices are the data's own and sizes are already in units (see position_sizing)
+    trades["EntryPrice"] = trades["EntryPrice"].astype(float)
+    trades["ExitPrice"] = trades["ExitPrice"].astype(float)
 
-    # Adjust prices based on position size factor
-    trades["EntryPrice"] = trades["EntryPrice"].astype(float) * position_size_factor
-    trades["ExitPrice"] = trades["ExitPrice"].astype(float) * position_size_factor
-
-    # Adjust Stop Loss (SL), Take Profit (TP), and Trade Size
-    trades["SL"] = trades["SL"] * position_size_factor
-    trades["TP"] = trades["TP"] * position_size_factor
-    trades["Size"] = trades["Size"] / position_size_factor
-
-    # Drop unwanted columns if they exist
-    for col in ["Entry_λ(C)", "Exit_λ(C)"]:
-        if col in trades.columns:
-            trades.drop(columns=[col], inplace=True)
+    # Drop the indicator values backtesting.py records at entry/exit
+    # (Entry_λ(C), Entry_sma_indicator_24h, ...)
+    trades.drop(
+        columns=[c for c in trades.columns if c.startswith(("Entry_", "Exit_"))],
+        inplace=True,
+    )
 
     # Rename columns if they exist
     column_mapping = {
@@ -105,8 +99,13 @@ def process_trades(stats, df, position_size_factor=1):
 #         st.plotly_chart(fig_pnl, use_container_width=True)
 
 
-def display_trade_analysis(trades, df):
-    """Displays trade history and Buy & Hold vs Strategy Equity Curve in Streamlit."""
+def display_trade_analysis(trades, df, preview_key=None):
+    """
+    Displays trade history and Buy & Hold vs Strategy Equity Curve in Streamlit.
+    With a `preview_key` the trade table is paged and its pages cached under it.
+    """
+    import plotly.graph_objects as go
+
     # st.write("df.columns:", df.columns.tolist())
 
     if not trades.empty:
@@ -116,8 +115,11 @@ def display_trade_analysis(trades, df):
         trades["Profit/Loss"] = trades["Profit/Loss"].astype(float)
         trades["Return (%)"] = trades["Return (%)"].astype(float)
 
-        # Display raw trade table
-        st.dataframe(trades)
+        # Display raw trade table (one page at a time for large histories)
+        if preview_key is not None:
+            render_preview(trades, preview_key, key="trade_history")
+        else:
+            st.dataframe(trades)
 
         # ---------------------------------------------
         # 📈 Buy & Hold vs Strategy Equity Curve
@@ -163,25 +165,30 @@ def display_trade_analysis(trades, df):
             "Cumulative Profit"
         ].iloc[0]
 
-        # Plot
+        # Zoom window shared by both curves; each is downsampled within it
+        window = zoom_range(df.index, key="equity_vs_hold_zoom")
+        strategy_curve = clip_to_range(
+            trades.set_index("Exit Date")["Cumulative Profit"].sort_index(), window
+        )
+        hold_curve = clip_to_range(df["Buy & Hold"], window)
+
+        # Plot (WebGL traces, at most a few thousand points each)
         fig = go.Figure()
 
         fig.add_trace(
-            go.Scatter(
-                x=trades["Exit Date"],
-                y=trades["Cumulative Profit"],
-                mode="lines",
-                name="Strategy",
+            line_trace(
+                strategy_curve.index,
+                strategy_curve.values,
+                "Strategy",
                 line=dict(color="lime", width=2),
             )
         )
 
         fig.add_trace(
-            go.Scatter(
-                x=df.index,
-                y=df["Buy & Hold"],
-                mode="lines",
-                name="Buy & Hold",
+            line_trace(
+                hold_curve.index,
+                hold_curve.values,
+                "Buy & Hold",
                 line=dict(color="orange", width=2, dash="dot"),
             )
         )
@@ -0,0 +1,494 @@
+# work_queue.py
+# SQLite work queue for backtest sweeps spread over several processes or hosts.
+#
+# Jobs (strategy + config + dataset CSV path) sit in one SQLite file that every
+# worker can reach, e.g. on shared storage. A worker claims a batch inside one
+# write transaction, holding a lease on each job that it renews with heartbeats
+# while it runs them. A job whose lease expires (worker crashed, host lost) is
+# claimed again by the next worker. Results are keyed by job id and written with
+# INSERT OR IGNORE, so a job finished twice keeps its first result.
+#
+# The file stays in the default rollback-journal mode: WAL needs shared memory,
+# which network file systems do not provide.
+#
+# Usage (from the project root):
+#   python work_queue.py worker --db sweeps.db --batch 4
+#   python work_queue.py status --db sweeps.db
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+import pandas as pd
+
+from data_cache import OHLCVCache
+from logger import get_logger, run_context
+from strategy_storage import RUN_METRIC_COLUMNS
+
+logger = get_logger(__name__)
+
+DEFAULT_PATH = os.environ.get("WORK_QUEUE_DB", "work_queue.db")
+# A claimed job is handed to another worker after this long without a heartbeat
+LEASE_SECONDS = 120
+# A job that failed (or lost its worker) this many times is marked failed
+MAX_ATTEMPTS = 3
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Datasets loaded by this worker process, keyed by path and mtime
+_datasets = OHLCVCache(
+    max_bytes=int(os.environ.get("WORK_QUEUE_DATA_MAX_MB", 512)) * 1024 * 1024
+)
+
+
+def job_key(sweep, strategy_name, config, dataset):
+    """Identity of a job: enqueueing the same job twice adds it once."""
+    payload = json.dumps([sweep, strategy_name, config, dataset], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class WorkQueue:
+    """Jobs, leases and results in one SQLite file."""
+
+    def __init__(self, path=DEFAULT_PATH, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        with closing(self._connect()) as conn:
+            conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_key TEXT NOT NULL UNIQUE,
+                    sweep TEXT NOT NULL,
+                    strategy_name TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    dataset TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    created_at REAL NOT NULL,
+                    finished_at REAL,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim
+                    ON jobs (status, lease_expires, job_id);
+                CREATE TABLE IF NOT EXISTS results (
+                    job_id INTEGER PRIMARY KEY REFERENCES jobs (job_id),
+                    worker TEXT NOT NULL,
+                    finished_at REAL NOT NULL,
+                    seconds REAL,
+                    stats TEXT,
+                    {", ".join(f"{column} REAL" for column in RUN_METRIC_COLUMNS)}
+                );
+                CREATE INDEX IF NOT EXISTS idx_results_finished
+                    ON results (finished_at);
+                """
+            )
+
+    def _connect(self):
+        # Autocommit mode, so claims can open their own BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def enqueue(self, strategy_name, config, dataset, sweep="default"):
+        """Add one job; returns its id (the existing one for a duplicate)."""
+        return self.enqueue_many(
+            [
+                {
+                    "strategy_name": strategy_name,
+                    "config": config,
+                    "dataset": dataset,
+                    "sweep": sweep,
+                }
+            ]
+        )[0]
+
+    def enqueue_many(self, jobs):
+        """
+        Add jobs given as dicts with strategy_name, config, dataset and an
+        optional sweep, in one transaction. Returns their ids in order.
+        """
+        now = time.time()
+        rows = []
+        for job in jobs:
+            sweep = job.get("sweep", "default")
+            rows.append(
+                (
+                    job_key(sweep, job["strategy_name"], job["config"], job["dataset"]),
+                    sweep,
+                    job["strategy_name"],
+                    json.dumps(job["config"], sort_keys=True),
+                    job["dataset"],
+                    QUEUED,
+                    now,
+                )
+            )
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO jobs (job_key, sweep, strategy_name, config,
+                                            dataset, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            ids = [
+                conn.execute(
+                    "SELECT job_id FROM jobs WHERE job_key = ?", (row[0],)
+                ).fetchone()[0]
+                for row in rows
+            ]
+            conn.execute("COMMIT")
+        return ids
+
+    def claim(self, worker_id, batch_size=1):
+        """
+        Lease up to `batch_size` jobs to `worker_id`: queued jobs first, then
+        leased jobs whose lease has expired. Jobs that already used up
+        MAX_ATTEMPTS are marked failed instead. Returns the jobs as dicts.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = conn.execute(
+                """
+                UPDATE jobs SET status = ?, lease_owner = NULL, finished_at = ?,
+                                error = 'lease expired too often'
+                WHERE status = ? AND lease_expires < ? AND attempts >= ?
+                """,
+                (FAILED, now, LEASED, now, MAX_ATTEMPTS),
+            ).rowcount
+            rows = conn.execute(
+                """
+                SELECT job_id, sweep, strategy_name, config, dataset, attempts
+                FROM jobs
+                WHERE status = ? OR (status = ? AND lease_expires < ?)
+                ORDER BY job_id LIMIT ?
+                """,
+                (QUEUED, LEASED, now, batch_size),
+            ).fetchall()
+            conn.executemany(
+                """
+                UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?,
+                                attempts = attempts + 1
+                WHERE job_id = ?
+                """,
+                [(LEASED, worker_id, now + self.lease_seconds, r[0]) for r in rows],
+            )
+            conn.execute("COMMIT")
+        if expired:
+            logger.warning(
+                f"{expired} jobs failed after {MAX_ATTEMPTS} expired leases"
+            )
+        return [
+            {
+                "job_id": job_id,
+                "sweep": sweep,
+                "strategy_name": strategy_name,
+                "config": json.loads(config),
+                "dataset": dataset,
+                "attempt": attempts + 1,
+            }
+            for job_id, sweep, strategy_name, config, dataset, attempts in rows
+        ]
+
+    def heartbeat(self, worker_id, job_ids):
+        """
+        Extend the leases `worker_id` still holds on `job_ids`; returns the
+        ids it still owns (a job may have been re-leased after a stall).
+        """
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" * len(job_ids))
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"""
+                UPDATE jobs SET lease_expires = ?
+                WHERE status = ? AND lease_owner = ? AND job_id IN ({placeholders})
+                """,
+                (time.time() + self.lease_seconds, LEASED, worker_id, *job_ids),
+            )
+            owned = [
+                row[0]
+                for row in conn.execute(
+                    f"""
+                    SELECT job_id FROM jobs
+                    WHERE status = ? AND lease_owner = ? AND job_id IN ({placeholders})
+                    """,
+                    (LEASED, worker_id, *job_ids),
+                )
+            ]
+            conn.execute("COMMIT")
+        return owned
+
+    def complete(self, job_id, worker_id, stats, seconds=None):
+        """
+        Store the result of a job and mark it done. Idempotent: if the job
+        was already finished (e.g. by a worker it was re-leased to), the
+        first result is kept. Returns True if this call stored the result.
+        """
+        metrics = {
+            key: value
+            for key, value in stats.items()
+            if not str(key).startswith("_")
+        }
+        metric_values = []
+        for key in RUN_METRIC_COLUMNS.values():
+            try:
+                value = float(metrics.get(key))
+            except (TypeError, ValueError):
+                value = None
+            metric_values.append(None if value != value else value)  # NaN -> NULL
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = conn.execute(
+                f"""
+                INSERT OR IGNORE INTO results (job_id, worker, finished_at, seconds,
+                                               stats, {", ".join(RUN_METRIC_COLUMNS)})
+                VALUES ({", ".join("?" * (5 + len(RUN_METRIC_COLUMNS)))})
+                """,
+                (
+                    job_id,
+                    worker_id,
+                    now,
+                    seconds,
+                    json.dumps(metrics, default=str),
+                    *metric_values,
+                ),
+            ).rowcount
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, finished_at = ?, lease_owner = NULL,
+                                error = NULL
+                WHERE job_id = ? AND status != ?
+                """,
+                (DONE, now, job_id, DONE),
+            )
+            conn.execute("COMMIT")
+        return bool(stored)
+
+    def fail(self, job_id, worker_id, error):
+        """
+        Record a failed attempt: the job is queued again until it has used
+        MAX_ATTEMPTS, then marked failed. Ignored if `worker_id` no longer
+        holds the lease.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    finished_at = CASE WHEN attempts >= ? THEN ? END,
+                    lease_owner = NULL, error = ?
+                WHERE job_id = ? AND status = ? AND lease_owner = ?
+                """,
+                (
+                    MAX_ATTEMPTS,
+                    FAILED,
+                    QUEUED,
+                    MAX_ATTEMPTS,
+                    time.time(),
+                    str(error),
+                    job_id,
+                    LEASED,
+                    worker_id,
+                ),
+            )
+
+    def depth(self):
+        """Number of jobs per status."""
+        with closing(self._connect()) as conn:
+            counts = dict(
+                conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            )
+        return {
+            status: counts.get(status, 0) for status in (QUEUED, LEASED, DONE, FAILED)
+        }
+
+    def stats(self, window_seconds=60):
+        """Queue depth plus the jobs/s finished over the last `window_seconds`."""
+        since = time.time() - window_seconds
+        with closing(self._connect()) as conn:
+            recent, first = conn.execute(
+                "SELECT COUNT(*), MIN(finished_at) FROM results WHERE finished_at >= ?",
+                (since,),
+            ).fetchone()
+        # A queue that started within the window is measured from its first result
+        elapsed = time.time() - first if first is not None else window_seconds
+        elapsed = min(max(elapsed, 1e-9), window_seconds)
+        return {
+            **self.depth(),
+            "jobs_per_second": recent / elapsed if recent else 0.0,
+        }
+
+    def results(self, sweep=None):
+        """Finished jobs with their parameters and metric columns."""
+        query = f"""
+            SELECT j.job_id, j.sweep, j.strategy_name, j.config, j.dataset, r.worker,
+                   r.seconds, {", ".join(f"r.{c}" for c in RUN_METRIC_COLUMNS)}
+            FROM results r JOIN jobs j ON j.job_id = r.job_id
+            {"WHERE j.sweep = ?" if sweep is not None else ""}
+            ORDER BY j.job_id
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(query, (sweep,) if sweep is not None else ())
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row["config"] = json.loads(row["config"])
+        return rows
+
+
+def load_dataset(path):
+    """
+    An OHLCV CSV as written by strategy_storage (datetime index in the first
+    column), read once per worker process and file version.
+    """
+    key = ("work_queue", os.path.abspath(path), os.path.getmtime(path))
+    return _datasets.get_or_load(
+        key, lambda: pd.read_csv(path, index_col=0, parse_dates=True)
+    )
+
+
+class _Heartbeat(threading.Thread):
+    """Renews the worker's leases until stopped."""
+
+    def __init__(self, queue, worker_id, job_ids, interval):
+        super().__init__(daemon=True, name=f"heartbeat-{worker_id}")
+        self.queue = queue
+        self.worker_id = worker_id
+        self.job_ids = list(job_ids)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.job_ids = self.queue.heartbeat(self.worker_id, self.job_ids)
+            except sqlite3.Error as e:
+                logger.warning(f"Heartbeat of {self.worker_id} failed: {e}")
+
+    def done(self, job_id):
+        if job_id in self.job_ids:
+            self.job_ids.remove(job_id)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_worker(
+    path=DEFAULT_PATH,
+    worker_id=None,
+    batch_size=4,
+    lease_seconds=LEASE_SECONDS,
+    poll_seconds=1.0,
+    idle_exit_seconds=None,
+    max_jobs=None,
+    stop_event=None,
+):
+    """
+    Claim and run jobs until `stop_event` is set, `max_jobs` have been run,
+    or (with `idle_exit_seconds`) the queue has had no queued or leased jobs
+    for that long.
+    Returns the number of jobs run.
+    """
+    from backtest import run_backtest
+
+    queue = WorkQueue(path, lease_seconds)
+    worker_id = worker_id or (
+        f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    )
+    logger.info(f"Worker {worker_id} started on {path}")
+    processed = 0
+    idle_since = time.time()
+
+    while stop_event is None or not stop_event.is_set():
+        if max_jobs is not None and processed >= max_jobs:
+            break
+        limit = batch_size
+        if max_jobs is not None:
+            limit = min(batch_size, max_jobs - processed)
+        jobs = queue.claim(worker_id, limit)
+        if not jobs:
+            if queue.depth()[LEASED]:
+                # Other workers' jobs may still come back when a lease expires
+                idle_since = time.time()
+            idle = time.time() - idle_since
+            if idle_exit_seconds is not None and idle > idle_exit_seconds:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        heartbeat = _Heartbeat(
+            queue, worker_id, [job["job_id"] for job in jobs], queue.lease_seconds / 3
+        )
+        heartbeat.start()
+        try:
+            for job in jobs:
+                start = time.perf_counter()
+                try:
+                    with run_context(f"job-{job['job_id']}"):
+                        stats = run_backtest(
+                            load_dataset(job["dataset"]),
+                            job["strategy_name"],
+                            job["config"],
+                        )
+                    if stats is None:
+                        raise KeyError(f"Strategy '{job['strategy_name']}' not found")
+                    queue.complete(
+                        job["job_id"],
+                        worker_id,
+                        stats,
+                        seconds=time.perf_counter() - start,
+                    )
+                except Exception as e:
+                    logger.exception(f"Job {job['job_id']} failed: {e}")
+                    queue.fail(job["job_id"], worker_id, e)
+                heartbeat.done(job["job_id"])
+                processed += 1
+        finally:
+            heartbeat.stop()
+        idle_since = time.time()
+
+    logger.info(f"Worker {worker_id} stopped after {processed} jobs")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite backtest work queue.")
+    parser.add_argument("command", choices=["worker", "status"])
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS)
+    parser.add_argument("--idle-exit", type=float, default=None)
+    parser.add_argument("--max-jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(
+            args.db,
+            batch_size=args.batch,
+            lease_seconds=args.lease,
+            idle_exit_seconds=args.idle_exit,
+            max_jobs=args.max_jobs,
+        )
+    else:
+        print(json.dumps(WorkQueue(args.db).stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()